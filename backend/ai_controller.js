@@ -1,4 +1,5 @@
 const path = require('path');
+const pythonSidecar = require('./src/services/pythonSidecar');
 
 class LegalAIController {
     constructor() {
@@ -16,167 +17,52 @@ class LegalAIController {
     }
 
     /**
-     * Analyze a legal document using the AI model
+     * Analyze a legal document using the AI model. The text is uploaded in
+     * chunks to the analyze handler of the Python sidecar, which runs the
+     * same pipeline as document_intake.py with its models already loaded
+     * and processes the document while it arrives.
      * @param {string} documentText - The text of the legal document to analyze
+     * @param {Object} [options]
+     * @param {AbortSignal} [options.signal] - Cancels the analysis in the sidecar when aborted
      * @returns {Promise<Object>} - The analysis results from the AI model
      */
-    async analyzeDocument(documentText) {
-        return new Promise((resolve, reject) => {
-            // Prepare the input data
-            const inputData = {
-                document_text: documentText
-            };
-
-            // Configure PythonShell options
-            const options = {
-                mode: 'text',
-                pythonPath: process.env.PYTHON_PATH || 'python',
-                pythonOptions: ['-u'],
-                scriptPath: __dirname,
-                args: []
-            };
-
-            // Debug: Log the options
-            console.log('PythonShell options:', options);
-            
-            // Start the Python process
-            const pythonShell = new PythonShell('legal_ai.py', options);
-            
-            // Debug: Log when Python process starts
-            console.log('Starting Python process for document analysis');
-
-            // Debug: Log the input data
-            console.log('Sending to Python script:', {
-                type: typeof documentText,
-                length: documentText ? documentText.length : 0,
-                sample: documentText ? documentText.substring(0, 100) : ''
-            });
-            
-            // Send the input data to the Python script
-            const jsonString = JSON.stringify(inputData);
-            console.log('Sending JSON to Python:', jsonString);
-            pythonShell.send(jsonString);
-            
-            // Debug: Log when data is sent
-            console.log('Data sent to Python process');
-
-            // Collect the output
-            let output = '';
-            pythonShell.on('message', (message) => {
-                console.log('Received from Python:', message);
-                output += message;
-            });
-            
-            // Debug: Log errors from PythonShell
-            pythonShell.on('error', (error) => {
-                console.error('PythonShell error:', error);
-            });
-            
-            pythonShell.on('close', () => {
-                console.log('Python process closed');
-            });
+    async analyzeDocument(documentText, { signal = null } = {}) {
+        const text = typeof documentText === 'string' ? documentText : String(documentText || '');
+        if (!text) {
+            return { error: 'Document text is empty' };
+        }
 
-            // Handle completion
-            pythonShell.end((err) => {
-                if (err) {
-                    console.error('Python script error:', err);
-                    reject(new Error(`Python script error: ${err}`));
-                } else {
-                    try {
-                        console.log('Python output:', output);
-                        // Parse the JSON output from Python
-                        const result = JSON.parse(output);
-                        resolve(result);
-                    } catch (parseError) {
-                        console.error('Failed to parse Python output:', parseError);
-                        console.error('Output was:', output);
-                        reject(new Error(`Failed to parse Python output: ${parseError.message}`));
-                    }
-                }
-            });
+        console.log('Sending document to Python sidecar:', {
+            length: text.length,
+            sample: text.substring(0, 100)
         });
+
+        const result = await pythonSidecar.requestDocument('analyze', text, { task: 'analyze' }, { signal });
+        if (!result.success) {
+            throw new Error(result.error || 'Document analysis failed');
+        }
+        return result.analysis;
     }
 
     /**
      * Get a legal assistant response using the AI model
      * @param {string} query - The legal question to answer
+     * @param {Object} [options]
+     * @param {AbortSignal} [options.signal] - Cancels generation in the sidecar when aborted
      * @returns {Promise<Object>} - The response from the AI model
      */
-    async getLegalAssistantResponse(query) {
-        return new Promise((resolve, reject) => {
-            // Prepare the input data
-            const inputData = {
-                query: query
-            };
-
-            // Configure PythonShell options
-            const options = {
-                mode: 'text',
-                pythonPath: process.env.PYTHON_PATH || 'python',
-                pythonOptions: ['-u'],
-                scriptPath: __dirname,
-                args: []
-            };
-
-            // Debug: Log the options
-            console.log('PythonShell options for legal assistant:', options);
-            
-            // Start the Python process
-            const pythonShell = new PythonShell('legal_ai.py', options);
-            
-            // Debug: Log when Python process starts
-            console.log('Starting Python process for legal assistant');
-
-            // Debug: Log the input data
-            console.log('Sending query to Python script:', {
-                type: typeof query,
-                length: query ? query.length : 0,
-                sample: query ? query.substring(0, 100) : ''
-            });
-            
-            // Send the input data to the Python script
-            const jsonString = JSON.stringify(inputData);
-            console.log('Sending JSON to Python:', jsonString);
-            pythonShell.send(jsonString);
-            
-            // Debug: Log when data is sent
-            console.log('Query sent to Python process');
-
-            // Collect the output
-            let output = '';
-            pythonShell.on('message', (message) => {
-                console.log('Received from Python:', message);
-                output += message;
-            });
-            
-            // Debug: Log errors from PythonShell
-            pythonShell.on('error', (error) => {
-                console.error('PythonShell error:', error);
-            });
-            
-            pythonShell.on('close', () => {
-                console.log('Python process closed');
-            });
-
-            // Handle completion
-            pythonShell.end((err) => {
-                if (err) {
-                    console.error('Python script error:', err);
-                    reject(new Error(`Python script error: ${err}`));
-                } else {
-                    try {
-                        console.log('Python output:', output);
-                        // Parse the JSON output from Python
-                        const result = JSON.parse(output);
-                        resolve(result);
-                    } catch (parseError) {
-                        console.error('Failed to parse Python output:', parseError);
-                        console.error('Output was:', output);
-                        reject(new Error(`Failed to parse Python output: ${parseError.message}`));
-                    }
-                }
-            });
+    async getLegalAssistantResponse(query, { signal = null } = {}) {
+        console.log('Sending query to Python sidecar:', {
+            type: typeof query,
+            length: query ? query.length : 0,
+            sample: query ? query.substring(0, 100) : ''
         });
+
+        const { id, ...result } = await pythonSidecar.request('assistant', { query }, { signal });
+        if (result.success === false) {
+            throw new Error(`Python script error: ${result.error}`);
+        }
+        return result;
     }
 
     /**
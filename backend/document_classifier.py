@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import zlib
+
+import numpy as np
+
+DEFAULT_MODEL_PATH = os.environ.get('DOCUMENT_CLASSIFIER_MODEL',
+                                    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'document_type_model.npz'))
+DEFAULT_THRESHOLD = float(os.environ.get('DOCUMENT_CLASSIFIER_THRESHOLD', '0.9'))
+
+# The type of a legal document is settled by its heading and first
+# paragraphs, so only the beginning is read
+CLASSIFY_CHARS = 2048
+
+WORD = re.compile(r"[a-z0-9]+")
+BIGRAM_MULTIPLIER = np.uint32(0x9E3779B1)
+
+
+def hashed_features(text, num_features, max_chars=CLASSIFY_CHARS):
+    """
+    Word unigrams and bigrams hashed into num_features buckets, with the
+    hash's top bit choosing the sign to cancel out collisions. Words are
+    hashed with crc32 (the same on every run, unlike hash()) and bigram
+    hashes are mixed from the two word hashes. Returns (indices, values),
+    L2-normalized.
+    """
+    words = WORD.findall(text[:max_chars].lower())
+    if not words:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    codes = {word: zlib.crc32(word.encode('utf-8')) for word in set(words)}
+    unigrams = np.fromiter(map(codes.__getitem__, words), dtype=np.uint32, count=len(words))
+    bigrams = (unigrams[:-1] * BIGRAM_MULTIPLIER) ^ unigrams[1:]
+    hashes = np.concatenate([unigrams, bigrams])
+    signs = np.where(hashes & np.uint32(0x80000000), -1.0, 1.0)
+    indices, inverse = np.unique((hashes % np.uint32(num_features)).astype(np.int64), return_inverse=True)
+    values = np.bincount(inverse, weights=signs, minlength=len(indices)).astype(np.float32)
+    norm = np.linalg.norm(values)
+    return indices, values / norm if norm else values
+
+
+class DocumentClassifier:
+    """
+    Linear (softmax regression) document-type classifier over hashed n-gram
+    features. The model is a single .npz of weights, so loading it is a
+    file read.
+    """
+
+    def __init__(self, labels, weights, bias):
+        self.labels = list(labels)
+        self.weights = weights  # (num_features, classes)
+        self.bias = bias
+        self.num_features = weights.shape[0]
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls([str(label) for label in data['labels']], data['weights'], data['bias'])
+
+    def save(self, path):
+        np.savez(path, labels=np.array(self.labels), weights=self.weights, bias=self.bias)
+
+    def scores(self, text):
+        indices, values = hashed_features(text, self.num_features)
+        return values @ self.weights[indices] + self.bias
+
+    def predict_proba(self, text):
+        scores = self.scores(text)
+        exp = np.exp(scores - scores.max())
+        return dict(zip(self.labels, (exp / exp.sum()).tolist()))
+
+    def predict(self, text):
+        """
+        (document type, confidence)
+        """
+        probabilities = self.predict_proba(text)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+
+def train(texts, labels, num_features=1 << 18, epochs=10, learning_rate=8.0, l2=1e-6, batch_size=64, seed=0):
+    """
+    Fit a DocumentClassifier with mini-batch gradient descent on the
+    cross-entropy loss
+    """
+    classes = sorted(set(labels))
+    targets = np.array([classes.index(label) for label in labels])
+    features = [hashed_features(text, num_features) for text in texts]
+    weights = np.zeros((num_features, len(classes)), dtype=np.float32)
+    bias = np.zeros(len(classes), dtype=np.float32)
+    rng = np.random.RandomState(seed)
+
+    for epoch in range(epochs):
+        rate = learning_rate / (1 + epoch)
+        order = rng.permutation(len(features))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            rows = [features[i] for i in batch]
+            scores = np.stack([values @ weights[indices] for indices, values in rows]) + bias
+            probabilities = np.exp(scores - scores.max(axis=1, keepdims=True))
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            probabilities[np.arange(len(batch)), targets[batch]] -= 1.0  # gradient of the loss wrt scores
+            probabilities /= len(batch)
+            for (indices, values), error in zip(rows, probabilities):
+                weights[indices] -= rate * (np.outer(values, error) + l2 * weights[indices])
+            bias -= rate * probabilities.sum(axis=0)
+    return DocumentClassifier(classes, weights, bias)
+
+
+class TypeRouter:
+    """
+    Decides from the beginning of a document whether it needs the
+    transformer at all. Used as document_intake's make_encoder with
+    route_bytes set: it is called with the first CLASSIFY_CHARS of text,
+    records the predicted type, and returns no encoder when the type is one
+    of skip_types and predicted with at least `threshold` confidence.
+    """
+
+    def __init__(self, classifier, make_encoder=None, threshold=DEFAULT_THRESHOLD, skip_types=None):
+        self.classifier = classifier
+        self.make_encoder = make_encoder
+        self.threshold = threshold
+        self.skip_types = set(skip_types) if skip_types is not None else set(classifier.labels)
+        self.document_type = None
+        self.confidence = None
+        self.skipped = False
+
+    def __call__(self, prefix):
+        self.document_type, self.confidence = self.classifier.predict(prefix)
+        self.skipped = self.confidence >= self.threshold and self.document_type in self.skip_types
+        if self.skipped or self.make_encoder is None:
+            return None
+        return self.make_encoder()
+
+    def result(self):
+        return {"document_type": self.document_type, "document_type_confidence": self.confidence,
+                "encoder_skipped": self.skipped}
+
+
+def load_corpus(manifest_path):
+    """
+    (ids, texts, labels) from a generate_legal_corpus.py manifest, or from a
+    JSONL file of {"text", "label"} records
+    """
+    base = os.path.dirname(manifest_path)
+    ids, texts, labels = [], [], []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for n, line in enumerate(f):
+            entry = json.loads(line)
+            if 'text' in entry:
+                text = entry['text']
+            else:
+                with open(os.path.join(base, entry['files']['txt']), 'r', encoding='utf-8') as doc:
+                    text = doc.read(CLASSIFY_CHARS)
+            ids.append(str(entry.get('id', n)))
+            texts.append(text)
+            labels.append(entry.get('label', entry.get('type')))
+    return ids, texts, labels
+
+
+def held_out(doc_id, test_fraction):
+    # Stable split by id, so retraining never moves a document between sets
+    return zlib.crc32(doc_id.encode('utf-8')) % 1000 < test_fraction * 1000
+
+
+def evaluate(classifier, texts, labels, ids=None, reference=None, threshold=DEFAULT_THRESHOLD):
+    """
+    Accuracy, per-type precision/recall, confusion matrix and latency.
+    reference maps document id -> the type the transformer path produced,
+    to report how often the two agree.
+    """
+    predictions = []
+    start = time.perf_counter()
+    for text in texts:
+        predictions.append(classifier.predict(text))
+    seconds = time.perf_counter() - start
+
+    confusion = {truth: {label: 0 for label in classifier.labels} for truth in sorted(set(labels))}
+    for (predicted, _), truth in zip(predictions, labels):
+        confusion[truth][predicted] = confusion[truth].get(predicted, 0) + 1
+    per_type = {}
+    for label in classifier.labels:
+        tp = confusion.get(label, {}).get(label, 0)
+        predicted = sum(row.get(label, 0) for row in confusion.values())
+        actual = sum(confusion.get(label, {}).values())
+        per_type[label] = {"precision": tp / predicted if predicted else None,
+                           "recall": tp / actual if actual else None, "support": actual}
+    confident = [(p, t) for (p, c), t in zip(predictions, labels) if c >= threshold]
+    report = {
+        "documents": len(texts),
+        "accuracy": sum(p == t for (p, _), t in zip(predictions, labels)) / len(texts) if texts else None,
+        "confident_fraction": len(confident) / len(texts) if texts else None,
+        "confident_accuracy": sum(p == t for p, t in confident) / len(confident) if confident else None,
+        "threshold": threshold,
+        "per_type": per_type,
+        "confusion": confusion,
+        "microseconds_per_document": seconds * 1e6 / len(texts) if texts else None,
+    }
+    if reference and ids:
+        pairs = [(p, reference[i]) for (p, _), i in zip(predictions, ids) if i in reference]
+        report["transformer_agreement"] = sum(p == r for p, r in pairs) / len(pairs) if pairs else None
+        report["transformer_compared"] = len(pairs)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hashed n-gram document-type classifier")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = commands.add_parser('train', help="train on a labelled manifest and report held-out accuracy")
+    train_parser.add_argument('manifest')
+    train_parser.add_argument('--features', type=int, default=1 << 18)
+    train_parser.add_argument('--epochs', type=int, default=10)
+    train_parser.add_argument('--test-fraction', type=float, default=0.2)
+    train_parser.add_argument('--report', help="write the accuracy report here as well")
+
+    evaluate_parser = commands.add_parser('evaluate', help="accuracy report for a saved model")
+    evaluate_parser.add_argument('manifest')
+    evaluate_parser.add_argument('--reference', help="JSONL of {id, document_type} from the transformer path")
+    evaluate_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    commands.add_parser('predict', help="classify the document on stdin")
+    args = parser.parse_args()
+
+    if args.command == 'predict':
+        classifier = DocumentClassifier.load(args.model)
+        start = time.perf_counter()
+        label, confidence = classifier.predict(sys.stdin.read(CLASSIFY_CHARS))
+        print(json.dumps({"success": True, "document_type": label, "confidence": confidence,
+                          "classify_ms": (time.perf_counter() - start) * 1000}))
+        return
+
+    ids, texts, labels = load_corpus(args.manifest)
+    if args.command == 'train':
+        test = [held_out(i, args.test_fraction) for i in ids]
+        pick = lambda items, flag: [x for x, t in zip(items, test) if t == flag]
+        start = time.perf_counter()
+        classifier = train(pick(texts, False), pick(labels, False), args.features, args.epochs)
+        train_seconds = time.perf_counter() - start
+        classifier.save(args.model)
+        report = dict(evaluate(classifier, pick(texts, True), pick(labels, True)),
+                      train_documents=test.count(False), train_seconds=train_seconds, model=args.model)
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+    else:
+        classifier = DocumentClassifier.load(args.model)
+        reference = None
+        if args.reference:
+            with open(args.reference, 'r', encoding='utf-8') as f:
+                reference = {str(r['id']): r['document_type'] for r in map(json.loads, f)}
+        report = evaluate(classifier, texts, labels, ids, reference, args.threshold)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import atexit
+import hashlib
+import os
+import pickle
+import re
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Parameters for the universal hash family h(x) = (a*x + b) mod p, p = 2^61 - 1.
+# Shingle hashes are 32-bit and a, b < 2^32, so a*x + b fits in uint64.
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+WORD = re.compile(r"\w+", re.UNICODE)
+
+# Template placeholders such as [APPLICANT NAME] or [DATE] count as one token,
+# so filling them in changes only a few shingles
+PLACEHOLDER = re.compile(r"\[[^\]\n]{1,60}\]")
+
+# Section breaks: blank lines, or a numbered paragraph ("1.", "2)", "(iii)")
+SECTION_BREAK = re.compile(r"\n\s*\n|\n(?=\s*(?:\d{1,3}[.)]|\([ivxlc]+\))\s)")
+
+
+def tokenize(text):
+    return WORD.findall(PLACEHOLDER.sub(' placeholder ', text.lower()))
+
+
+def split_sections(text):
+    return [section.strip() for section in SECTION_BREAK.split(text) if section.strip()]
+
+
+def section_hash(section):
+    return hashlib.sha1(' '.join(tokenize(section)).encode('utf-8')).hexdigest()
+
+
+def choose_bands(threshold, num_perm):
+    """
+    (bands, rows) with bands * rows == num_perm whose S-curve threshold
+    (1/bands)^(1/rows) is the highest at or below the requested similarity
+    threshold. Candidates are checked against the threshold anyway, so a
+    curve that sits lower costs a few comparisons, while one that sits
+    higher would miss documents just above the threshold.
+    """
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return max((br for br in options if (1.0 / br[0]) ** (1.0 / br[1]) <= threshold),
+               key=lambda br: (1.0 / br[0]) ** (1.0 / br[1]), default=(num_perm, 1))
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles. Jaccard similarity of two
+    documents' shingle sets is estimated by the fraction of equal signature
+    positions.
+    """
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def shingle_hashes(self, tokens):
+        k = self.shingle_size
+        if len(tokens) < k:
+            grams = [' '.join(tokens)] if tokens else []
+        else:
+            grams = {' '.join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+        # blake2b rather than hash(): stable across processes, so saved indexes stay valid
+        return np.fromiter(
+            (struct.unpack('<I', hashlib.blake2b(g.encode('utf-8'), digest_size=4).digest())[0] for g in grams),
+            dtype=np.uint64)
+
+    def signature(self, text):
+        hashes = self.shingle_hashes(tokenize(text))
+        if not len(hashes):
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        # (num_perm, shingles) in blocks to bound the temporary array
+        signature = np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), 4096):
+            block = hashes[start:start + 4096]
+            permuted = ((np.outer(self.a, block) + self.b[:, None]) % MERSENNE_PRIME) & MAX_HASH
+            signature = np.minimum(signature, permuted.min(axis=1))
+        return signature
+
+
+def estimate_similarity(sig_a, sig_b):
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+class LSHIndex:
+    """
+    Banded locality-sensitive hashing over MinHash signatures. Documents
+    that agree on every row of at least one band become candidates; only
+    those are compared.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128):
+        self.threshold = threshold
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+        self.tables = [dict() for _ in range(self.bands)]
+        self.signatures = {}
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def insert(self, doc_id, signature):
+        self.signatures[doc_id] = signature
+        for band, key in self._band_keys(signature):
+            self.tables[band].setdefault(key, set()).add(doc_id)
+
+    def remove(self, doc_id):
+        signature = self.signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        for band, key in self._band_keys(signature):
+            bucket = self.tables[band].get(key)
+            if bucket:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self.tables[band][key]
+
+    def query(self, signature):
+        """
+        [(doc_id, estimated similarity)] at or above the threshold, best first
+        """
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self.tables[band].get(key, ()))
+        scored = [(doc_id, estimate_similarity(signature, self.signatures[doc_id])) for doc_id in candidates]
+        return sorted((item for item in scored if item[1] >= self.threshold), key=lambda item: -item[1])
+
+
+class DocumentAnalysisCache:
+    """
+    Reuses analysis across near-duplicate documents.
+
+    Each analyzed document is kept as its MinHash signature plus per-section
+    results keyed by section hash. A new document that is a near-duplicate
+    of a stored one takes the results of the sections they share and only
+    the differing sections are analyzed; an exact duplicate is not analyzed
+    at all. Documents are evicted least-recently-used beyond max_documents.
+
+    With a path, the cache is persisted by maybe_save() once save_every
+    documents have been added or save_interval seconds have passed since
+    the last save, and at interpreter exit; not per document, since a save
+    rewrites the whole cache.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, max_documents=10000, path=None,
+                 save_every=100, save_interval=60.0):
+        self.hasher = MinHasher(num_perm)
+        self.index = LSHIndex(threshold, num_perm)
+        self.max_documents = max_documents
+        self.path = path
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self._dirty = 0  # documents added since the last save
+        self._last_save = time.monotonic()
+        self._save_lock = threading.Lock()
+        self.documents = OrderedDict()  # doc_id -> {"sections": {hash: result}, "result": combined}
+        self.stats = {"documents": 0, "exact_duplicates": 0, "near_duplicates": 0,
+                      "sections_total": 0, "sections_analyzed": 0}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+        if path:
+            atexit.register(self.save)
+
+    def analyze(self, text, analyze_section, combine):
+        """
+        Analyze text section by section and return (result, info).
+        analyze_section(section_text) returns one section's result;
+        combine(list of section results) merges them into the document result.
+        """
+        doc_id = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        with self._lock:
+            self.stats["documents"] += 1
+            stored = self.documents.get(doc_id)
+            if stored is not None:
+                self.documents.move_to_end(doc_id)
+                self.stats["exact_duplicates"] += 1
+                return stored["result"], {"duplicate_of": doc_id, "similarity": 1.0,
+                                          "sections_total": len(stored["order"]), "sections_analyzed": 0}
+
+        signature = self.hasher.signature(text)
+        with self._lock:
+            matches = self.index.query(signature)
+            match_id, similarity = matches[0] if matches else (None, 0.0)
+            known = dict(self.documents[match_id]["sections"]) if match_id else {}
+
+        sections = split_sections(text)
+        hashes = [section_hash(section) for section in sections]
+        results = {}
+        analyzed = 0
+        for section, digest in zip(sections, hashes):
+            if digest in results:
+                continue
+            if digest in known:
+                results[digest] = known[digest]
+            else:
+                results[digest] = analyze_section(section)
+                analyzed += 1
+        combined = combine([results[digest] for digest in hashes])
+
+        with self._lock:
+            self.documents[doc_id] = {"sections": results, "order": hashes, "result": combined}
+            self.index.insert(doc_id, signature)
+            self._dirty += 1
+            while len(self.documents) > self.max_documents:
+                old_id, _ = self.documents.popitem(last=False)
+                self.index.remove(old_id)
+            self.stats["sections_total"] += len(sections)
+            self.stats["sections_analyzed"] += analyzed
+            if match_id:
+                self.stats["near_duplicates"] += 1
+        return combined, {"duplicate_of": match_id, "similarity": similarity,
+                          "sections_total": len(sections), "sections_analyzed": analyzed}
+
+    def metrics(self):
+        with self._lock:
+            total = self.stats["sections_total"]
+            return dict(self.stats, stored_documents=len(self.documents),
+                        sections_reused=total - self.stats["sections_analyzed"],
+                        reuse_rate=(total - self.stats["sections_analyzed"]) / total if total else 0.0)
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get("num_perm") != self.hasher.num_perm:
+            return
+        for doc_id, document in state["documents"].items():
+            self.documents[doc_id] = document
+            self.index.insert(doc_id, state["signatures"][doc_id])
+
+    def maybe_save(self):
+        """
+        Save if enough documents were added, or enough time has passed
+        with any added, since the last save; call after each document
+        """
+        with self._lock:
+            due = self._dirty >= self.save_every or (
+                self._dirty and time.monotonic() - self._last_save >= self.save_interval)
+        if due:
+            self.save()
+
+    def save(self):
+        """
+        Write the whole cache to path if anything was added since the last save
+        """
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                saved = self._dirty
+                state = {"num_perm": self.hasher.num_perm,
+                         "documents": dict(self.documents),
+                         "signatures": dict(self.index.signatures)}
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+            with self._lock:
+                self._dirty -= saved
+                self._last_save = time.monotonic()
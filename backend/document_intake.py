@@ -0,0 +1,442 @@
+import codecs
+import json
+import os
+import queue
+import re
+import struct
+import sys
+import threading
+import time
+
+try:
+    import torch
+    from transformers import AutoTokenizer, AutoModel
+    HAS_TRANSFORMERS = True
+except ImportError:
+    HAS_TRANSFORMERS = False
+
+# Frame layout: 1-byte type, 4-byte big-endian payload length, payload
+FRAME_HEADER = struct.Struct('>cI')
+FRAME_META = b'H'   # JSON metadata, first frame
+FRAME_TEXT = b'C'   # UTF-8 text chunk (may split a character)
+FRAME_END = b'E'    # end of document, empty payload
+MAX_FRAME_BYTES = 4 * 1024 * 1024
+MAX_CARRY_CHARS = 4096
+
+DEFAULT_MODEL = os.environ.get('INCASELAWBERT_MODEL', 'law-ai/InCaseLawBERT')
+
+WORD = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def read_exactly(stream, size):
+    data = stream.read(size)
+    while data is not None and len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            break
+        data += more
+    if not data or len(data) < size:
+        raise ProtocolError(f"Stream ended inside a frame ({len(data or b'')} of {size} bytes)")
+    return data
+
+
+def read_frames(stream):
+    """
+    Yield (type, payload) frames from a binary stream until the end frame
+    """
+    while True:
+        header = stream.read(FRAME_HEADER.size)
+        if not header:
+            raise ProtocolError("Stream ended before the end frame")
+        if len(header) < FRAME_HEADER.size:
+            header += read_exactly(stream, FRAME_HEADER.size - len(header))
+        frame_type, length = FRAME_HEADER.unpack(header)
+        if length > MAX_FRAME_BYTES:
+            raise ProtocolError(f"Frame of {length} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+        payload = read_exactly(stream, length) if length else b''
+        yield frame_type, payload
+        if frame_type == FRAME_END:
+            return
+
+
+def write_frame(stream, frame_type, payload=b''):
+    stream.write(FRAME_HEADER.pack(frame_type, len(payload)))
+    stream.write(payload)
+
+
+def write_document(stream, text, metadata=None, chunk_bytes=64 * 1024):
+    """
+    Send a document using the framed protocol, for tests and tools (the
+    Node backend sends the same frames through pythonSidecar.requestDocument)
+    """
+    data = text.encode('utf-8')
+    meta = dict(metadata or {}, byte_length=len(data))
+    write_frame(stream, FRAME_META, json.dumps(meta).encode('utf-8'))
+    for start in range(0, len(data), chunk_bytes):
+        write_frame(stream, FRAME_TEXT, data[start:start + chunk_bytes])
+    write_frame(stream, FRAME_END)
+    stream.flush()
+
+
+class WordTokenizer:
+    """
+    Regex word/punctuation tokenizer, used to count tokens when no model is
+    available
+    """
+    def encode(self, text):
+        return WORD.findall(text)
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_model(model_path, device):
+    """
+    (tokenizer, model) for model_path on device, loaded once per process and
+    shared by every encoder, so a long-lived worker holds one copy
+    """
+    with _models_lock:
+        if (model_path, device) not in _models:
+            model = AutoModel.from_pretrained(model_path).to(device)
+            model.eval()
+            _models[(model_path, device)] = (AutoTokenizer.from_pretrained(model_path), model)
+        return _models[(model_path, device)]
+
+
+class BertWindowEncoder:
+    """
+    InCaseLawBERT over fixed-size token windows. Windows are batched and the
+    mean-pooled embeddings are folded into a running sum, so memory does
+    not depend on document length.
+    """
+
+    def __init__(self, model_path=DEFAULT_MODEL, batch_size=8, device=None):
+        if not HAS_TRANSFORMERS:
+            raise RuntimeError("transformers/torch libraries not available")
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.tokenizer, self.model = load_model(model_path, self.device)
+        self.batch_size = batch_size
+        self.window_tokens = self.tokenizer.model_max_length - 2
+        self._pending = []
+        self.embedding_sum = None
+        self.windows = 0
+
+    def encode(self, text):
+        return self.tokenizer(text, add_special_tokens=False)['input_ids']
+
+    def add_window(self, token_ids):
+        self._pending.append(self.tokenizer.build_inputs_with_special_tokens(token_ids))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        batch = self.tokenizer.pad({'input_ids': self._pending}, return_tensors='pt').to(self.device)
+        with torch.no_grad():
+            hidden = self.model(**batch).last_hidden_state
+        mask = batch['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+        pooled = ((hidden * mask).sum(1) / mask.sum(1).clamp(min=1)).sum(0)
+        self.embedding_sum = pooled if self.embedding_sum is None else self.embedding_sum + pooled
+        self.windows += len(self._pending)
+        self._pending = []
+
+    def result(self):
+        self.flush()
+        if self.embedding_sum is None:
+            return None
+        return (self.embedding_sum / self.windows).cpu().numpy()
+
+    def take(self):
+        """
+        (embedding sum, window count) so far, then start over; used to encode
+        sections separately
+        """
+        self.flush()
+        taken = (None if self.embedding_sum is None else self.embedding_sum.cpu().numpy(), self.windows)
+        self.embedding_sum = None
+        self.windows = 0
+        return taken
+
+
+class IncrementalDocument:
+    """
+    Consumes a document chunk by chunk: decodes UTF-8 across chunk
+    boundaries, tokenizes up to the last whitespace, and hands full token
+    windows to the encoder as soon as they exist. Only the unfinished word
+    and the current window are held in memory.
+
+    Consumers registered with add_consumer get each decoded text piece
+    (split at whitespace), for extractors that work on a stream of text.
+    With a cancel token, cancel.check() runs before each chunk and each
+    window, so an abandoned request stops between encoder batches.
+    """
+
+    def __init__(self, encoder=None, window_tokens=510, stride=0, cancel=None):
+        self.encoder = encoder
+        self.cancel = cancel
+        self.tokenizer = encoder if encoder is not None else WordTokenizer()
+        self.window_tokens = getattr(encoder, 'window_tokens', window_tokens)
+        self.stride = stride
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._carry = ''
+        self._window = []
+        self._fresh = 0  # tokens in the window not yet part of an emitted one
+        self._consumers = []
+        self.characters = 0
+        self.token_count = 0
+
+    def add_consumer(self, consumer):
+        self._consumers.append(consumer)
+
+    def feed(self, data, final=False):
+        if self.cancel is not None:
+            self.cancel.check()
+        text = self._carry + self._decoder.decode(data, final=final)
+        if final:
+            piece, self._carry = text, ''
+        else:
+            # Hold back the trailing partial word until the next chunk
+            cut = max(text.rfind(' '), text.rfind('\n'))
+            if cut < 0 and len(text) > MAX_CARRY_CHARS:
+                cut = len(text) - 1  # no whitespace at all; don't buffer forever
+            piece, self._carry = (text[:cut + 1], text[cut + 1:]) if cut >= 0 else ('', text)
+        if not piece:
+            return
+        self.characters += len(piece)
+        for consumer in self._consumers:
+            consumer(piece)
+        for token in self.tokenizer.encode(piece):
+            self._window.append(token)
+            self._fresh += 1
+            self.token_count += 1
+            if len(self._window) >= self.window_tokens:
+                self._emit()
+
+    def _emit(self):
+        if self.cancel is not None:
+            self.cancel.check()
+        if self.encoder is not None:
+            self.encoder.add_window(self._window)
+        # Keep the overlap for the next window
+        self._window = self._window[len(self._window) - self.stride:] if self.stride else []
+        self._fresh = 0
+
+    def finish(self):
+        self.feed(b'', final=True)
+        if self._fresh:
+            self._emit()
+
+
+def intake(stream, make_encoder=None, consumers=(), queue_frames=8, route_bytes=0, cancel=None):
+    """
+    Read one framed document from stream and process it while it arrives.
+    stream is a binary stream, or an iterable of (type, payload) frames
+    such as the sidecar's uploads. A reader thread moves frames into a
+    bounded queue, so tokenization and encoding overlap with the transfer
+    and at most queue_frames chunks are buffered.
+
+    With route_bytes, text is held until that many bytes have arrived (or
+    the document ends) and make_encoder is called with them decoded, so it
+    can choose an encoder, or none, from the beginning of the document.
+    """
+    start = time.perf_counter()
+    frames = queue.Queue(maxsize=queue_frames)
+    stopped = threading.Event()
+
+    def reader():
+        try:
+            for frame in read_frames(stream) if hasattr(stream, 'read') else stream:
+                frames.put(frame)
+                if stopped.is_set():
+                    return
+        except Exception as e:
+            frames.put((None, e))
+
+    threading.Thread(target=reader, daemon=True).start()
+
+    try:
+        frame_type, payload = frames.get()
+        if frame_type is None:
+            raise payload
+        if frame_type != FRAME_META:
+            raise ProtocolError("First frame must be the metadata header")
+        metadata = json.loads(payload.decode('utf-8'))
+
+        encoder = None
+        document = None
+        held = []
+        received = 0
+        while True:
+            frame_type, payload = frames.get()
+            if frame_type is None:
+                raise payload
+            if frame_type not in (FRAME_TEXT, FRAME_END):
+                raise ProtocolError(f"Unexpected frame type {frame_type!r}")
+            received += len(payload)
+            if document is None:
+                held.append(payload)
+                if received < route_bytes and frame_type != FRAME_END:
+                    continue
+                prefix = b''.join(held)
+                if make_encoder and route_bytes:
+                    encoder = make_encoder(prefix.decode('utf-8', errors='ignore'))
+                elif make_encoder:
+                    encoder = make_encoder()
+                document = IncrementalDocument(encoder, stride=int(metadata.get('stride', 0)), cancel=cancel)
+                for consumer in consumers:
+                    document.add_consumer(consumer)
+                payload = prefix
+            if payload:
+                document.feed(payload)
+            if frame_type == FRAME_END:
+                break
+        document.finish()
+    except BaseException:
+        # Abandoned (bad stream, cancelled): unblock the reader so it exits
+        stopped.set()
+        while True:
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                break
+        raise
+
+    if 'byte_length' in metadata and metadata['byte_length'] != received:
+        raise ProtocolError(f"Expected {metadata['byte_length']} bytes, received {received}")
+
+    embedding = encoder.result() if encoder is not None else None
+    return metadata, {
+        "document_length": document.characters,
+        "token_count": document.token_count,
+        "windows": encoder.windows if encoder is not None else None,
+        "embedding_shape": list(embedding.shape) if embedding is not None else None,
+        "intake_seconds": time.perf_counter() - start,
+    }
+
+
+def encode_section(text, encoder=None, cancel=None):
+    """
+    Token count and embedding sum of one section, for DocumentAnalysisCache
+    """
+    document = IncrementalDocument(encoder, cancel=cancel)
+    document.feed(text.encode('utf-8'), final=True)
+    document.finish()
+    embedding_sum, windows = encoder.take() if encoder is not None else (None, 0)
+    return {"characters": document.characters, "token_count": document.token_count,
+            "embedding_sum": embedding_sum, "windows": windows}
+
+
+def combine_sections(sections):
+    embeddings = [s["embedding_sum"] for s in sections if s["embedding_sum"] is not None]
+    windows = sum(s["windows"] for s in sections)
+    embedding = sum(embeddings) / windows if embeddings and windows else None
+    return {
+        "document_length": sum(s["characters"] for s in sections),
+        "token_count": sum(s["token_count"] for s in sections),
+        "windows": windows if embeddings else None,
+        "embedding_shape": list(embedding.shape) if embedding is not None else None,
+    }
+
+
+def intake_deduplicated(stream, cache, make_encoder=None, consumers=(), route_bytes=0, cancel=None):
+    """
+    Like intake, but documents that are near-duplicates of earlier ones
+    reuse the earlier per-section results and only differing sections are
+    encoded. Comparing needs the whole text, so the text (though nothing
+    derived from it) is held until the end of the stream.
+    """
+    start = time.perf_counter()
+    pieces = []
+    metadata, _ = intake(stream, consumers=[pieces.append, *consumers], cancel=cancel)
+    text = ''.join(pieces)
+    encoder = None
+    if make_encoder and route_bytes:
+        encoder = make_encoder(text.encode('utf-8')[:route_bytes].decode('utf-8', errors='ignore'))
+    elif make_encoder:
+        encoder = make_encoder()
+    analysis, reuse = cache.analyze(text, lambda section: encode_section(section, encoder, cancel), combine_sections)
+    cache.maybe_save()
+    return metadata, dict(analysis, reuse=reuse, intake_seconds=time.perf_counter() - start)
+
+
+def default_pipeline():
+    """
+    (make_encoder, classifier, cache, skip_types) as configured by the
+    environment: the transformer unless DOCUMENT_INTAKE_ENCODE=0, the
+    document-type model if one has been trained (document_classifier.py),
+    and the near-duplicate cache if DOCUMENT_DEDUP_INDEX names a file.
+    """
+    make_encoder = None
+    if HAS_TRANSFORMERS and os.environ.get('DOCUMENT_INTAKE_ENCODE', '1') != '0':
+        make_encoder = lambda: BertWindowEncoder()
+    classifier = None
+    skip_types = os.environ.get('DOCUMENT_CLASSIFIER_SKIP_TYPES')
+    try:
+        from document_classifier import DEFAULT_MODEL_PATH, DocumentClassifier
+        if os.path.exists(DEFAULT_MODEL_PATH):
+            classifier = DocumentClassifier.load(DEFAULT_MODEL_PATH)
+    except ImportError:
+        pass
+    cache = None
+    dedup_path = os.environ.get('DOCUMENT_DEDUP_INDEX')
+    if dedup_path:
+        from document_dedup import DocumentAnalysisCache
+        cache = DocumentAnalysisCache(float(os.environ.get('DOCUMENT_DEDUP_THRESHOLD', '0.8')), path=dedup_path,
+                                      save_every=int(os.environ.get('DOCUMENT_DEDUP_SAVE_EVERY', '100')),
+                                      save_interval=float(os.environ.get('DOCUMENT_DEDUP_SAVE_SECONDS', '60')))
+    return make_encoder, classifier, cache, skip_types.split(',') if skip_types else None
+
+
+def analyze(stream, make_encoder=None, classifier=None, cache=None, skip_types=None, cancel=None):
+    """
+    (metadata, analysis) of one framed document. Rule-based entities
+    (parties, dates, amounts, provisions, courts, case numbers) are
+    extracted while the text arrives and merged into the analysis. With a
+    classifier, the type is predicted from the beginning of the text and
+    confidently typed documents skip the transformer; with a cache,
+    near-duplicates of earlier documents reuse their analysis. A cancel
+    token stops the work between chunks and encoder batches.
+    """
+    from legal_entities import StreamingExtractor, summarize
+    extractor = StreamingExtractor()
+    router = None
+    route_bytes = 0
+    if classifier is not None:
+        from document_classifier import CLASSIFY_CHARS, TypeRouter
+        router = TypeRouter(classifier, make_encoder, skip_types=skip_types)
+        make_encoder, route_bytes = router, CLASSIFY_CHARS
+    if cache is not None:
+        metadata, analysis = intake_deduplicated(stream, cache, make_encoder, [extractor], route_bytes, cancel)
+    else:
+        metadata, analysis = intake(stream, make_encoder, [extractor], route_bytes=route_bytes, cancel=cancel)
+    entities = extractor.finish()
+    analysis.update(summarize(entities), entities=entities)
+    if router is not None:
+        analysis.update(router.result())
+    return metadata, analysis
+
+
+def main():
+    """
+    Read one framed document from stdin and print the analysis as JSON,
+    configured by default_pipeline()
+    """
+    try:
+        metadata, analysis = analyze(sys.stdin.buffer, *default_pipeline())
+        print(json.dumps({"success": True, "analysis": analysis, "metadata": metadata}))
+    except (ProtocolError, ValueError) as e:
+        print(json.dumps({"success": False, "error": f"Invalid document stream: {str(e)}"}))
+        sys.exit(1)
+    except Exception as e:
+        print(json.dumps({"success": False, "error": f"Analysis failed: {str(e)}"}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import threading
+import time
+
+try:
+    from transformers import StoppingCriteria, StoppingCriteriaList
+    HAS_TRANSFORMERS = True
+except ImportError:
+    HAS_TRANSFORMERS = False
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    """
+    Cancellation state of one request: cancelled explicitly (the client gave
+    up) or by passing its absolute deadline. Long-running work calls check()
+    between steps (token windows, encoder batches, generated tokens, audio
+    chunks), which raises RequestCancelled so the work unwinds and frees its
+    worker. Code that takes a token never imports this module; anything
+    with check() will do, and None means no cancellation.
+    """
+
+    def __init__(self, deadline=None):
+        self.deadline = deadline  # time.time() seconds, or None
+        self.reason = None
+        self._event = threading.Event()
+
+    @classmethod
+    def from_request(cls, data):
+        # "deadline" is milliseconds since the epoch, as Date.now() gives
+        deadline = data.get('deadline')
+        return cls(deadline / 1000.0 if deadline else None)
+
+    def cancel(self, reason="Request cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def remaining(self):
+        """
+        Seconds until the deadline (None if there is none), 0 once cancelled
+        """
+        if self._event.is_set():
+            return 0.0
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
+
+    @property
+    def cancelled(self):
+        if not self._event.is_set() and self.deadline is not None and time.time() >= self.deadline:
+            self.cancel("Deadline exceeded")
+        return self._event.is_set()
+
+    def check(self):
+        if self.cancelled:
+            raise RequestCancelled(self.reason)
+
+
+if HAS_TRANSFORMERS:
+    class CancelCriteria(StoppingCriteria):
+        """
+        Stops model.generate() after the current token once the request is
+        cancelled; the caller then calls token.check() to abandon the output
+        """
+
+        def __init__(self, token):
+            self.token = token
+
+        def __call__(self, input_ids, scores, **kwargs):
+            return self.token.cancelled
+
+
+def stopping_criteria(token, criteria=None):
+    """
+    StoppingCriteriaList for generate() that also stops when token is
+    cancelled, e.g. model.generate(**inputs, stopping_criteria=stopping_criteria(cancel))
+    """
+    if not HAS_TRANSFORMERS:
+        raise RuntimeError("transformers library not available")
+    criteria = StoppingCriteriaList(criteria or [])
+    if token is not None:
+        criteria.append(CancelCriteria(token))
+    return criteria
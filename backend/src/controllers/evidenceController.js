@@ -1,5 +1,6 @@
 const path = require('path');
 const fs = require('fs').promises;
+const evidenceTextService = require('../services/evidenceTextService');
 
 class EvidenceController {
     constructor() {
@@ -153,6 +154,12 @@ class EvidenceController {
                 caseId
             };
 
+            // Extract the text now so analysis and search can use it later
+            if (req.file) {
+                evidenceTextService.ingest([req.file.path]);
+                newEvidence.file = path.basename(req.file.path);
+            }
+
             res.json({
                 success: true,
                 message: 'Evidence uploaded successfully',
@@ -174,14 +181,19 @@ class EvidenceController {
      */
     async analyzeEvidence(req, res) {
         try {
-            const { evidenceId } = req.params;
-            const { analysisType } = req.body;
+            const evidenceId = req.params.id;
+            const { analysisType, filename } = req.body;
+            
+            // Text extracted ahead of time by evidence_ocr.py, if available
+            const ocr = filename ? evidenceTextService.getText(filename) : null;
             
             // In a real implementation, this would use the AI model
             // For now, we'll return sample analysis data
             const analysisResult = {
                 evidenceId,
                 analysisType,
+                extractedText: ocr ? ocr.text : null,
+                ocrConfidence: ocr ? ocr.mean_confidence : null,
                 timestamp: new Date().toISOString(),
                 findings: [
                     'Evidence appears authentic based on metadata analysis',
@@ -210,6 +222,62 @@ class EvidenceController {
         }
     }
 
+    /**
+     * Search the OCR text of evidence images
+     * @param {Object} req - Express request object
+     * @param {Object} res - Express response object
+     */
+    async searchEvidenceText(req, res) {
+        try {
+            const { q } = req.query;
+            if (!q) {
+                return res.status(400).json({
+                    success: false,
+                    message: 'Query parameter q is required'
+                });
+            }
+
+            res.json({
+                success: true,
+                data: evidenceTextService.search(q)
+            });
+        } catch (error) {
+            res.status(500).json({
+                success: false,
+                message: 'Failed to search evidence text',
+                error: error.message
+            });
+        }
+    }
+
+    /**
+     * Get extracted text for an evidence image
+     * @param {Object} req - Express request object
+     * @param {Object} res - Express response object
+     */
+    async getEvidenceText(req, res) {
+        try {
+            const record = evidenceTextService.getText(req.params.filename);
+            if (!record) {
+                return res.status(404).json({
+                    success: false,
+                    message: 'No extracted text for this evidence yet'
+                });
+            }
+
+            res.json({
+                success: true,
+                data: record
+            });
+        } catch (error) {
+            res.status(500).json({
+                success: false,
+                message: 'Failed to fetch evidence text',
+                error: error.message
+            });
+        }
+    }
+
     /**
      * Get paperwork templates
      * @param {Object} req - Express request object
@@ -1,6 +1,4 @@
 const voiceService = require('../services/voiceService');
-const fs = require('fs');
-const path = require('path');
 
 class VoiceController {
     /**
@@ -10,7 +8,7 @@ class VoiceController {
      */
     async textToSpeech(req, res) {
         try {
-            const { text, language } = req.body;
+            const { text, language, format } = req.body;
             
             if (!text) {
                 return res.status(400).json({
@@ -19,47 +17,26 @@ class VoiceController {
                 });
             }
             
-            // Default to English if no language specified
+            // Default to English WAV if not specified
             const langCode = language || 'en';
             
-            // Convert text to speech
-            const audioFilePath = await voiceService.textToSpeech(text, langCode);
-            
-            // Check if file exists
-            if (!fs.existsSync(audioFilePath)) {
-                return res.status(500).json({
-                    success: false,
-                    message: 'Failed to generate audio file'
-                });
+            // Synthesized and converted in memory by the TTS worker; cancelled
+            // there if the client goes away before the audio is ready
+            const abort = new AbortController();
+            res.on('close', () => abort.abort());
+            const { audio, contentType, format: audioFormat } = await voiceService.synthesize(text, langCode, format || 'wav', abort.signal);
+            if (abort.signal.aborted) {
+                return;
             }
             
-            // Set headers for audio file
-            res.setHeader('Content-Type', 'audio/wav');
-            res.setHeader('Content-Disposition', `inline; filename="speech.wav"`);
-            
-            // Stream the audio file
-            const audioStream = fs.createReadStream(audioFilePath);
-            
-            // Pipe the stream to response
-            audioStream.pipe(res);
-            
-            // Clean up the temporary file after streaming
-            audioStream.on('close', () => {
-                voiceService.cleanupAudioFile(audioFilePath);
-            });
-            
-            audioStream.on('error', (error) => {
-                console.error('Error streaming audio file:', error);
-                voiceService.cleanupAudioFile(audioFilePath);
-                if (!res.headersSent) {
-                    res.status(500).json({
-                        success: false,
-                        message: 'Failed to stream audio file'
-                    });
-                }
-            });
+            res.setHeader('Content-Type', contentType);
+            res.setHeader('Content-Disposition', `inline; filename="speech.${audioFormat}"`);
+            res.send(audio);
             
         } catch (error) {
+            if (res.destroyed) {
+                return;
+            }
             console.error('Text-to-speech error:', error);
             res.status(500).json({
                 success: false,
@@ -69,6 +46,49 @@ class VoiceController {
         }
     }
 
+    /**
+     * Convert long text to speech as a stream of sentence chunks.
+     * Responds with newline-delimited JSON, one line per chunk in order:
+     * { chunk, text, audio } where audio is base64-encoded.
+     * @param {Object} req - Express request object
+     * @param {Object} res - Express response object
+     */
+    async textToSpeechStream(req, res) {
+        const { text, language, format } = req.body;
+
+        if (!text) {
+            return res.status(400).json({
+                success: false,
+                message: 'Text is required'
+            });
+        }
+
+        res.setHeader('Content-Type', 'application/x-ndjson');
+
+        // Stop synthesizing the remaining chunks if the client disconnects
+        const abort = new AbortController();
+        res.on('close', () => {
+            if (!res.writableEnded) {
+                abort.abort();
+            }
+        });
+
+        try {
+            await voiceService.textToSpeechStream(text, language || 'en', (chunk) => {
+                res.write(JSON.stringify(chunk) + '\n');
+            }, format || 'wav', abort.signal);
+            res.end();
+        } catch (error) {
+            if (abort.signal.aborted) {
+                return;
+            }
+            console.error('Text-to-speech stream error:', error);
+            if (!res.writableEnded) {
+                res.end(JSON.stringify({ success: false, error: error.message }) + '\n');
+            }
+        }
+    }
+
     /**
      * Get supported voices for a language
      * @param {Object} req - Express request object
@@ -0,0 +1,283 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pytesseract
+    from PIL import Image, ImageOps
+    HAS_TESSERACT = True
+except ImportError:
+    HAS_TESSERACT = False
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp')
+
+DEFAULT_EVIDENCE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'scenario 1', 'evidences folder')
+DEFAULT_CACHE_DIR = os.environ.get(
+    'EVIDENCE_OCR_CACHE', os.path.join(os.path.dirname(__file__), '..', 'evidence', 'ocr_cache'))
+
+# Bumped when the extraction changes, so older cached results are redone
+OCR_VERSION = 1
+
+# Scans narrower than this are upscaled before OCR; small print on phone
+# photos of documents is otherwise missed
+MIN_OCR_WIDTH = 1600
+
+
+class OCRError(Exception):
+    pass
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def ocr_image(path, language='eng'):
+    """
+    OCR one image with the local Tesseract engine. Returns the text (lines
+    in reading order), word boxes with confidences and the mean confidence.
+    """
+    if not HAS_TESSERACT:
+        raise OCRError("pytesseract and Pillow are required for OCR (and the tesseract binary)")
+    start = time.perf_counter()
+    with Image.open(path) as image:
+        image = ImageOps.grayscale(ImageOps.exif_transpose(image))
+        scale = 1.0
+        if image.width < MIN_OCR_WIDTH:
+            scale = MIN_OCR_WIDTH / image.width
+            image = image.resize((MIN_OCR_WIDTH, int(image.height * scale)), Image.LANCZOS)
+        data = pytesseract.image_to_data(image, lang=language, output_type=pytesseract.Output.DICT)
+
+    words = []
+    lines = {}
+    for i, text in enumerate(data['text']):
+        text = text.strip()
+        confidence = float(data['conf'][i])
+        if not text or confidence < 0:
+            continue
+        words.append({
+            'text': text,
+            # Boxes are in the original image's pixels
+            'left': int(data['left'][i] / scale),
+            'top': int(data['top'][i] / scale),
+            'width': int(data['width'][i] / scale),
+            'height': int(data['height'][i] / scale),
+            'confidence': confidence,
+        })
+        line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        lines.setdefault(line_key, []).append(text)
+
+    return {
+        'text': '\n'.join(' '.join(lines[key]) for key in sorted(lines)),
+        'words': words,
+        'mean_confidence': sum(w['confidence'] for w in words) / len(words) if words else 0.0,
+        'engine': 'tesseract',
+        'engine_version': str(pytesseract.get_tesseract_version()),
+        'language': language,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def _ocr_job(job):
+    path, digest, language = job
+    try:
+        return path, digest, ocr_image(path, language), None
+    except Exception as e:
+        return path, digest, None, str(e)
+
+
+class OCRCache:
+    """
+    Extracted text keyed by image hash, on disk as one JSON file per image.
+
+    index.json maps each ingested file name to its size, mtime and hash, so
+    unchanged files are recognised without rehashing and renamed or
+    re-uploaded copies reuse the existing result.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, 'index.json')
+        self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'version': OCR_VERSION, 'files': {}}
+
+    def _record_path(self, digest):
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def _write_json(self, path, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def has(self, digest):
+        record = self.get(digest)
+        return record is not None and record.get('version') == OCR_VERSION
+
+    def get(self, digest):
+        try:
+            with open(self._record_path(digest), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get_file(self, name):
+        entry = self.index['files'].get(os.path.basename(name))
+        return self.get(entry['hash']) if entry else None
+
+    def put(self, digest, source, result):
+        self._write_json(self._record_path(digest), dict(result, hash=digest, source=source,
+                                                         version=OCR_VERSION))
+
+    def hash_for(self, path):
+        """
+        Hash of the file at path, reusing the indexed one if size and mtime match
+        """
+        st = os.stat(path)
+        entry = self.index['files'].get(os.path.basename(path))
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return entry['hash']
+        digest = file_hash(path)
+        with self._lock:
+            self.index['files'][os.path.basename(path)] = {
+                'hash': digest, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        return digest
+
+    def save_index(self):
+        with self._lock:
+            self.index['version'] = OCR_VERSION
+            self._write_json(self._index_path, self.index)
+
+    def search(self, query, limit=20):
+        """
+        Case-insensitive search over all cached text; returns matches with a snippet
+        """
+        needle = query.lower()
+        results = []
+        for name, entry in sorted(self.index['files'].items()):
+            record = self.get(entry['hash'])
+            if not record:
+                continue
+            text = record['text']
+            position = text.lower().find(needle)
+            if position < 0:
+                continue
+            results.append({
+                'file': name,
+                'snippet': text[max(0, position - 60):position + len(query) + 60].replace('\n', ' '),
+                'mean_confidence': record['mean_confidence'],
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+
+def collect_images(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+
+def ingest(paths, cache, max_workers=None, language='eng', force=False, pool=None, cancel=None):
+    """
+    OCR every image under paths that is not already cached, across a process
+    pool (`pool` if given, e.g. a long-lived worker's, otherwise one started
+    for this call). Re-running only processes new or changed files. A cancel
+    token is checked as each image finishes; images not started yet are
+    dropped and the finished ones stay cached.
+    """
+    start = time.perf_counter()
+    files = collect_images(paths)
+    jobs = []
+    seen = set()
+    for path in files:
+        digest = cache.hash_for(path)
+        if digest in seen or (not force and cache.has(digest)):
+            continue
+        seen.add(digest)
+        jobs.append((path, digest, language))
+
+    errors = {}
+    owned = pool is None and bool(jobs)
+    if owned:
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+    results = pool.map(_ocr_job, jobs) if jobs else iter(())
+    try:
+        for path, digest, result, error in results:
+            if error:
+                errors[os.path.basename(path)] = error
+            else:
+                cache.put(digest, os.path.basename(path), result)
+            if cancel is not None:
+                cancel.check()
+    finally:
+        if jobs:
+            results.close()  # cancels the images not started yet
+        if owned:
+            pool.shutdown(cancel_futures=True)
+        cache.save_index()
+    return {
+        'files': len(files),
+        'processed': len(jobs) - len(errors),
+        'cached': len(files) - len(jobs),
+        'errors': errors,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR evidence images into a hash-keyed text cache")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser('ingest', help="OCR new or changed images")
+    ingest_parser.add_argument('paths', nargs='*', default=[DEFAULT_EVIDENCE_DIR])
+    ingest_parser.add_argument('--workers', type=int)
+    ingest_parser.add_argument('--language', default='eng')
+    ingest_parser.add_argument('--force', action='store_true', help="Redo cached images too")
+
+    get_parser = commands.add_parser('get', help="Print the cached result for one file")
+    get_parser.add_argument('name')
+
+    search_parser = commands.add_parser('search', help="Search cached text")
+    search_parser.add_argument('query')
+
+    args = parser.parse_args()
+    cache = OCRCache(args.cache_dir)
+
+    if args.command == 'ingest':
+        print(json.dumps(ingest(args.paths, cache, args.workers, args.language, args.force)))
+    elif args.command == 'get':
+        record = cache.get_file(args.name)
+        print(json.dumps({"success": record is not None, "data": record}))
+        if record is None:
+            sys.exit(1)
+    else:
+        print(json.dumps({"success": True, "data": cache.search(args.query)}))
+
+
+if __name__ == "__main__":
+    main()
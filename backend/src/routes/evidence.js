@@ -12,6 +12,8 @@ const upload = multer({ dest: 'uploads/' });
 
 // Evidence Endpoints
 router.get('/', evidenceController.getEvidence.bind(evidenceController));
+router.get('/text/search', evidenceController.searchEvidenceText.bind(evidenceController));
+router.get('/text/:filename', evidenceController.getEvidenceText.bind(evidenceController));
 router.get('/:id', evidenceController.getEvidenceItem.bind(evidenceController));
 router.post('/upload', upload.single('file'), evidenceController.uploadEvidence.bind(evidenceController));
 router.post('/:id/analyze', evidenceController.analyzeEvidence.bind(evidenceController));
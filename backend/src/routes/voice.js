@@ -6,6 +6,9 @@ const { authenticateToken } = require('../middleware/authMiddleware');
 // Convert text to speech (protected route)
 router.post('/tts', authenticateToken, voiceController.textToSpeech);
 
+// Convert long text to speech, streamed sentence by sentence (protected route)
+router.post('/tts/stream', authenticateToken, voiceController.textToSpeechStream);
+
 // Get supported voices
 router.get('/voices', voiceController.getVoices);
 
@@ -0,0 +1,458 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from tts_prerender import DEFAULT_VOICES, FALLBACK_VOICE, STAGE_DIRECTION, render_line, wav_duration
+from tts_cache import default_cache
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+DEFAULT_SCRIPT = os.path.join(ROOT, 'scenario 1', 'bail_hearing_script.json')
+DEFAULT_EVIDENCE_DIR = os.environ.get('SCENARIO_EVIDENCE_DIR', os.path.join(ROOT, 'scenario 1', 'evidences folder'))
+DEFAULT_LOOKAHEAD = int(os.environ.get('PLAYBACK_LOOKAHEAD', '4'))
+DEFAULT_BUFFER_BYTES = int(os.environ.get('PLAYBACK_BUFFER_BYTES', str(64 * 1024 * 1024)))
+
+# Speaking rate used for the length of a line whose audio is not WAV
+CHARS_PER_SECOND = 15.0
+
+# What a line has to mention for an evidence file to be shown with it; the
+# value is matched case-insensitively against the file names
+EVIDENCE_KEYWORDS = [
+    (re.compile(r'\bcctv\b', re.I), 'cctv'),
+    (re.compile(r'\binventory\b', re.I), 'inventory'),
+    (re.compile(r'\bpassport\b', re.I), 'passport'),
+    (re.compile(r'\bwitness statement|statement (?:to|at) the police', re.I), 'witness statement'),
+    (re.compile(r'\bfirst information report\b|\bFIR\b'), 'first information report'),
+    (re.compile(r'\bseizure\b', re.I), 'seizure memo'),
+    (re.compile(r'\bcharger|adapter\b', re.I), 'charger'),
+    (re.compile(r'\bforensic\b', re.I), 'forensic'),
+    (re.compile(r'\btimeline\b', re.I), 'timeline'),
+    (re.compile(r'\bpay ?slip|salary\b', re.I), 'pay slip'),
+    (re.compile(r'\bbank statement|bank account\b', re.I), 'bank account'),
+    (re.compile(r'\baadhaa?r\b', re.I), 'aadhar'),
+    (re.compile(r'\bbirth certificate\b', re.I), 'birth certificate'),
+    (re.compile(r'\bcharacter certificate\b', re.I), 'character certificate'),
+    (re.compile(r'\bproperty tax\b', re.I), 'property tax'),
+    (re.compile(r'\bsurety|sureties\b', re.I), 'surity'),
+    (re.compile(r'\blaptop\b', re.I), 'laptop'),
+]
+
+
+def evidence_assets(text, evidence_dir=DEFAULT_EVIDENCE_DIR):
+    """
+    Paths of the evidence files a line refers to, in file-name order
+    """
+    try:
+        names = sorted(os.listdir(evidence_dir))
+    except OSError:
+        return []
+    wanted = {needle for pattern, needle in EVIDENCE_KEYWORDS if pattern.search(text)}
+    return [os.path.join(evidence_dir, name) for name in names
+            if any(needle in name.lower() for needle in wanted)]
+
+
+class ScriptIndex:
+    """
+    A scenario script indexed by sequence and by speaker. Each line leads to
+    the next one in script order unless it has a "next" field (a sequence
+    or a list of them), which is how a branching script names its choices.
+    """
+
+    def __init__(self, script, voices=None, sections=('court_session',), evidence_dir=DEFAULT_EVIDENCE_DIR):
+        voices = dict(DEFAULT_VOICES, **(voices or {}))
+        self.script = script
+        self.lines = {}
+        self.order = []
+        self.by_speaker = {}
+        for section in sections:
+            for entry in script.get(section, []):
+                dialogue = entry.get('dialogue', '')
+                spoken = bool(dialogue) and not STAGE_DIRECTION.match(dialogue)
+                line = {
+                    'sequence': entry['sequence'],
+                    'section': section,
+                    'speaker': entry.get('speaker', ''),
+                    'action': entry.get('action', ''),
+                    'dialogue': dialogue,
+                    'spoken': spoken,
+                    'voice': voices.get(entry.get('speaker'), FALLBACK_VOICE),
+                    'assets': entry.get('assets', evidence_assets(f"{dialogue} {entry.get('action', '')}",
+                                                                  evidence_dir)),
+                    'next': entry.get('next'),
+                }
+                self.lines[line['sequence']] = line
+                self.order.append(line['sequence'])
+                self.by_speaker.setdefault(line['speaker'], []).append(line['sequence'])
+        self._position = {sequence: i for i, sequence in enumerate(self.order)}
+
+    @classmethod
+    def load(cls, path=DEFAULT_SCRIPT, **kwargs):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), **kwargs)
+
+    def __len__(self):
+        return len(self.order)
+
+    def successors(self, sequence):
+        following = self.lines[sequence]['next']
+        if following is not None:
+            following = following if isinstance(following, list) else [following]
+            return [s for s in following if s in self.lines]
+        position = self._position[sequence] + 1
+        return [self.order[position]] if position < len(self.order) else []
+
+    def reachable(self, sequence, steps):
+        """
+        Sequences reachable within `steps` lines after `sequence`, nearest
+        first (breadth-first, so every branch gets its first lines before
+        any branch gets its later ones)
+        """
+        seen = {sequence}
+        found = []
+        frontier = deque([(sequence, 0)])
+        while frontier:
+            current, depth = frontier.popleft()
+            if depth == steps:
+                continue
+            for following in self.successors(current):
+                if following not in seen:
+                    seen.add(following)
+                    found.append(following)
+                    frontier.append((following, depth + 1))
+        return found
+
+
+class BundleSource:
+    """
+    Audio for each line from a tts_prerender.py bundle: the line's byte
+    range of the bundle file its manifest names, read on demand
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.entries = {entry['sequence']: entry for entry in self.manifest['lines']}
+        self._fd = os.open(os.path.join(directory, self.manifest['bundle']), os.O_RDONLY)
+
+    def __call__(self, line):
+        entry = self.entries.get(line['sequence'])
+        if entry is None:
+            return None
+        return os.pread(self._fd, entry['length'], entry['offset'])
+
+    def close(self):
+        os.close(self._fd)
+
+
+class TTSSource:
+    """
+    Audio for each line rendered on demand, through the shared audio cache
+    so lines rendered once (or by tts_prerender.py) are not rendered again
+    """
+
+    def __init__(self, language='en', engine=None, audio_format='wav', sample_rate=None):
+        self.language = language
+        self.engine = engine
+        self.audio_format = audio_format
+        self.sample_rate = sample_rate or int(os.environ.get('TTS_SAMPLE_RATE', '0')) or None
+        self.cache = default_cache()
+
+    def __call__(self, line):
+        _, data, _, _ = render_line(line, self.language, self.engine, self.audio_format, self.sample_rate,
+                                    cache=self.cache)
+        return data
+
+
+def read_asset(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def line_duration(line, audio):
+    duration = wav_duration(audio) if audio else None
+    if duration is None:
+        duration = len(line['dialogue']) / CHARS_PER_SECOND if line['spoken'] else 0.0
+    return duration
+
+
+class PlaybackPlanner:
+    """
+    Plays a ScriptIndex one line at a time while the audio and evidence
+    assets of the lines reachable in the next `lookahead` steps are fetched
+    in the background, so each line is ready by the time it is reached.
+
+    Prefetched data is kept in a buffer of at most max_buffer_bytes; when a
+    seek (the user branching or jumping) moves the window, fetches for
+    lines that are no longer reachable are cancelled, or their results
+    dropped if they already started, and their buffered data is freed.
+    """
+
+    def __init__(self, index, audio_source, lookahead=DEFAULT_LOOKAHEAD, max_buffer_bytes=DEFAULT_BUFFER_BYTES,
+                 fetch_asset=read_asset, max_workers=2):
+        self.index = index
+        self.audio_source = audio_source
+        self.fetch_asset = fetch_asset
+        self.lookahead = lookahead
+        self.max_buffer_bytes = max_buffer_bytes
+        self.current = None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._window = []
+        self._futures = {}  # key -> Future, key is ('audio', sequence) or ('asset', path)
+        self._buffer = OrderedDict()  # key -> bytes
+        self._buffered_bytes = 0
+        self.stats = {"lines": 0, "ready": 0, "waited": 0, "wait_seconds": 0.0, "fetched": 0,
+                      "cancelled": 0, "discarded": 0, "evicted": 0, "peak_buffer_bytes": 0}
+
+    def _keys(self, sequence):
+        line = self.index.lines[sequence]
+        keys = [('audio', sequence)] if line['spoken'] else []
+        return keys + [('asset', path) for path in line['assets']]
+
+    def _fetch(self, key):
+        kind, target = key
+        if kind == 'audio':
+            return self.audio_source(self.index.lines[target])
+        return self.fetch_asset(target)
+
+    def _store(self, key, future):
+        # Runs in the worker thread; results for lines the window has moved
+        # past are dropped rather than buffered
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            # Forget the failed fetch so the next replan or _take retries it
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+            return
+        data = future.result() or b''
+        with self._lock:
+            if self._futures.get(key) is not future:
+                self.stats["discarded"] += 1
+                return
+            del self._futures[key]
+            self._buffer[key] = data
+            self._buffered_bytes += len(data)
+            self.stats["fetched"] += 1
+            self.stats["peak_buffer_bytes"] = max(self.stats["peak_buffer_bytes"], self._buffered_bytes)
+            self._evict()
+
+    def _evict(self):
+        # Furthest-ahead lines go first; the current line is never evicted
+        rank = {key: i for i, key in enumerate(k for s in self._window for k in self._keys(s))}
+        protected = set(self._keys(self.current)) if self.current is not None else set()
+        while self._buffered_bytes > self.max_buffer_bytes:
+            victims = [key for key in self._buffer if key not in protected]
+            if not victims:
+                break
+            victim = max(victims, key=lambda key: rank.get(key, len(rank)))
+            self._buffered_bytes -= len(self._buffer.pop(victim))
+            self.stats["evicted"] += 1
+
+    def _replan(self):
+        """
+        Point the prefetch window at the current line and what is reachable
+        from it: cancel or forget everything outside it, then schedule what
+        is missing, nearest first, while the buffer has room
+        """
+        self._window = [self.current] + self.index.reachable(self.current, self.lookahead)
+        wanted = [key for sequence in self._window for key in self._keys(sequence)]
+        wanted_set = set(wanted)
+        submitted = []
+        with self._lock:
+            for key in [key for key in self._futures if key not in wanted_set]:
+                if self._futures.pop(key).cancel():
+                    self.stats["cancelled"] += 1
+            for key in [key for key in self._buffer if key not in wanted_set]:
+                self._buffered_bytes -= len(self._buffer.pop(key))
+            for key in wanted:
+                if key in self._buffer or key in self._futures:
+                    continue
+                if self._buffered_bytes >= self.max_buffer_bytes:
+                    break
+                future = self._pool.submit(self._fetch, key)
+                self._futures[key] = future
+                submitted.append((key, future))
+        # Outside the lock: a fetch that already finished runs its callback
+        # right here, and _store takes the lock
+        for key, future in submitted:
+            future.add_done_callback(lambda f, key=key: self._store(key, f))
+
+    def _take(self, key):
+        """
+        The data for key, waiting for its fetch if it is still in flight.
+        Returns (data, seconds waited).
+        """
+        with self._lock:
+            if key in self._buffer:
+                return self._buffer[key], 0.0
+            future = self._futures.get(key)
+        start = time.perf_counter()
+        try:
+            data = future.result() if future is not None else self._fetch(key)
+        except Exception:
+            with self._lock:
+                if future is not None and self._futures.get(key) is future:
+                    del self._futures[key]
+            raise
+        with self._lock:
+            if key not in self._buffer:
+                self._futures.pop(key, None)
+                self._buffer[key] = data or b''
+                self._buffered_bytes += len(self._buffer[key])
+        return data, time.perf_counter() - start
+
+    def seek(self, sequence):
+        """
+        Make `sequence` the current line and return it ready to play:
+        {"line", "audio", "duration_seconds", "assets": {path: bytes},
+        "waited_seconds"}. A wait means the line was not prefetched in time.
+        """
+        if sequence not in self.index.lines:
+            raise KeyError(f"No line with sequence {sequence}")
+        self.current = sequence
+        self._replan()
+        line = self.index.lines[sequence]
+        waited = 0.0
+        audio = None
+        assets = {}
+        for key in self._keys(sequence):
+            data, seconds = self._take(key)
+            waited += seconds
+            if key[0] == 'audio':
+                audio = data
+            else:
+                assets[key[1]] = data
+        # Anything taken synchronously here may have pushed the buffer over
+        with self._lock:
+            self._evict()
+        self.stats["lines"] += 1
+        self.stats["ready" if waited < 0.001 else "waited"] += 1
+        self.stats["wait_seconds"] += waited
+        return {"line": line, "audio": audio, "duration_seconds": line_duration(line, audio),
+                "assets": assets, "waited_seconds": waited}
+
+    def start(self):
+        return self.seek(self.index.order[0])
+
+    def advance(self, choice=None):
+        """
+        The next line: `choice` among the current line's successors, or
+        the first of them. None at the end of the script.
+        """
+        successors = self.index.successors(self.current)
+        if choice is not None and choice not in successors:
+            raise ValueError(f"Sequence {choice} does not follow {self.current}")
+        if not successors:
+            return None
+        return self.seek(choice if choice is not None else successors[0])
+
+    def buffered_bytes(self):
+        with self._lock:
+            return self._buffered_bytes
+
+    def close(self):
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+        self._pool.shutdown(wait=True)
+
+
+def simulate(planner, speed=1.0, limit=None):
+    """
+    Play the script through in real time divided by `speed` (only the
+    waiting, not the audio) and report how many lines started late
+    """
+    start = time.perf_counter()
+    played = planner.start()
+    count = 0
+    while played is not None and (limit is None or count < limit):
+        count += 1
+        time.sleep(played["duration_seconds"] / speed)
+        played = planner.advance()
+    return dict(planner.stats, seconds=time.perf_counter() - start)
+
+
+def serve(planner):
+    """
+    Worker mode: one JSON request per stdin line ({"id", "command": "seek",
+    "sequence"}, {"id", "command": "next", "choice"} or {"id", "command":
+    "stats"}), one JSON response line per request. Audio stays in the
+    planner; responses carry the line, its duration and asset paths.
+    """
+    def respond(result):
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+    respond({"id": None, "success": True, "ready": True, "lines": len(planner.index)})
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            respond({"id": None, "success": False, "error": f"Invalid JSON input: {str(e)}"})
+            continue
+        if not isinstance(data, dict):
+            respond({"id": None, "success": False, "error": "Request must be a JSON object"})
+            continue
+        try:
+            command = data.get('command', 'next')
+            if command == 'stats':
+                result = {"success": True, "stats": planner.stats, "buffered_bytes": planner.buffered_bytes()}
+            else:
+                if command == 'seek':
+                    played = planner.seek(data['sequence'])
+                elif planner.current is None:
+                    played = planner.start()
+                else:
+                    played = planner.advance(data.get('choice'))
+                result = {"success": True, "done": played is None}
+                if played is not None:
+                    result.update(line={k: played["line"][k] for k in ('sequence', 'speaker', 'dialogue', 'action')},
+                                  audio_bytes=len(played["audio"] or b''),
+                                  duration_seconds=played["duration_seconds"],
+                                  assets=sorted(played["assets"]), waited_seconds=played["waited_seconds"])
+        except Exception as e:
+            result = {"success": False, "error": f"Playback failed: {str(e)}"}
+        result["id"] = data.get('id')
+        respond(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a scenario script with lookahead prefetching")
+    parser.add_argument('script', nargs='?', default=DEFAULT_SCRIPT)
+    parser.add_argument('--bundle', help="tts_prerender.py output directory to read audio from")
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--engine', help="TTS engine name (default: configured order)")
+    parser.add_argument('--lookahead', type=int, default=DEFAULT_LOOKAHEAD)
+    parser.add_argument('--buffer-bytes', type=int, default=DEFAULT_BUFFER_BYTES)
+    parser.add_argument('--include-post-hearing', action='store_true')
+    parser.add_argument('--speed', type=float, default=1.0, help="simulate playback this many times faster")
+    parser.add_argument('--limit', type=int, help="simulate only this many lines")
+    parser.add_argument('--serve', action='store_true', help="newline-delimited JSON on stdin/stdout")
+    args = parser.parse_args()
+
+    sections = ('court_session', 'post_hearing_procedures') if args.include_post_hearing else ('court_session',)
+    index = ScriptIndex.load(args.script, sections=sections)
+    source = BundleSource(args.bundle) if args.bundle else TTSSource(args.language, args.engine)
+    planner = PlaybackPlanner(index, source, args.lookahead, args.buffer_bytes)
+    try:
+        if args.serve:
+            serve(planner)
+        else:
+            print(json.dumps(dict(simulate(planner, args.speed, args.limit), success=True), indent=2))
+    finally:
+        planner.close()
+
+
+if __name__ == "__main__":
+    main()
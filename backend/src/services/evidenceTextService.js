@@ -0,0 +1,114 @@
+const path = require('path');
+const fs = require('fs');
+const pythonSidecar = require('./pythonSidecar');
+
+// OCR of a batch of large scans can take minutes
+const OCR_INGEST_TIMEOUT_MS = 10 * 60 * 1000;
+
+/**
+ * Read access to the OCR text cache written by evidence_ocr.py.
+ * Records are JSON files keyed by image hash; index.json maps file names
+ * to hashes. Both are kept in memory and reloaded when the index changes,
+ * so lookups do not touch the images.
+ */
+class EvidenceTextService {
+    constructor() {
+        this.cacheDir = process.env.EVIDENCE_OCR_CACHE || path.join(__dirname, '..', '..', 'evidence', 'ocr_cache');
+        this.index = { files: {} };
+        this.indexMtime = 0;
+        this.records = new Map();
+    }
+
+    /**
+     * Reload index.json if evidence_ocr.py has rewritten it
+     */
+    refresh() {
+        const indexPath = path.join(this.cacheDir, 'index.json');
+        let stat;
+        try {
+            stat = fs.statSync(indexPath);
+        } catch (error) {
+            return;
+        }
+        if (stat.mtimeMs === this.indexMtime) {
+            return;
+        }
+        try {
+            this.index = JSON.parse(fs.readFileSync(indexPath, 'utf8'));
+            this.indexMtime = stat.mtimeMs;
+        } catch (error) {
+            console.error('Failed to read OCR index:', error.message);
+        }
+    }
+
+    /**
+     * Cached OCR result for an evidence file
+     * @param {string} filename - Image file name, e.g. "bank account statement.png"
+     * @returns {Object|null} - { text, words, mean_confidence, ... } or null if not processed yet
+     */
+    getText(filename) {
+        this.refresh();
+        const entry = this.index.files[path.basename(filename)];
+        if (!entry) {
+            return null;
+        }
+        if (!this.records.has(entry.hash)) {
+            const recordPath = path.join(this.cacheDir, entry.hash.slice(0, 2), `${entry.hash}.json`);
+            try {
+                this.records.set(entry.hash, JSON.parse(fs.readFileSync(recordPath, 'utf8')));
+            } catch (error) {
+                return null;
+            }
+        }
+        return this.records.get(entry.hash);
+    }
+
+    /**
+     * Case-insensitive search over all cached evidence text
+     * @param {string} query - Text to look for
+     * @param {number} limit - Maximum number of matches
+     * @returns {Array} - [{ file, snippet, confidence }]
+     */
+    search(query, limit = 20) {
+        this.refresh();
+        const needle = query.toLowerCase();
+        const results = [];
+        for (const filename of Object.keys(this.index.files).sort()) {
+            const record = this.getText(filename);
+            if (!record) {
+                continue;
+            }
+            const position = record.text.toLowerCase().indexOf(needle);
+            if (position < 0) {
+                continue;
+            }
+            results.push({
+                file: filename,
+                snippet: record.text.slice(Math.max(0, position - 60), position + query.length + 60).replace(/\n/g, ' '),
+                confidence: record.mean_confidence
+            });
+            if (results.length >= limit) {
+                break;
+            }
+        }
+        return results;
+    }
+
+    /**
+     * OCR new images in the background (e.g. after an upload), on the
+     * Python sidecar's process pool. Already cached images are skipped by
+     * hash.
+     * @param {string[]} filePaths - Image paths to ingest
+     */
+    ingest(filePaths) {
+        pythonSidecar.request('ocr', { command: 'ingest', paths: filePaths }, { timeoutMs: OCR_INGEST_TIMEOUT_MS })
+            .then((result) => {
+                if (!result.success || Object.keys(result.errors || {}).length) {
+                    console.error('Evidence OCR failed:', result.error || result.errors);
+                }
+            })
+            .catch((error) => console.error('Evidence OCR failed:', error.message));
+    }
+}
+
+module.exports = new EvidenceTextService();
@@ -0,0 +1,287 @@
+const path = require('path');
+const os = require('os');
+const readline = require('readline');
+const { spawn } = require('child_process');
+
+// How long a request may take before it is failed, unless the caller says otherwise
+const DEFAULT_TIMEOUT_MS = 60000;
+// Overall budget of a streaming request, whose timeout restarts with every message
+const DEFAULT_STREAM_DEADLINE_MS = 10 * 60000;
+// Document uploads: text bytes per chunk, and chunks sent but not yet taken by the sidecar
+const DOCUMENT_CHUNK_BYTES = 64 * 1024;
+const DOCUMENT_WINDOW_FRAMES = 8;
+
+/**
+ * Client for sidecar.py, the one long-lived Python process that serves
+ * document analysis, the legal assistant, TTS, OCR and rubric scoring.
+ * Models and caches are loaded once in that process and shared by every
+ * request, instead of each capability starting its own interpreter.
+ * Requests are newline-delimited JSON tagged with an id, so any number
+ * can be in flight on the one pipe.
+ *
+ * Every request carries an absolute deadline (epoch milliseconds) at
+ * which this side stops waiting, and a request that times out or whose
+ * AbortSignal fires is cancelled in the sidecar as well, so abandoned
+ * work stops and frees its slot instead of running to completion. The
+ * deadline also bounds work the sidecar is left with if this process
+ * dies without cancelling it.
+ */
+class PythonSidecar {
+    constructor() {
+        this.scriptPath = path.join(__dirname, '..', 'sidecar.py');
+        this.process = null;
+        this.ready = null;
+        this.methods = [];
+        this.pendingRequests = new Map();
+        this.nextRequestId = 1;
+    }
+
+    /**
+     * Start the sidecar if it is not already running
+     * @returns {Promise<void>} - Resolves once the sidecar reports it is ready
+     */
+    ensureStarted() {
+        if (this.ready) {
+            return this.ready;
+        }
+
+        this.ready = new Promise((resolve, reject) => {
+            const child = spawn(
+                process.env.PYTHON_PATH || 'python',
+                ['-u', this.scriptPath],
+                {
+                    stdio: ['pipe', 'pipe', 'inherit'],
+                    // The same audio cache directory voiceService cleans up around
+                    env: {
+                        ...process.env,
+                        TTS_CACHE_DIR: process.env.TTS_CACHE_DIR || path.join(os.tmpdir(), 'dharmasikhara_tts_cache')
+                    }
+                }
+            );
+            this.process = child;
+
+            const lines = readline.createInterface({ input: child.stdout });
+            lines.on('line', (line) => {
+                let message;
+                try {
+                    message = JSON.parse(line);
+                } catch (parseError) {
+                    console.error('Failed to parse sidecar output:', line.substring(0, 200));
+                    return;
+                }
+
+                if (message.ready) {
+                    this.methods = message.methods || [];
+                    resolve();
+                    return;
+                }
+
+                const pending = this.pendingRequests.get(message.id);
+                if (!pending) {
+                    // Requests this side abandoned answer with cancelled: true
+                    if (message.error && !message.cancelled) {
+                        console.error('Sidecar error:', message.error);
+                    }
+                    return;
+                }
+                if (pending.onChunk && message.done === false) {
+                    // Streaming request: more lines follow, so restart the timeout
+                    clearTimeout(pending.timer);
+                    pending.timer = setTimeout(pending.onTimeout,
+                        Math.max(0, Math.min(pending.timeoutMs, pending.deadline - Date.now())));
+                    pending.onChunk(message);
+                    return;
+                }
+                this.pendingRequests.delete(message.id);
+                clearTimeout(pending.timer);
+                pending.resolve(message);
+            });
+
+            const handleExit = (reason) => {
+                // Fail everything in flight; the next request starts a new sidecar
+                if (this.process === child) {
+                    this.process = null;
+                    this.ready = null;
+                }
+                for (const [id, pending] of this.pendingRequests) {
+                    clearTimeout(pending.timer);
+                    pending.reject(new Error(`Python sidecar stopped: ${reason}`));
+                    this.pendingRequests.delete(id);
+                }
+                reject(new Error(`Python sidecar stopped: ${reason}`));
+            };
+
+            child.on('error', (error) => handleExit(error.message));
+            child.on('exit', (code, signal) => handleExit(signal || `exit code ${code}`));
+        });
+
+        return this.ready;
+    }
+
+    /**
+     * Send one request to the sidecar
+     * @param {string} method - analyze, assistant, entities, tts, ocr, score or stats
+     * @param {Object} payload - Request fields for the method
+     * @param {Object} [options]
+     * @param {Function} [options.onChunk] - Called with each intermediate message of a streaming request
+     * @param {number} [options.timeoutMs] - Fail the request after this long without a response
+     * @param {number} [options.deadlineMs] - Fail the request after this long in all; defaults to
+     *     timeoutMs, or to DEFAULT_STREAM_DEADLINE_MS when streaming
+     * @param {AbortSignal} [options.signal] - Abandon the request, e.g. when the client disconnects
+     * @param {Function} [options.onSent] - Called with the request id once it has been written
+     * @returns {Promise<Object>} - The sidecar's JSON response (the final one when streaming)
+     */
+    async request(method, payload = {}, {
+        onChunk = null,
+        timeoutMs = DEFAULT_TIMEOUT_MS,
+        deadlineMs = onChunk ? Math.max(timeoutMs, DEFAULT_STREAM_DEADLINE_MS) : timeoutMs,
+        signal = null,
+        onSent = null
+    } = {}) {
+        if (signal && signal.aborted) {
+            throw new Error(`Python sidecar request aborted: ${method}`);
+        }
+        await this.ensureStarted();
+
+        return new Promise((resolve, reject) => {
+            const id = this.nextRequestId++;
+            const abandon = (reason) => {
+                const pending = this.pendingRequests.get(id);
+                if (!pending) {
+                    return;
+                }
+                this.pendingRequests.delete(id);
+                clearTimeout(pending.timer);
+                this.cancel(id);
+                pending.reject(new Error(`Python sidecar request ${reason}: ${method}`));
+            };
+            const onTimeout = () => abandon('timed out');
+            const onAbort = () => abandon('aborted');
+            if (signal) {
+                signal.addEventListener('abort', onAbort, { once: true });
+            }
+            const settle = (callback) => (value) => {
+                if (signal) {
+                    signal.removeEventListener('abort', onAbort);
+                }
+                callback(value);
+            };
+
+            // Streaming requests restart the timeout per message, but never
+            // past the deadline the sidecar is given
+            const deadline = Date.now() + deadlineMs;
+            const timer = setTimeout(onTimeout, Math.min(timeoutMs, deadlineMs));
+            this.pendingRequests.set(id, {
+                resolve: settle(resolve),
+                reject: settle(reject),
+                timer,
+                timeoutMs,
+                deadline,
+                onTimeout,
+                onChunk
+            });
+            this.process.stdin.write(JSON.stringify({ ...payload, method, id, deadline }) + '\n');
+            if (onSent) {
+                onSent(id);
+            }
+        });
+    }
+
+    /**
+     * Send a document to a sidecar method in the framed intake protocol of
+     * document_intake.py, one message per frame: a metadata header
+     * ({frame: 'H'}), base64 UTF-8 chunks ({frame: 'C'}), then an end frame
+     * ({frame: 'E'}). The sidecar acknowledges each frame as its intake
+     * takes it and at most windowFrames are unacknowledged, so it starts
+     * processing before the document has arrived and neither side buffers
+     * more than a window of chunks.
+     * @param {string} method - A method that takes uploads, e.g. analyze
+     * @param {string} text - Document text
+     * @param {Object} [metadata] - Extra fields for the header frame
+     * @param {Object} [options]
+     * @param {number} [options.chunkBytes] - Text bytes per chunk
+     * @param {number} [options.windowFrames] - Frames in flight before waiting for an acknowledgement
+     * @param {number} [options.timeoutMs] - Fail the request after this long without a message from the sidecar
+     * @param {number} [options.deadlineMs] - Fail the request after this long in all, upload and analysis
+     * @param {AbortSignal} [options.signal] - Abandon the upload and the work on it
+     * @returns {Promise<Object>} - The sidecar's final response
+     */
+    async requestDocument(method, text, metadata = {}, {
+        chunkBytes = DOCUMENT_CHUNK_BYTES,
+        windowFrames = DOCUMENT_WINDOW_FRAMES,
+        timeoutMs = DEFAULT_TIMEOUT_MS,
+        deadlineMs = Math.max(timeoutMs, DEFAULT_STREAM_DEADLINE_MS),
+        signal = null
+    } = {}) {
+        const data = Buffer.from(text, 'utf8');
+        let acked = 0;
+        let settled = false;
+        let wake = null;
+        const wakeUp = () => {
+            if (wake) {
+                wake();
+                wake = null;
+            }
+        };
+
+        let sentId;
+        const sent = new Promise((resolve) => { sentId = resolve; });
+        const response = this.request(method, { frame: 'H', metadata: { ...metadata, byte_length: data.length } }, {
+            timeoutMs,
+            deadlineMs,
+            signal,
+            onSent: sentId,
+            onChunk: (message) => {
+                acked = message.acked;
+                wakeUp();
+            }
+        });
+        response.then(() => {}, () => {}).then(() => {
+            settled = true;
+            wakeUp();
+        });
+
+        const id = await Promise.race([sent, response]);
+        // The header is frame 1; stop sending once the request has ended
+        let frames = 1;
+        const send = (message) => {
+            this.process.stdin.write(JSON.stringify({ ...message, method, id }) + '\n');
+            frames++;
+        };
+        for (let start = 0; start < data.length && !settled; start += chunkBytes) {
+            while (frames - acked >= windowFrames && !settled) {
+                await new Promise((resolve) => { wake = resolve; });
+            }
+            if (!settled) {
+                send({ frame: 'C', data: data.subarray(start, start + chunkBytes).toString('base64') });
+            }
+        }
+        if (!settled) {
+            send({ frame: 'E' });
+        }
+        return response;
+    }
+
+    /**
+     * Ask the sidecar to stop working on a request nobody is waiting for
+     * @param {number} id - The abandoned request's id
+     */
+    cancel(id) {
+        if (this.process) {
+            this.process.stdin.write(JSON.stringify({ method: 'cancel', target: id, id: this.nextRequestId++ }) + '\n');
+        }
+    }
+
+    /**
+     * Stop the sidecar (e.g. on server shutdown)
+     */
+    shutdown() {
+        if (this.process) {
+            this.process.stdin.end();
+            this.process = null;
+            this.ready = null;
+        }
+    }
+}
+
+module.exports = new PythonSidecar();
@@ -1,16 +1,23 @@
 const path = require('path');
 const fs = require('fs');
 const os = require('os');
+const pythonSidecar = require('./pythonSidecar');
 
 // Use dynamic import for uuid
 let uuidv4;
 
+// How long a single synthesis request may take before it is failed
+const TTS_REQUEST_TIMEOUT_MS = 30000;
+
 class VoiceService {
     constructor() {
         // Check if we're on Windows or Unix-like system
         this.isWindows = os.platform() === 'win32';
         this.tempDir = os.tmpdir();
         
+        // Rendered audio is cached here by the sidecar and reused across requests
+        this.cacheDir = process.env.TTS_CACHE_DIR || path.join(this.tempDir, 'dharmasikhara_tts_cache');
+        
         // Initialize uuid
         this.initUuid();
     }
@@ -21,10 +28,21 @@ class VoiceService {
     }
 
     /**
-     * Convert text to speech using Python gTTS
+     * Send one request to the TTS handler of the Python sidecar
+     * @param {Object} payload - Request fields for tts_script.py
+     * @param {Function} [onChunk] - Called with each intermediate message of a streaming request
+     * @param {AbortSignal} [signal] - Cancels the synthesis in the sidecar when aborted
+     * @returns {Promise<Object>} - The sidecar's JSON response (the final one when streaming)
+     */
+    async sendToWorker(payload, onChunk = null, signal = null) {
+        return pythonSidecar.request('tts', payload, { onChunk, timeoutMs: TTS_REQUEST_TIMEOUT_MS, signal });
+    }
+
+    /**
+     * Convert text to speech using the Python sidecar
      * @param {string} text - Text to convert to speech
      * @param {string} language - Language code (en, hi, ta, etc.)
-     * @returns {Promise<string>} - Path to the generated audio file
+     * @returns {Promise<string>} - Path to the generated (or cached) audio file
      */
     async textToSpeech(text, language = 'en') {
         // Make sure uuid is initialized
@@ -32,58 +50,86 @@ class VoiceService {
             await this.initUuid();
         }
         
-        return new Promise((resolve, reject) => {
-            // Create a unique filename for the audio file
-            const filename = `tts_${uuidv4()}.wav`;
-            const filepath = path.join(this.tempDir, filename);
-            
-            // Prepare the input data
-            const inputData = {
-                text: text,
-                language: language,
-                output_path: filepath
-            };
-
-            // Configure PythonShell options
-            const options = {
-                mode: 'text',
-                pythonPath: process.env.PYTHON_PATH || 'python',
-                pythonOptions: ['-u'],
-                scriptPath: path.join(__dirname, '..'),
-                args: []
-            };
-
-            // Start the Python process
-            const pythonShell = new PythonShell('tts_script.py', options);
-
-            // Send the input data to the Python script
-            pythonShell.send(JSON.stringify(inputData));
-
-            // Collect the output
-            let output = '';
-            pythonShell.on('message', (message) => {
-                output += message;
-            });
-
-            // Handle completion
-            pythonShell.end((err) => {
-                if (err) {
-                    reject(new Error(`Text-to-speech conversion failed: ${err}`));
-                } else {
-                    try {
-                        // Parse the JSON output from Python
-                        const result = JSON.parse(output);
-                        if (result.success) {
-                            resolve(filepath);
-                        } else {
-                            reject(new Error(result.error || 'Text-to-speech conversion failed'));
-                        }
-                    } catch (parseError) {
-                        reject(new Error(`Failed to parse Python output: ${parseError.message}`));
-                    }
-                }
-            });
+        // Create a unique filename for the audio file
+        const filename = `tts_${uuidv4()}.wav`;
+        const filepath = path.join(this.tempDir, filename);
+
+        const result = await this.sendToWorker({
+            text: text,
+            language: language,
+            output_path: filepath
         });
+
+        if (!result.success) {
+            throw new Error(result.error || 'Text-to-speech conversion failed');
+        }
+        // Cached audio lives in the cache directory rather than at filepath
+        return result.filepath || filepath;
+    }
+
+    /**
+     * Convert text to speech in memory. The sidecar converts the audio to the
+     * requested format and returns the bytes over its pipe, so no temporary
+     * file is written or cleaned up.
+     * @param {string} text - Text to convert to speech
+     * @param {string} language - Language code (en, hi, ta, etc.)
+     * @param {string} format - wav, pcm, mp3 or opus
+     * @param {AbortSignal} [signal] - Abort when the caller no longer wants the audio
+     * @returns {Promise<{audio: Buffer, contentType: string, format: string}>}
+     */
+    async synthesize(text, language = 'en', format = 'wav', signal = null) {
+        const result = await this.sendToWorker({
+            text: text,
+            language: language,
+            format: format,
+            return: 'bytes'
+        }, null, signal);
+
+        if (!result.success) {
+            throw new Error(result.error || 'Text-to-speech conversion failed');
+        }
+        return {
+            audio: Buffer.from(result.audio, 'base64'),
+            contentType: result.content_type,
+            format: result.format
+        };
+    }
+
+    /**
+     * Convert long text to speech sentence by sentence. Chunks are synthesized
+     * concurrently by the sidecar and delivered in order as they finish, so
+     * playback can start after the first sentence.
+     * @param {string} text - Text to convert to speech
+     * @param {string} language - Language code (en, hi, ta, etc.)
+     * @param {Function} onChunk - Called with { chunk, text, audio } (audio base64) for each chunk in order
+     * @param {string} format - wav, pcm, mp3 or opus
+     * @param {AbortSignal} [signal] - Abort to stop synthesizing the remaining chunks
+     * @returns {Promise<number>} - Number of chunks produced
+     */
+    async textToSpeechStream(text, language = 'en', onChunk, format = 'wav', signal = null) {
+        const result = await this.sendToWorker({
+            text: text,
+            language: language,
+            format: format,
+            return: 'bytes',
+            stream: true
+        }, (message) => onChunk({
+            chunk: message.chunk,
+            text: message.text,
+            audio: message.audio
+        }), signal);
+
+        if (!result.success) {
+            throw new Error(result.error || 'Text-to-speech conversion failed');
+        }
+        return result.chunks;
+    }
+
+    /**
+     * Stop the Python sidecar (e.g. on server shutdown)
+     */
+    shutdown() {
+        pythonSidecar.shutdown();
     }
 
     /**
@@ -121,6 +167,10 @@ class VoiceService {
      * @param {string} filepath - Path to the audio file to delete
      */
     async cleanupAudioFile(filepath) {
+        // Cache entries are shared between requests; the sidecar evicts them
+        if (path.resolve(filepath).startsWith(path.resolve(this.cacheDir) + path.sep)) {
+            return;
+        }
         try {
             if (fs.existsSync(filepath)) {
                 fs.unlinkSync(filepath);
@@ -0,0 +1,521 @@
+import argparse
+import asyncio
+import base64
+import inspect
+import json
+import os
+import queue
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cancellation import CancelToken, RequestCancelled
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(HERE)
+ASSESSMENT_DIR = os.path.join(BACKEND_DIR, '..', 'scenario 1', 'Assessment of Dharmasikhara')
+# Capabilities live next to the scripts that used to run them on their own
+for directory in (HERE, BACKEND_DIR, ASSESSMENT_DIR):
+    if directory not in sys.path:
+        sys.path.append(directory)
+
+# Largest request line accepted on the socket (documents arrive in chunks,
+# but OCR and scoring requests carry their payload inline)
+MAX_REQUEST_BYTES = int(os.environ.get('SIDECAR_MAX_REQUEST_BYTES', str(64 * 1024 * 1024)))
+
+
+def shared(factory):
+    """
+    A getter that builds factory() on first use and returns the same object
+    to every request after that (models, caches, loaded indexes)
+    """
+    lock = threading.Lock()
+    built = []
+
+    def get():
+        if not built:
+            with lock:
+                if not built:
+                    built.append(factory())
+        return built[0]
+    return get
+
+
+class Handler:
+    def __init__(self, method, function, pool='thread', concurrency=None):
+        self.method = method
+        self.function = function
+        self.pool = pool
+        # At most this many requests run at once (e.g. one per loaded model)
+        self.limit = asyncio.Semaphore(concurrency) if concurrency else None
+        self.stats = {"requests": 0, "errors": 0, "active": 0, "seconds": 0.0, "cancelled": 0, "expired": 0}
+
+
+class InFlight:
+    def __init__(self, token, task, upload=None):
+        self.token = token
+        self.task = task
+        self.upload = upload
+        self.started = False  # set by the pool thread when the handler begins
+
+
+class Upload:
+    """
+    A document sent as several messages with the same id, in the frames of
+    document_intake.py: {"frame": "H", "metadata"} starts the request,
+    then {"frame": "C", "data": base64 UTF-8 bytes} chunks and {"frame":
+    "E"}. The handler iterates it as (type, payload) frames, like
+    read_frames, and every frame it takes is acknowledged with {"done":
+    false, "acked": frames taken so far}, so the client keeps only a
+    window of frames in flight and neither side holds the whole document.
+    """
+
+    def __init__(self, metadata, acknowledge):
+        self._frames = queue.Queue()
+        self._frames.put((b'H', json.dumps(metadata or {}).encode('utf-8')))
+        self._acknowledge = acknowledge
+        self._taken = 0
+
+    def put(self, message):
+        data = message.get('data')
+        self._frames.put((message['frame'].encode('ascii'), base64.b64decode(data) if data else b''))
+
+    def close(self):
+        # Wakes a handler still waiting for frames; it sees the document end early
+        self._frames.put((None, None))
+
+    def __iter__(self):
+        while True:
+            frame_type, payload = self._frames.get()
+            if frame_type is None:
+                raise ValueError("Document ended before its end frame")
+            self._taken += 1
+            self._acknowledge(self._taken)
+            yield frame_type, payload
+            if frame_type == b'E':
+                return
+
+
+class Sidecar:
+    """
+    One long-lived Python process serving every capability the Node backend
+    needs. Requests are JSON objects with "id" and "method"; the rest of the
+    object is passed to the method's handler. Handlers run on a thread pool
+    (sharing the models and caches loaded in this process) or, for
+    stateless CPU-bound work, on a process pool. A handler that returns a
+    generator streams: each item is sent as it is produced with
+    "done": false, then a final message.
+
+    Thread handlers are called with (request, cancel token) and call
+    cancel.check() between steps; a request past its "deadline" or named
+    by {"method": "cancel", "target": id} stops there and frees its slot.
+    A request with "frame": "H" is an Upload; its handler finds it in
+    request["upload"] and later messages with its id feed it.
+    """
+
+    def __init__(self, thread_workers=8, process_workers=None):
+        self.handlers = {}
+        self.threads = ThreadPoolExecutor(max_workers=thread_workers)
+        self.process_workers = process_workers
+        self._processes = None
+        self._processes_lock = threading.Lock()
+        self.started = time.time()
+
+    @property
+    def processes(self):
+        with self._processes_lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self.process_workers)
+            return self._processes
+
+    def register(self, method, function, pool='thread', concurrency=None):
+        """
+        Serve `method` with function(request, cancel) -> response dict (or
+        a generator of them). pool='process' functions take only the
+        request, must be module-level and return plain data; they can be
+        cancelled only before they start.
+        """
+        self.handlers[method] = Handler(method, function, pool, concurrency)
+
+    def stats(self):
+        return {"success": True, "pid": os.getpid(), "uptime_seconds": time.time() - self.started,
+                "methods": {name: dict(h.stats) for name, h in self.handlers.items()}}
+
+    def _stream(self, generator, send, loop, cancel):
+        # Runs on a pool thread; sends go through the loop so each
+        # connection's messages stay in order. Closing the generator on
+        # cancellation lets it cancel the work it has queued.
+        final = None
+        try:
+            for message in generator:
+                cancel.check()
+                if message.get("done", True) is False:
+                    loop.call_soon_threadsafe(send, message)
+                else:
+                    final = message
+        finally:
+            generator.close()
+        return final if final is not None else {"success": True, "done": True}
+
+    def _call(self, handler, data, send, loop, request):
+        request.started = True
+        request.token.check()
+        result = handler.function(data, request.token)
+        if inspect.isgenerator(result):
+            return self._stream(result, send, loop, request.token)
+        return result
+
+    @staticmethod
+    def _cancel(request, reason):
+        """
+        Cancel a request: a queued one never starts (its slot is not used),
+        a running one stops at its next cancel.check()
+        """
+        request.token.cancel(reason)
+        if request.upload is not None:
+            request.upload.close()
+        if not request.started:
+            request.task.cancel()
+
+    async def dispatch(self, data, send, inflight):
+        """
+        Run one request and send its response (tagged with its id). The
+        request's "deadline" (epoch milliseconds) and any later cancel
+        message for its id abandon it, waiting or running.
+        """
+        request_id = data.get('id')
+        method = data.get('method')
+        handler = self.handlers.get(method)
+        loop = asyncio.get_running_loop()
+
+        def tagged(message):
+            message["id"] = request_id
+            send(message)
+
+        if method == 'stats':
+            tagged(self.stats())
+            return
+        if method == 'cancel':
+            request = inflight.get(data.get('target'))
+            if request is not None:
+                self._cancel(request, "Request cancelled")
+            tagged({"success": True, "cancelled": request is not None})
+            return
+        if handler is None:
+            tagged({"success": False, "error": f"Unknown method: {method}"})
+            return
+
+        token = CancelToken.from_request(data)
+        handler.stats["requests"] += 1
+        if token.cancelled:
+            # Already past its deadline when it arrived; the client has given up
+            handler.stats["expired"] += 1
+            tagged({"success": False, "cancelled": True, "error": token.reason})
+            return
+
+        request = InFlight(token, asyncio.current_task(), data.get('upload'))
+        inflight[request_id] = request
+        timer = loop.call_later(token.remaining(), self._cancel, request, "Deadline exceeded") \
+            if token.deadline is not None else None
+        start = time.perf_counter()
+        acquired = False
+        try:
+            if handler.limit is not None:
+                await handler.limit.acquire()
+                acquired = True
+            handler.stats["active"] += 1
+            try:
+                if handler.pool == 'process':
+                    result = await loop.run_in_executor(self.processes, handler.function, data)
+                else:
+                    result = await loop.run_in_executor(self.threads, self._call, handler, data, tagged, loop,
+                                                        request)
+            finally:
+                handler.stats["active"] -= 1
+        except (asyncio.CancelledError, RequestCancelled):
+            handler.stats["cancelled"] += 1
+            result = {"success": False, "cancelled": True, "error": token.reason or "Request cancelled"}
+        except Exception as e:
+            # An error after a cancel is its consequence (e.g. a closed upload)
+            handler.stats["cancelled" if token.cancelled else "errors"] += 1
+            result = {"success": False, "cancelled": True, "error": token.reason} if token.cancelled \
+                else {"success": False, "error": f"{method} failed: {str(e)}"}
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if acquired:
+                handler.limit.release()
+            handler.stats["seconds"] += time.perf_counter() - start
+            inflight.pop(request_id, None)
+        tagged(result)
+
+    async def handle_lines(self, readline, send, cancel_at_end=False):
+        """
+        Dispatch every request line (from the coroutine function readline,
+        b'' at the end) concurrently; responses may arrive out of order.
+        With cancel_at_end (the client went away), requests
+        still in flight when the input ends are cancelled; uploads that
+        never got their end frame fail either way.
+        """
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        inflight = {}
+        uploads = {}
+
+        def finished(task, request_id):
+            tasks.discard(task)
+            upload = uploads.pop(request_id, None)
+            if upload is not None:
+                upload.close()
+
+        while True:
+            try:
+                line = await readline()
+            except ValueError:
+                send({"id": None, "success": False, "error": "Request line too long"})
+                break
+            if not line:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                send({"id": None, "success": False, "error": f"Invalid JSON input: {str(e)}"})
+                continue
+            if not isinstance(data, dict):
+                send({"id": None, "success": False, "error": "Request must be a JSON object"})
+                continue
+            request_id = data.get('id')
+            frame = data.get('frame')
+            if frame is not None and frame != 'H':
+                # The rest of an upload; dropped if the request has ended
+                if request_id in uploads:
+                    uploads[request_id].put(data)
+                continue
+            if frame == 'H':
+                def acknowledge(taken, request_id=request_id):
+                    loop.call_soon_threadsafe(send, {"id": request_id, "done": False, "acked": taken})
+                data['upload'] = uploads[request_id] = Upload(data.pop('metadata', None), acknowledge)
+            task = asyncio.create_task(self.dispatch(data, send, inflight))
+            tasks.add(task)
+            task.add_done_callback(lambda task, request_id=request_id: finished(task, request_id))
+        if cancel_at_end:
+            for request in list(inflight.values()):
+                self._cancel(request, "Client disconnected")
+        for upload in uploads.values():
+            upload.close()
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    def ready_message(self):
+        return {"id": None, "success": True, "ready": True, "methods": sorted(self.handlers) + ["stats"]}
+
+    async def serve_stdio(self):
+        loop = asyncio.get_running_loop()
+        lines = asyncio.Queue()
+
+        def pump():
+            # A thread rather than a pipe transport, so stdin may also be a
+            # file (tests, replaying a request log)
+            for line in sys.stdin.buffer:
+                loop.call_soon_threadsafe(lines.put_nowait, line)
+            loop.call_soon_threadsafe(lines.put_nowait, b'')
+
+        def send(message):
+            sys.stdout.write(json.dumps(message) + "\n")
+            sys.stdout.flush()
+
+        send(self.ready_message())
+        threading.Thread(target=pump, daemon=True).start()
+        # A pipe that closes means the backend has gone and nobody is waiting
+        # for what is in flight; a file (replayed requests) is run to the end
+        from_file = stat.S_ISREG(os.fstat(sys.stdin.fileno()).st_mode)
+        await self.handle_lines(lines.get, send, cancel_at_end=not from_file)
+
+    async def serve_socket(self, path):
+        """
+        Serve on a Unix socket; every connection gets the ready message and
+        shares this process's handlers
+        """
+        async def connection(reader, writer):
+            def send(message):
+                if not writer.is_closing():
+                    writer.write((json.dumps(message) + "\n").encode('utf-8'))
+
+            send(self.ready_message())
+            try:
+                await self.handle_lines(reader.readline, send, cancel_at_end=True)
+            finally:
+                writer.close()
+
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(connection, path, limit=MAX_REQUEST_BYTES)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.threads.shutdown(wait=False)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False)
+
+
+# Capabilities. Each loads what it needs on first use, once per process.
+
+def _analysis_pipeline():
+    from document_intake import default_pipeline
+    return default_pipeline()
+
+
+_pipeline = shared(_analysis_pipeline)
+
+
+def analyze(data, cancel):
+    """
+    Document analysis as document_intake.py does it, of an uploaded
+    document, processed while its chunks arrive. Stops between text chunks
+    and encoder batches when cancelled.
+    """
+    from document_intake import analyze as analyze_stream
+    if data.get('upload') is None:
+        return {"success": False, "error": "analyze expects a document upload (\"frame\": \"H\")"}
+    metadata, analysis = analyze_stream(data['upload'], *_pipeline(), cancel=cancel)
+    return {"success": True, "analysis": analysis, "metadata": metadata}
+
+
+def entities(data):
+    """
+    Rule-based entities of {"text"} (stateless; runs on the process pool)
+    """
+    from legal_entities import extract_entities, summarize
+    found = extract_entities(data.get('text', ''))
+    return dict(summarize(found), success=True, entities=found)
+
+
+def assistant(data, cancel):
+    """
+    Legal assistant answer for {"query"} from legal_ai.py. If its
+    get_legal_assistant_response takes a `cancel` argument it gets the
+    token, for generate(stopping_criteria=cancellation.stopping_criteria(cancel)).
+    """
+    try:
+        from legal_ai import get_legal_assistant_response
+    except ImportError as e:
+        return {"success": False, "error": f"Legal assistant not available: {str(e)}"}
+    if 'cancel' in inspect.signature(get_legal_assistant_response).parameters:
+        result = get_legal_assistant_response(data['query'], cancel=cancel)
+    else:
+        result = get_legal_assistant_response(data['query'])
+    # Output generated after the client gave up is not worth sending
+    cancel.check()
+    return result
+
+
+def tts(data, cancel):
+    """
+    Any tts_script.py request; {"stream": true} streams chunk messages and
+    stops between chunks when cancelled
+    """
+    import tts_script
+    if data.get('stream'):
+        return tts_script.stream_request(data)
+    return tts_script.handle_request(data)
+
+
+def _ocr_cache():
+    # EVIDENCE_OCR_CACHE, the directory evidenceTextService reads
+    from evidence_ocr import DEFAULT_CACHE_DIR, OCRCache
+    return OCRCache(DEFAULT_CACHE_DIR)
+
+
+_ocr = shared(_ocr_cache)
+
+
+def make_ocr(sidecar):
+    def ocr(data, cancel):
+        """
+        Evidence OCR: {"command": "get", "name"}, {"command": "search",
+        "query", "limit"} or {"command": "ingest", "paths", "force"}.
+        Ingestion uses the sidecar's process pool.
+        """
+        from evidence_ocr import DEFAULT_EVIDENCE_DIR, ingest
+        command = data.get('command', 'get')
+        cache = _ocr()
+        if command == 'ingest':
+            report = ingest(data.get('paths') or [DEFAULT_EVIDENCE_DIR], cache, language=data.get('language', 'eng'),
+                            force=data.get('force', False), pool=sidecar.processes, cancel=cancel)
+            return dict(report, success=True)
+        if command == 'search':
+            return {"success": True, "data": cache.search(data['query'], int(data.get('limit', 20)))}
+        record = cache.get_file(data['name'])
+        return {"success": record is not None, "data": record}
+    return ocr
+
+
+def _rubric_scorer():
+    from rubric_scoring import RubricScorer
+    return RubricScorer()
+
+
+def _assessment_loader():
+    from assessment_loader import AssessmentLoader
+    return AssessmentLoader()
+
+
+_scorer = shared(_rubric_scorer)
+_assessments = shared(_assessment_loader)
+
+
+def score(data, cancel):
+    """
+    Rubric scoring of free-text answers: {"assessment": path to an
+    assessment JSON, "answers": [{"question_id", "text", "candidate_id"}]}
+    """
+    from dataclasses import asdict
+    from rubric_scoring import RubricItem
+    compiled = _assessments().load_compiled(data['assessment'])
+    questions = {q.id: q for section in compiled.sections for q in section.questions}
+    items = []
+    for answer in data.get('answers', []):
+        if answer['question_id'] not in questions:
+            return {"success": False, "error": f"Unknown question: {answer['question_id']}"}
+        items.append(RubricItem(questions[answer['question_id']], answer['text'], answer.get('candidate_id')))
+    results = _scorer().score_batch(items, cancel) if items else []
+    return {"success": True, "results": [asdict(result) for result in results]}
+
+
+def build_sidecar(thread_workers=8, process_workers=None):
+    sidecar = Sidecar(thread_workers, process_workers)
+    # One document at a time through the transformer; its batches already
+    # use every core
+    sidecar.register('analyze', analyze, concurrency=int(os.environ.get('SIDECAR_ANALYZE_CONCURRENCY', '1')))
+    sidecar.register('entities', entities, pool='process')
+    sidecar.register('assistant', assistant, concurrency=int(os.environ.get('SIDECAR_ASSISTANT_CONCURRENCY', '1')))
+    sidecar.register('tts', tts, concurrency=int(os.environ.get('TTS_WORKERS', '4')))
+    sidecar.register('ocr', make_ocr(sidecar))
+    sidecar.register('score', score, concurrency=1)
+    return sidecar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Python sidecar serving analysis, assistant, TTS, OCR and scoring")
+    parser.add_argument('--socket', help="serve on this Unix socket instead of stdin/stdout")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('SIDECAR_THREADS', '8')))
+    parser.add_argument('--processes', type=int, default=int(os.environ.get('SIDECAR_PROCESSES', '0')) or None)
+    args = parser.parse_args()
+
+    sidecar = build_sidecar(args.threads, args.processes)
+    try:
+        asyncio.run(sidecar.serve_socket(args.socket) if args.socket else sidecar.serve_stdio())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sidecar.close()
+
+
+if __name__ == "__main__":
+    main()
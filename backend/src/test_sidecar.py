@@ -0,0 +1,186 @@
+import asyncio
+import base64
+import json
+import threading
+import time
+
+from sidecar import Sidecar
+
+
+def collect(data, cancel):
+    """Handler that reads an upload to the end, like analyze does"""
+    metadata, text = None, b''
+    for frame_type, payload in data['upload']:
+        cancel.check()
+        if frame_type == b'H':
+            metadata = json.loads(payload)
+        elif frame_type == b'C':
+            text += payload
+    return {"success": True, "metadata": metadata, "text": text.decode('utf-8')}
+
+
+class Client:
+    """Feeds request lines to Sidecar.handle_lines and collects what it sends"""
+
+    def __init__(self, sidecar, cancel_at_end=False):
+        self.lines = asyncio.Queue()
+        self.messages = []
+        self.task = asyncio.create_task(sidecar.handle_lines(self.lines.get, self.messages.append, cancel_at_end))
+
+    def write(self, request):
+        self.lines.put_nowait(json.dumps(request).encode('utf-8') + b"\n")
+
+    def upload(self, request_id, text, chunk_bytes=4, end=True):
+        data = text.encode('utf-8')
+        self.write({"id": request_id, "method": "collect", "frame": "H", "metadata": {"name": "fir.txt"}})
+        for start in range(0, len(data), chunk_bytes):
+            self.write({"id": request_id, "method": "collect", "frame": "C",
+                        "data": base64.b64encode(data[start:start + chunk_bytes]).decode('ascii')})
+        if end:
+            self.write({"id": request_id, "method": "collect", "frame": "E"})
+
+    def acks(self, request_id):
+        return [m["acked"] for m in self.messages if m.get("id") == request_id and "acked" in m]
+
+    def final(self, request_id):
+        return next((m for m in self.messages if m.get("id") == request_id and m.get("done", True) is not False),
+                    None)
+
+    async def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline, self.messages
+            await asyncio.sleep(0.01)
+
+    async def close(self):
+        self.lines.put_nowait(b'')
+        await asyncio.wait_for(self.task, 5)
+
+
+def run(session, function=collect):
+    """Run session(sidecar) against a sidecar serving function as collect"""
+    sidecar = Sidecar(thread_workers=4)
+    sidecar.register('collect', function)
+    try:
+        asyncio.run(session(sidecar))
+    finally:
+        sidecar.close()
+
+
+def test_upload_frames_are_reassembled_and_acknowledged():
+    text = "FIR No. 123/2024 — चोरी की शिकायत, u/s 379 IPC"
+
+    async def session(sidecar):
+        client = Client(sidecar)
+        client.upload(7, text)
+        await client.wait_for(lambda: client.final(7))
+        await client.close()
+        frames = 2 + -(-len(text.encode('utf-8')) // 4)
+        assert client.final(7) == {"success": True, "metadata": {"name": "fir.txt"}, "text": text, "id": 7}
+        assert client.acks(7) == list(range(1, frames + 1))
+
+    run(session)
+
+
+def test_frames_are_acknowledged_as_the_handler_takes_them():
+    release = threading.Event()
+
+    def slow(data, cancel):
+        frames = iter(data['upload'])
+        next(frames)  # the header
+        release.wait(5)
+        return collect(dict(data, upload=frames), cancel)
+
+    async def session(sidecar):
+        client = Client(sidecar)
+        client.upload(1, "abcdefgh")
+        await client.wait_for(lambda: client.acks(1))
+        await asyncio.sleep(0.1)
+        # The chunks have arrived but the handler has not taken them
+        assert client.acks(1) == [1]
+        release.set()
+        await client.wait_for(lambda: client.final(1))
+        await client.close()
+        assert client.acks(1) == [1, 2, 3, 4]
+        assert client.final(1)["success"]
+
+    run(session, slow)
+
+
+def test_cancel_stops_an_upload_waiting_for_frames():
+    async def session(sidecar):
+        client = Client(sidecar)
+        client.upload(3, "partial document", end=False)
+        await client.wait_for(lambda: len(client.acks(3)) == 5)
+        client.write({"id": 4, "method": "cancel", "target": 3})
+        await client.wait_for(lambda: client.final(3))
+        # Frames after the cancel are dropped
+        client.write({"id": 3, "method": "collect", "frame": "E"})
+        await client.close()
+        assert client.final(4) == {"success": True, "cancelled": True, "id": 4}
+        assert client.final(3) == {"success": False, "cancelled": True, "error": "Request cancelled", "id": 3}
+        assert sidecar.handlers['collect'].stats["cancelled"] == 1
+
+    run(session)
+
+
+def test_upload_without_end_frame_fails_at_end_of_input():
+    async def session(sidecar):
+        client = Client(sidecar)
+        client.upload(5, "no end frame", end=False)
+        await client.wait_for(lambda: client.acks(5))
+        await client.close()
+        assert client.final(5) == {"success": False, "id": 5,
+                                   "error": "collect failed: Document ended before its end frame"}
+
+    run(session)
+
+
+def test_deadline_bounds_an_upload():
+    async def session(sidecar):
+        client = Client(sidecar)
+        client.write({"id": 9, "method": "collect", "frame": "H", "metadata": {},
+                      "deadline": (time.time() + 0.2) * 1000})
+        await client.wait_for(lambda: client.final(9))
+        await client.close()
+        assert client.final(9) == {"success": False, "cancelled": True, "error": "Deadline exceeded", "id": 9}
+
+    run(session)
+
+
+def test_disconnect_cancels_in_flight_work():
+    async def session(sidecar):
+        client = Client(sidecar, cancel_at_end=True)
+        client.upload(2, "abandoned", end=False)
+        await client.wait_for(lambda: client.acks(2))
+        await client.close()
+        assert client.final(2) == {"success": False, "cancelled": True, "error": "Client disconnected", "id": 2}
+
+    run(session)
+
+
+def test_bad_lines_get_an_error_reply():
+    async def session(sidecar):
+        client = Client(sidecar)
+        client.lines.put_nowait(b"not json\n")
+        client.write([1, 2])
+        client.write({"id": 6, "method": "collect", "frame": "C", "data": ""})  # no upload 6
+        client.write({"id": 8, "method": "missing"})
+        await client.close()
+        assert [m["error"] for m in client.messages][:2] == [
+            "Invalid JSON input: Expecting value: line 1 column 1 (char 0)", "Request must be a JSON object"]
+        assert client.messages[2] == {"success": False, "error": "Unknown method: missing", "id": 8}
+        assert len(client.messages) == 3
+
+    run(session)
+
+
+if __name__ == "__main__":
+    test_upload_frames_are_reassembled_and_acknowledged()
+    test_frames_are_acknowledged_as_the_handler_takes_them()
+    test_cancel_stops_an_upload_waiting_for_frames()
+    test_upload_without_end_frame_fails_at_end_of_input()
+    test_deadline_bounds_an_upload()
+    test_disconnect_cancels_in_flight_work()
+    test_bad_lines_get_an_error_reply()
+    print("sidecar tests passed")
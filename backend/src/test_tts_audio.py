@@ -0,0 +1,67 @@
+import math
+from array import array
+
+import tts_audio
+from tts_audio import PCMAudio, concatenate, convert, decode, encode, resample
+from tts_engines import AudioData
+
+
+def tone(sample_rate, seconds=0.5, channels=1, frequency=440.0):
+    samples = array('h')
+    for i in range(int(sample_rate * seconds)):
+        value = int(round(8000 * math.sin(2 * math.pi * frequency * i / sample_rate)))
+        samples.extend([value] * channels)
+    return PCMAudio(samples.tobytes(), sample_rate, channels)
+
+
+def test_wav_round_trip_is_exact():
+    pcm = tone(22050, channels=2)
+    decoded = decode(AudioData(encode(pcm, 'wav'), 'wav'))
+    assert (decoded.samples, decoded.sample_rate, decoded.channels) == (pcm.samples, 22050, 2)
+    assert abs(decoded.duration - 0.5) < 1e-9
+
+
+def test_resample_keeps_duration_and_shape():
+    pcm = tone(22050)
+    up = resample(pcm, 24000)
+    assert up.sample_rate == 24000 and abs(up.duration - pcm.duration) < 1e-3
+    back = array('h', resample(up, 22050).samples)
+    original = array('h', pcm.samples)
+    assert len(back) == len(original)
+    # Linear interpolation of a 440 Hz tone loses little
+    assert max(abs(a - b) for a, b in zip(back, original)) < 200
+
+
+def test_numpy_and_pure_python_resample_agree():
+    pcm = tone(16000, seconds=0.1, channels=2)
+    with_numpy = resample(pcm, 24000, 1)
+    tts_audio.HAS_NUMPY = False
+    try:
+        without_numpy = resample(pcm, 24000, 1)
+    finally:
+        tts_audio.HAS_NUMPY = True
+    a, b = array('h', with_numpy.samples), array('h', without_numpy.samples)
+    assert len(a) == len(b)
+    assert max(abs(x - y) for x, y in zip(a, b)) <= 1
+
+
+def test_concatenate_mixed_rates():
+    joined = concatenate([tone(24000, 0.25), tone(22050, 0.5), tone(16000, 0.25, channels=2)])
+    assert (joined.sample_rate, joined.channels) == (24000, 1)
+    assert abs(joined.duration - 1.0) < 1e-3
+
+
+def test_convert_passes_matching_audio_through():
+    audio = AudioData(encode(tone(24000), 'wav'), 'wav')
+    assert convert(audio, 'wav') is audio
+    converted = convert(audio, 'wav', sample_rate=16000)
+    assert abs(decode(converted).duration - 0.5) < 1e-3
+
+
+if __name__ == "__main__":
+    test_wav_round_trip_is_exact()
+    test_resample_keeps_duration_and_shape()
+    test_numpy_and_pure_python_resample_agree()
+    test_concatenate_mixed_rates()
+    test_convert_passes_matching_audio_through()
+    print("TTS audio tests passed")
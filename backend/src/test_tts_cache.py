@@ -0,0 +1,92 @@
+import os
+import tempfile
+import threading
+import time
+
+from tts_cache import AudioCache
+
+
+def test_least_recently_used_is_evicted():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = AudioCache(directory, max_bytes=300)
+        for key in ("a", "b", "c"):
+            cache.put(key, b'x' * 100, 'wav')
+        assert cache.get("a")  # now most recently used
+        cache.put("d", b'x' * 100, 'wav')
+        assert cache.get("b") is None
+        assert all(cache.get(key) for key in ("a", "c", "d"))
+        assert cache.metrics()["bytes"] == 300 and cache.stats["evictions"] == 1
+
+
+def test_recency_survives_a_restart():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = AudioCache(directory, max_bytes=300)
+        for key in ("a", "b", "c"):
+            cache.put(key, b'x' * 100, 'wav')
+        # Access times are mtimes; space them out so the order is unambiguous
+        now = time.time()
+        for age, key in ((30, "b"), (20, "c"), (10, "a")):
+            os.utime(cache._path_for(key, 'wav'), (now - age, now - age))
+
+        reopened = AudioCache(directory, max_bytes=300)
+        reopened.put("d", b'x' * 100, 'wav')
+        assert reopened.get("b") is None
+        assert reopened.get("a") and reopened.get("c")
+
+
+def test_concurrent_misses_render_once():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = AudioCache(directory)
+        started = threading.Event()
+        release = threading.Event()
+        renders = []
+
+        def render():
+            renders.append(1)
+            started.set()
+            release.wait(5)
+            return b'audio'
+
+        results = []
+
+        def fetch():
+            results.append(cache.get_or_render("k", 'wav', render))
+
+        threads = [threading.Thread(target=fetch) for _ in range(8)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        # Let the others reach the in-flight render before it finishes
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert len(renders) == 1
+        assert sorted(hit for _, hit in results) == [False] + [True] * 7
+        with open(results[0][0], 'rb') as f:
+            assert f.read() == b'audio'
+
+
+def test_failed_render_lets_a_waiter_retry():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = AudioCache(directory)
+
+        def broken():
+            raise IOError("engine failed")
+
+        try:
+            cache.get_or_render("k", 'wav', broken)
+        except IOError:
+            pass
+        path, hit = cache.get_or_render("k", 'wav', lambda: b'audio')
+        assert not hit and os.path.exists(path)
+
+
+if __name__ == "__main__":
+    test_least_recently_used_is_evicted()
+    test_recency_survives_a_restart()
+    test_concurrent_misses_render_once()
+    test_failed_render_lets_a_waiter_retry()
+    print("TTS cache tests passed")
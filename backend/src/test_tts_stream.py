@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from tts_stream import chunk_text, split_sentences, stream_chunks
+
+JUDGMENT = ("The accused was produced before the Hon'ble Court u/s. 167 Cr.P.C. on 3rd March. "
+            "Ld. counsel relied on Sec. 437 of the Code and Art. 21 of the Constitution. "
+            "Mr. Sharma deposed that Rs. 50,000 was recovered; the recovery memo was signed by two "
+            "witnesses. Bail was refused!")
+
+
+def test_abbreviations_stay_inside_their_sentence():
+    assert split_sentences(JUDGMENT) == [
+        "The accused was produced before the Hon'ble Court u/s. 167 Cr.P.C. on 3rd March.",
+        "Ld. counsel relied on Sec. 437 of the Code and Art. 21 of the Constitution.",
+        "Mr. Sharma deposed that Rs. 50,000 was recovered; the recovery memo was signed by two witnesses.",
+        "Bail was refused!",
+    ]
+
+
+def test_chunks_respect_limits_and_keep_every_word():
+    text = " ".join([JUDGMENT] * 20)
+    chunks = chunk_text(text, max_chars=240, first_chunk_chars=100)
+    assert len(chunks[0]) <= 100
+    assert all(len(chunk) <= 240 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_long_sentence_breaks_at_a_clause():
+    sentence = ("The prosecution examined eleven witnesses in support of its case; "
+                "the defence examined none and relied on the cross-examination of the investigating officer.")
+    chunks = chunk_text(sentence, max_chars=120, first_chunk_chars=120)
+    assert chunks[0] == "The prosecution examined eleven witnesses in support of its case;"
+
+
+def test_stream_is_ordered_and_bounded():
+    def render(index, chunk):
+        return index * 10
+
+    chunks = [f"chunk {i}" for i in range(30)]
+    submitted = []
+
+    def numbered():
+        for chunk in chunks:
+            submitted.append(chunk)
+            yield chunk
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        stream = stream_chunks(numbered(), render, executor, lookahead=4)
+        first = next(stream)
+        # Only the lookahead window (plus its replacement) has been submitted
+        assert len(submitted) <= 5
+        rest = list(stream)
+    results = [first] + rest
+    assert [index for index, _, _ in results] == list(range(30))
+    assert all(result == index * 10 for index, _, result in results)
+
+
+if __name__ == "__main__":
+    test_abbreviations_stay_inside_their_sentence()
+    test_chunks_respect_limits_and_keep_every_word()
+    test_long_sentence_breaks_at_a_clause()
+    test_stream_is_ordered_and_bounded()
+    print("TTS stream tests passed")
@@ -0,0 +1,155 @@
+import io
+import shutil
+import subprocess
+import wave
+from array import array
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from tts_engines import AudioData, TTSError
+
+FFMPEG = shutil.which('ffmpeg')
+
+# Output formats and the ffmpeg muxer/codec used to produce the compressed ones
+FORMATS = {
+    'wav': None,
+    'pcm': None,
+    'mp3': ['-f', 'mp3', '-c:a', 'libmp3lame', '-b:a', '64k'],
+    'opus': ['-f', 'ogg', '-c:a', 'libopus', '-b:a', '32k'],
+}
+
+CONTENT_TYPES = {
+    'wav': 'audio/wav',
+    'pcm': 'audio/L16',
+    'mp3': 'audio/mpeg',
+    'opus': 'audio/ogg',
+}
+
+
+class PCMAudio:
+    """
+    Decoded audio: signed 16-bit little-endian samples, interleaved
+    """
+    def __init__(self, samples, sample_rate, channels=1):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    @property
+    def duration(self):
+        return len(self.samples) / (2.0 * self.channels * self.sample_rate)
+
+
+def _ffmpeg(args, data):
+    """
+    Run ffmpeg over pipes (no temporary files)
+    """
+    if not FFMPEG:
+        raise TTSError("ffmpeg is required for MP3/Opus conversion")
+    completed = subprocess.run([FFMPEG, '-hide_banner', '-loglevel', 'error'] + args,
+                               input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60)
+    if completed.returncode != 0:
+        raise TTSError(completed.stderr.decode('utf-8', 'replace').strip() or "ffmpeg failed")
+    return completed.stdout
+
+
+def decode(audio):
+    """
+    AudioData (wav or mp3) to PCMAudio
+    """
+    if audio.format == 'wav':
+        with wave.open(io.BytesIO(audio.data), 'rb') as w:
+            if w.getsampwidth() != 2:
+                raise TTSError(f"Unsupported WAV sample width: {w.getsampwidth() * 8} bits")
+            return PCMAudio(w.readframes(w.getnframes()), w.getframerate(), w.getnchannels())
+    if audio.format == 'pcm':
+        raise TTSError("Raw PCM has no header; wrap it in PCMAudio directly")
+    # gTTS MP3 is 24 kHz mono; decode everything compressed to that
+    samples = _ffmpeg(['-i', 'pipe:0', '-f', 's16le', '-ac', '1', '-ar', '24000', 'pipe:1'], audio.data)
+    return PCMAudio(samples, 24000, 1)
+
+
+def resample(pcm, sample_rate=None, channels=None):
+    """
+    Convert to the given sample rate and channel count (linear interpolation)
+    """
+    sample_rate = sample_rate or pcm.sample_rate
+    channels = channels or pcm.channels
+    if sample_rate == pcm.sample_rate and channels == pcm.channels:
+        return pcm
+
+    if HAS_NUMPY:
+        frames = np.frombuffer(pcm.samples, dtype='<i2').reshape(-1, pcm.channels).astype(np.float32)
+        if channels != pcm.channels:
+            mono = frames.mean(axis=1, keepdims=True)
+            frames = np.repeat(mono, channels, axis=1)
+        if sample_rate != pcm.sample_rate and len(frames):
+            count = int(round(len(frames) * sample_rate / pcm.sample_rate))
+            positions = np.arange(count) * (pcm.sample_rate / sample_rate)
+            source = np.arange(len(frames))
+            frames = np.stack([np.interp(positions, source, frames[:, c]) for c in range(channels)], axis=1)
+        samples = np.clip(np.round(frames), -32768, 32767).astype('<i2').tobytes()
+        return PCMAudio(samples, sample_rate, channels)
+
+    source = array('h', pcm.samples)
+    frames = [source[i:i + pcm.channels] for i in range(0, len(source), pcm.channels)]
+    frames = [sum(f) / len(f) for f in frames]  # downmix to mono first
+    count = int(round(len(frames) * sample_rate / pcm.sample_rate))
+    step = pcm.sample_rate / sample_rate
+    out = array('h')
+    for i in range(count):
+        pos = i * step
+        left = int(pos)
+        right = min(left + 1, len(frames) - 1)
+        value = frames[left] + (frames[right] - frames[left]) * (pos - left)
+        out.extend([int(round(value))] * channels)
+    return PCMAudio(out.tobytes(), sample_rate, channels)
+
+
+def encode(pcm, audio_format):
+    """
+    PCMAudio to bytes in audio_format ('wav', 'pcm', 'mp3' or 'opus')
+    """
+    if audio_format not in FORMATS:
+        raise TTSError(f"Unsupported audio format: {audio_format}")
+    if audio_format == 'pcm':
+        return pcm.samples
+    if audio_format == 'wav':
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as w:
+            w.setnchannels(pcm.channels)
+            w.setsampwidth(2)
+            w.setframerate(pcm.sample_rate)
+            w.writeframes(pcm.samples)
+        return buffer.getvalue()
+    return _ffmpeg(['-f', 's16le', '-ar', str(pcm.sample_rate), '-ac', str(pcm.channels),
+                    '-i', 'pipe:0'] + FORMATS[audio_format] + ['pipe:1'], pcm.samples)
+
+
+def concatenate(parts, sample_rate=None, channels=None):
+    """
+    Join several utterances into one PCMAudio. Parts are brought to a common
+    rate and channel count (the first part's unless given) and their samples
+    appended; nothing is encoded until the result is.
+    """
+    if not parts:
+        raise TTSError("Nothing to concatenate")
+    sample_rate = sample_rate or parts[0].sample_rate
+    channels = channels or parts[0].channels
+    samples = b''.join(resample(part, sample_rate, channels).samples for part in parts)
+    return PCMAudio(samples, sample_rate, channels)
+
+
+def convert(audio, audio_format, sample_rate=None):
+    """
+    Convert engine output to audio_format, optionally resampling. Audio that
+    is already in the right format and rate is passed through untouched.
+    """
+    if audio.format == audio_format and sample_rate is None:
+        return audio
+    pcm = resample(decode(audio), sample_rate)
+    return AudioData(encode(pcm, audio_format), audio_format)
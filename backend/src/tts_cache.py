@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class AudioCache:
+    """
+    Content-addressed cache of rendered audio on disk.
+
+    Entries are keyed by a hash of everything that affects the audio (text,
+    language, voice, engine, format) and evicted least-recently-used once
+    the total size exceeds max_bytes. Writes go to a temp file and are
+    renamed into place, so readers never see a partial file. Access times
+    are kept on disk (mtime), so recency survives a restart.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (path, size), oldest first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._in_flight = {}  # key -> Event, so concurrent misses render once
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "writes": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(text, language, voice, engine, audio_format, sample_rate=None):
+        fields = [text, language, voice or "", engine, audio_format]
+        if sample_rate:
+            fields.append(sample_rate)
+        material = json.dumps(fields, ensure_ascii=False)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _path_for(self, key, audio_format):
+        return os.path.join(self.directory, key[:2], f"{key}.{audio_format}")
+
+    def _load_index(self):
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found.append((st.st_mtime, name.split('.', 1)[0], path, st.st_size))
+        for _, key, path, size in sorted(found):
+            self._entries[key] = (path, size)
+            self._total_bytes += size
+        self._evict()
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not os.path.exists(entry[0]):
+                self._forget(key)
+                return None
+            self._entries.move_to_end(key)
+        try:
+            os.utime(entry[0])
+        except OSError:
+            pass
+        return entry[0]
+
+    def get(self, key):
+        """
+        Path of the cached audio for key, or None
+        """
+        path = self._lookup(key)
+        with self._lock:
+            self.stats["hits" if path else "misses"] += 1
+        return path
+
+    def put(self, key, data, audio_format):
+        """
+        Store rendered audio atomically and return its path
+        """
+        path = self._path_for(key, audio_format)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries[key][1]
+            self._entries[key] = (path, len(data))
+            self._entries.move_to_end(key)
+            self._total_bytes += len(data)
+            self.stats["writes"] += 1
+            self._evict()
+        return path
+
+    def get_or_render(self, key, audio_format, render):
+        """
+        Return (path, hit). On a miss, render() must return the audio bytes;
+        concurrent misses for the same key wait for a single render.
+        """
+        while True:
+            path = self._lookup(key)
+            with self._lock:
+                if path is not None:
+                    self.stats["hits"] += 1
+                    return path, True
+                waiter = self._in_flight.get(key)
+                if waiter is None:
+                    self.stats["misses"] += 1
+                    self._in_flight[key] = threading.Event()
+                    break
+            waiter.wait()
+
+        try:
+            return self.put(key, render(), audio_format), False
+        finally:
+            with self._lock:
+                self._in_flight.pop(key).set()
+
+    def _forget(self, key):
+        path, size = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def _evict(self):
+        # Caller holds the lock (or is the constructor)
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, (path, size) = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.stats["evictions"] += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats,
+                        entries=len(self._entries),
+                        bytes=self._total_bytes,
+                        max_bytes=self.max_bytes,
+                        hit_rate=self.stats["hits"] / lookups if lookups else 0.0)
+
+
+def default_cache():
+    """
+    Cache configured from TTS_CACHE_DIR / TTS_CACHE_MAX_BYTES, or None when
+    TTS_CACHE_MAX_BYTES is 0
+    """
+    max_bytes = int(os.environ.get('TTS_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+    if max_bytes <= 0:
+        return None
+    directory = os.environ.get('TTS_CACHE_DIR',
+                               os.path.join(tempfile.gettempdir(), 'dharmasikhara_tts_cache'))
+    return AudioCache(directory, max_bytes)
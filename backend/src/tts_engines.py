@@ -0,0 +1,196 @@
+import io
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import time
+
+try:
+    from gtts import gTTS
+    HAS_GTTS = True
+except ImportError:
+    HAS_GTTS = False
+
+
+class TTSError(Exception):
+    pass
+
+
+class AudioData:
+    """
+    Synthesized audio held in memory
+    """
+    def __init__(self, data, audio_format):
+        self.data = data
+        self.format = audio_format  # "wav" or "mp3"
+
+
+class TTSEngine:
+    """
+    Base class for speech synthesis backends
+    """
+    name = None
+    requires_network = False
+
+    @property
+    def cache_tag(self):
+        """
+        Engine identity in audio cache keys; changes when the engine's
+        output does, so clips cached before the change are not served
+        """
+        return self.name
+
+    def available(self):
+        return False
+
+    def synthesize(self, text, language='en', voice=None):
+        raise NotImplementedError
+
+
+class GTTSEngine(TTSEngine):
+    """
+    Google Translate TTS (network, MP3 output)
+    """
+    name = 'gtts'
+    requires_network = True
+
+    def available(self):
+        return HAS_GTTS
+
+    def synthesize(self, text, language='en', voice=None):
+        if not HAS_GTTS:
+            raise TTSError("gTTS library not available")
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=language, slow=False, lang_check=False).write_to_fp(buffer)
+        return AudioData(buffer.getvalue(), 'mp3')
+
+
+class EspeakEngine(TTSEngine):
+    """
+    Local espeak-ng synthesizer (no network, WAV output)
+    """
+    name = 'espeak'
+    # Clips cached before fix_wav_sizes carry placeholder WAV sizes
+    cache_tag = 'espeak-2'
+
+    # espeak-ng voice names for the languages the UI offers
+    VOICES = {'en': 'en-gb', 'hi': 'hi', 'ta': 'ta'}
+
+    def __init__(self):
+        self.binary = shutil.which('espeak-ng') or shutil.which('espeak')
+        self.words_per_minute = int(os.environ.get('ESPEAK_WPM', '160'))
+
+    def available(self):
+        return self.binary is not None
+
+    def synthesize(self, text, language='en', voice=None):
+        if not self.binary:
+            raise TTSError("espeak-ng not installed")
+        command = [
+            self.binary,
+            '--stdout',
+            '--stdin',
+            '-v', voice or self.VOICES.get(language, language),
+            '-s', str(self.words_per_minute),
+        ]
+        # Text goes over stdin so it never has to be escaped for the shell
+        completed = subprocess.run(command, input=text.encode('utf-8'),
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60)
+        if completed.returncode != 0 or not completed.stdout:
+            raise TTSError(completed.stderr.decode('utf-8', 'replace').strip() or "espeak-ng failed")
+        return AudioData(fix_wav_sizes(completed.stdout), 'wav')
+
+
+def fix_wav_sizes(data):
+    """
+    Set the RIFF and data chunk sizes of a WAV from its actual length.
+    espeak-ng writing to a pipe cannot seek back to fill them in and leaves
+    placeholders (0x7FFFF000), which players and the wave module trust.
+    """
+    if len(data) < 12 or data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        raise TTSError("espeak-ng did not produce a WAV file")
+    data = bytearray(data)
+    struct.pack_into('<I', data, 4, len(data) - 8)
+    position = 12
+    while position + 8 <= len(data):
+        chunk_id = bytes(data[position:position + 4])
+        if chunk_id == b'data':
+            struct.pack_into('<I', data, position + 4, len(data) - position - 8)
+            return bytes(data)
+        size, = struct.unpack_from('<I', data, position + 4)
+        position += 8 + size + (size & 1)
+    raise TTSError("espeak-ng WAV has no data chunk")
+
+
+ENGINES = {engine.name: engine for engine in (GTTSEngine(), EspeakEngine())}
+
+
+def _preference(language):
+    """
+    Engine order for a language. TTS_ENGINE is a comma-separated default
+    order; TTS_ENGINE_<LANG> (e.g. TTS_ENGINE_TA) overrides it per language.
+    """
+    configured = (os.environ.get(f'TTS_ENGINE_{language.upper()}')
+                  or os.environ.get('TTS_ENGINE', 'gtts,espeak'))
+    return [name.strip() for name in configured.split(',') if name.strip()]
+
+
+def select_engine(language='en', requested=None):
+    """
+    Pick the engine for a request: the requested one if given, otherwise the
+    first available engine in the configured order
+    """
+    if requested:
+        engine = ENGINES.get(requested)
+        if engine is None:
+            raise TTSError(f"Unknown TTS engine: {requested}")
+        if not engine.available():
+            raise TTSError(f"TTS engine not available: {requested}")
+        return engine
+
+    for name in _preference(language):
+        engine = ENGINES.get(name)
+        if engine and engine.available():
+            return engine
+    raise TTSError("No TTS engine available (install espeak-ng or gTTS)")
+
+
+def benchmark(engine_name, texts, repeat=3):
+    """
+    Time synthesis of each text; returns per-call latencies in seconds
+    """
+    engine = select_engine(requested=engine_name)
+    latencies = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            engine.synthesize(text)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark a TTS engine")
+    parser.add_argument('--engine', default='espeak', choices=sorted(ENGINES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('texts', nargs='*', default=[
+        "All rise! The Honourable Court is now in session.",
+        "Please be seated. Court clerk, confirm the presence of all parties.",
+    ])
+    args = parser.parse_args()
+
+    try:
+        results = sorted(benchmark(args.engine, args.texts, args.repeat))
+    except TTSError as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
+    print(json.dumps({
+        "engine": args.engine,
+        "calls": len(results),
+        "p50_ms": results[len(results) // 2] * 1000,
+        "max_ms": results[-1] * 1000,
+    }, indent=2))
@@ -0,0 +1,186 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tts_engines import select_engine, TTSError
+from tts_audio import convert
+from tts_cache import AudioCache, default_cache
+
+# Per-speaker espeak-ng voices; gTTS has a single voice per language and ignores these
+DEFAULT_VOICES = {
+    'Court Clerk': 'en-gb+m3',
+    'Magistrate': 'en-gb+f3',
+    'Public Prosecutor': 'en-gb+m1',
+    'Defense Attorney': 'en-gb+m4',
+    'Defence Attorney': 'en-gb+m4',
+}
+FALLBACK_VOICE = 'en-gb+m2'
+
+# Lines that are pure stage directions, e.g. "[Magistrate exits the courtroom]"
+STAGE_DIRECTION = re.compile(r'^\s*\[[^\]]*\]\s*$')
+
+_cache = None
+
+
+def _init_worker():
+    global _cache
+    _cache = default_cache()
+
+
+def render_line(line, language, engine_name, audio_format, sample_rate=None, cache=None):
+    """
+    Render one script line in a pool worker, via the shared audio cache so
+    that live requests for the same line hit it later. Callers outside the
+    pool pass their own cache.
+    """
+    engine = select_engine(language, engine_name)
+    cache = cache if cache is not None else _cache
+
+    def render():
+        audio = engine.synthesize(line['dialogue'], language, line['voice'])
+        return convert(audio, audio_format, sample_rate).data
+
+    if cache is not None:
+        key = AudioCache.make_key(line['dialogue'], language, line['voice'], engine.cache_tag,
+                                  audio_format, sample_rate)
+        path, hit = cache.get_or_render(key, audio_format, render)
+        with open(path, 'rb') as f:
+            return line['sequence'], f.read(), hit, engine.name
+    return line['sequence'], render(), False, engine.name
+
+
+def wav_duration(data):
+    """
+    Duration in seconds of WAV bytes, or None for other formats. Counted
+    from the samples present rather than the header's frame count, which
+    a streamed WAV may leave as a placeholder.
+    """
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as w:
+            frame_bytes = w.getsampwidth() * w.getnchannels()
+            return len(w.readframes(w.getnframes())) / float(frame_bytes * w.getframerate())
+    except (wave.Error, EOFError):
+        return None
+
+
+def load_lines(script_path, voices, sections=('court_session',)):
+    with open(script_path, 'r', encoding='utf-8') as f:
+        script = json.load(f)
+    lines = []
+    for section in sections:
+        for entry in script.get(section, []):
+            dialogue = entry.get('dialogue', '')
+            if not dialogue or STAGE_DIRECTION.match(dialogue):
+                continue
+            lines.append({
+                'sequence': entry['sequence'],
+                'speaker': entry.get('speaker', ''),
+                'dialogue': dialogue,
+                'voice': voices.get(entry.get('speaker'), FALLBACK_VOICE),
+            })
+    return script, lines
+
+
+def prerender_script(script_path, output_dir, language='en', engine=None, voices=None,
+                     sections=('court_session',), audio_format='wav', max_workers=None,
+                     sample_rate=None):
+    """
+    Render every line of a scenario script in parallel and write
+    <output_dir>/bundle.bin plus manifest.json mapping each sequence number
+    to its byte range and duration. The bundle is a container, not one
+    audio file: each range is a complete clip in the manifest's format.
+    Lines are resampled to sample_rate (default TTS_SAMPLE_RATE) when one
+    is set.
+    """
+    sample_rate = sample_rate or int(os.environ.get('TTS_SAMPLE_RATE', '0')) or None
+    voices = dict(DEFAULT_VOICES, **(voices or {}))
+    script, lines = load_lines(script_path, voices, sections)
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    rendered = {}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(render_line, line, language, engine, audio_format, sample_rate) for line in lines]
+        for future in as_completed(futures):
+            sequence, data, hit, engine_name = future.result()
+            rendered[sequence] = (data, hit, engine_name)
+
+    bundle_name = 'bundle.bin'
+    entries = []
+    offset = 0
+    with open(os.path.join(output_dir, bundle_name + '.tmp'), 'wb') as bundle:
+        for line in sorted(lines, key=lambda l: l['sequence']):
+            data, hit, engine_name = rendered[line['sequence']]
+            bundle.write(data)
+            entries.append({
+                'sequence': line['sequence'],
+                'speaker': line['speaker'],
+                'voice': line['voice'],
+                'engine': engine_name,
+                'file': bundle_name,
+                'offset': offset,
+                'length': len(data),
+                'duration_seconds': wav_duration(data),
+                'sha256': hashlib.sha256(data).hexdigest(),
+                'cache_hit': hit,
+            })
+            offset += len(data)
+    os.replace(os.path.join(output_dir, bundle_name + '.tmp'), os.path.join(output_dir, bundle_name))
+
+    manifest = {
+        'script': os.path.basename(script_path),
+        'case_number': script.get('case_details', {}).get('case_number'),
+        'language': language,
+        'format': audio_format,
+        'sample_rate': sample_rate,
+        'bundle': bundle_name,
+        'bundle_bytes': offset,
+        'render_seconds': time.perf_counter() - start,
+        'lines': entries,
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render a scenario script into an audio bundle")
+    parser.add_argument('script', help="Scenario script JSON, e.g. bail_hearing_script.json")
+    parser.add_argument('output_dir')
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--engine', help="TTS engine name (default: configured order)")
+    parser.add_argument('--voices', help="JSON file mapping speaker names to voices")
+    parser.add_argument('--include-post-hearing', action='store_true',
+                        help="Also render post_hearing_procedures")
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    voices = {}
+    if args.voices:
+        with open(args.voices, 'r', encoding='utf-8') as f:
+            voices = json.load(f)
+    sections = ('court_session', 'post_hearing_procedures') if args.include_post_hearing else ('court_session',)
+
+    try:
+        manifest = prerender_script(args.script, args.output_dir, args.language, args.engine,
+                                    voices, sections, max_workers=args.workers)
+    except TTSError as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
+    print(json.dumps({
+        "success": True,
+        "lines": len(manifest['lines']),
+        "bundle_bytes": manifest['bundle_bytes'],
+        "render_seconds": manifest['render_seconds'],
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,240 @@
 import sys
+import base64
 import json
 import os
-try:
-    from gtts import gTTS
-    import wave
-    HAS_GTTS = True
-except ImportError:
-    HAS_GTTS = False
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tts_engines import select_engine, AudioData
+from tts_audio import CONTENT_TYPES, FORMATS, convert, concatenate, decode, encode
+from tts_cache import AudioCache, default_cache
+from tts_stream import chunk_text, stream_chunks
 
-def text_to_speech(text, language, output_path):
+# Rendered-audio cache shared by all requests in this process (None if disabled)
+audio_cache = default_cache()
+
+# Resample all output to this rate when set (e.g. 24000), so clips from
+# different engines can be mixed by the client
+DEFAULT_SAMPLE_RATE = int(os.environ.get('TTS_SAMPLE_RATE', '0')) or None
+
+# Chunks of streaming requests are synthesized here, separately from the
+# request pool so a stream never waits on its own request thread
+STREAM_WORKERS = int(os.environ.get('TTS_STREAM_WORKERS', '4'))
+chunk_pool = ThreadPoolExecutor(max_workers=STREAM_WORKERS)
+
+def _synthesize(text, language, tts_engine, voice, audio_format, sample_rate):
     """
-    Convert text to speech using gTTS
+    Render text to audio_format in memory, through the cache when enabled.
+    Returns (data, cache path, cache hit); data is None when the audio is in
+    the cache, so callers that only need a path never read it back.
     """
-    if not HAS_GTTS:
-        # Return error if gTTS is not available
-        return {"success": False, "error": "gTTS library not available"}
+    def render():
+        audio = tts_engine.synthesize(text, language, voice)
+        return convert(audio, audio_format, sample_rate).data
     
+    if audio_cache is None:
+        return render(), None, False
+    key = AudioCache.make_key(text, language, voice, tts_engine.cache_tag, audio_format, sample_rate)
+    filepath, hit = audio_cache.get_or_render(key, audio_format, render)
+    return None, filepath, hit
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _deliver(data, audio_format, output_path, cache_path, return_bytes):
+    """
+    Response fields for rendered audio: the bytes themselves (base64) when
+    asked for, otherwise a path to a file holding them
+    """
+    result = {"format": audio_format, "content_type": CONTENT_TYPES[audio_format]}
+    if return_bytes:
+        result["audio"] = base64.b64encode(data if data is not None else _read(cache_path)).decode('ascii')
+    elif cache_path:
+        result["filepath"] = cache_path
+    else:
+        with open(output_path, 'wb') as f:
+            f.write(data)
+        result["filepath"] = output_path
+    return result
+
+def text_to_speech(text, language, output_path=None, engine=None, voice=None,
+                   audio_format=None, sample_rate=None, return_bytes=False):
+    """
+    Convert text to speech with the configured engine (gTTS or local espeak-ng)
+    and convert it to the requested format (wav, pcm, mp3 or opus; taken
+    from output_path's extension if not given) in memory.
+    Audio that was rendered before is served from the cache without synthesis;
+    the returned filepath then points into the cache rather than output_path.
+    With return_bytes the audio is returned inline and nothing is written
+    outside the cache.
+    """
     try:
-        # Create gTTS object
-        tts = gTTS(text=text, lang=language, slow=False, lang_check=False)
-        
-        # Save to temporary mp3 file
-        temp_mp3 = output_path.replace('.wav', '.mp3')
-        tts.save(temp_mp3)
+        tts_engine = select_engine(language, engine)
+        audio_format = audio_format or (os.path.splitext(output_path or '')[1].lstrip('.') or 'wav')
+        sample_rate = sample_rate or DEFAULT_SAMPLE_RATE
         
-        # Convert mp3 to wav (if needed for compatibility)
-        # For now, we'll just rename the file to .wav
-        # In a production environment, you would use a proper conversion library
-        os.rename(temp_mp3, output_path)
+        data, cache_path, hit = _synthesize(text, language, tts_engine, voice, audio_format, sample_rate)
+        result = {"success": True, "engine": tts_engine.name,
+                  "cached": cache_path is not None, "cache_hit": hit}
+        result.update(_deliver(data, audio_format, output_path, cache_path, return_bytes))
+        return result
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+def concatenate_speech(texts, language, output_path=None, engine=None, voice=None,
+                       audio_format=None, sample_rate=None, return_bytes=False):
+    """
+    Synthesize several utterances and join them into one clip. Each part is
+    rendered (and cached) as WAV, so joining is a sample copy and the clip
+    is encoded once.
+    """
+    try:
+        tts_engine = select_engine(language, engine)
+        audio_format = audio_format or (os.path.splitext(output_path or '')[1].lstrip('.') or 'wav')
+        sample_rate = sample_rate or DEFAULT_SAMPLE_RATE
         
-        return {"success": True, "filepath": output_path}
+        parts = []
+        for text in texts:
+            data, cache_path, _ = _synthesize(text, language, tts_engine, voice, 'wav', sample_rate)
+            parts.append(decode(AudioData(data if data is not None else _read(cache_path), 'wav')))
+        clip = concatenate(parts, sample_rate)
+        result = {"success": True, "engine": tts_engine.name, "parts": len(parts),
+                  "duration_seconds": clip.duration, "cached": False, "cache_hit": False}
+        result.update(_deliver(encode(clip, audio_format), audio_format, output_path, None, return_bytes))
+        return result
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+def stream_speech(text, language, output_path=None, engine=None, voice=None, lookahead=None,
+                  audio_format=None, sample_rate=None, return_bytes=False):
+    """
+    Synthesize long text sentence by sentence. Yields one message per chunk,
+    in order, as soon as it is ready, then a final message with "done".
+    """
+    base, extension = os.path.splitext(output_path or '')
+    audio_format = audio_format or extension.lstrip('.') or 'wav'
+    chunks = chunk_text(text)
+    lookahead = lookahead or STREAM_WORKERS
+    
+    def render(index, chunk):
+        chunk_path = f"{base}_{index:03d}.{audio_format}" if output_path else None
+        return text_to_speech(chunk, language, chunk_path, engine, voice,
+                              audio_format, sample_rate, return_bytes)
+    
+    for index, chunk, result in stream_chunks(chunks, render, chunk_pool, lookahead):
+        if not result.get("success"):
+            yield {"success": False, "done": True, "chunk": index, "error": result.get("error")}
+            return
+        yield dict(result, chunk=index, text=chunk, done=False)
+    yield {"success": True, "done": True, "chunks": len(chunks)}
+
+def _validate(data):
+    """
+    Error message for a malformed synthesis request, or None
+    """
+    if not data.get('text') and not data.get('texts'):
+        return "Text is required"
+    if not data.get('output_path') and data.get('return') != 'bytes':
+        return "Output path is required"
+    if data.get('format') and data['format'] not in FORMATS:
+        return f"Unsupported audio format: {data['format']}"
+    return None
+
+def _options(data):
+    return {
+        "engine": data.get('engine'),
+        "voice": data.get('voice'),
+        "audio_format": data.get('format'),
+        "sample_rate": data.get('sample_rate'),
+        "return_bytes": data.get('return') == 'bytes',
+    }
+
+def stream_request(data):
+    """
+    Validate a streaming request and yield its messages. "texts" is
+    streamed as one text, so its utterances are chunked like sentences.
+    """
+    error = _validate(data)
+    if error:
+        yield {"success": False, "done": True, "error": error}
+        return
+    text = data.get('text') or ' '.join(data['texts'])
+    yield from stream_speech(text, data.get('language', 'en'), data.get('output_path'), **_options(data))
+
+def handle_request(data):
+    """
+    Validate one request and synthesize it. "texts" (a list) instead of
+    "text" joins the utterances into one clip; "return": "bytes" returns
+    the audio inline (base64) instead of a file path.
+    """
+    if data.get('command') == 'stats':
+        return {"success": True, "cache": audio_cache.metrics() if audio_cache else None}
+    
+    error = _validate(data)
+    if error:
+        return {"success": False, "error": error}
+    
+    language = data.get('language', 'en')
+    if data.get('texts'):
+        return concatenate_speech(data['texts'], language, data.get('output_path'), **_options(data))
+    return text_to_speech(data['text'], language, data.get('output_path'), **_options(data))
+
+def serve(max_workers=4):
+    """
+    Long-running worker mode: reads newline-delimited JSON requests from
+    stdin and writes one JSON response line per request, tagged with the
+    request's "id". Requests are handled concurrently, so responses may
+    arrive out of order. Requests with "stream": true get one line per
+    chunk and a final line with "done": true.
+    """
+    write_lock = threading.Lock()
+    
+    def respond(request_id, result):
+        result["id"] = request_id
+        line = json.dumps(result)
+        with write_lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+    
+    def run(request_id, data):
+        try:
+            if data.get('stream'):
+                # Several response lines: one per chunk, the last has "done"
+                for message in stream_request(data):
+                    respond(request_id, message)
+                return
+            result = handle_request(data)
+        except Exception as e:
+            result = {"success": False, "done": True, "error": f"Unexpected error: {str(e)}"}
+        respond(request_id, result)
+    
+    # Signal readiness so the parent only queues work once imports are done
+    respond(None, {"success": True, "ready": True})
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                respond(None, {"success": False, "error": f"Invalid JSON input: {str(e)}"})
+                continue
+            if not isinstance(data, dict):
+                respond(None, {"success": False, "error": "Request must be a JSON object"})
+                continue
+            pool.submit(run, data.get('id'), data)
+
 def main():
     """
     Main function to handle input from Node.js
     """
+    if '--serve' in sys.argv:
+        workers = int(os.environ.get('TTS_WORKERS', '4'))
+        serve(max_workers=workers)
+        return
+    
     try:
         # Read input from stdin
         input_data = sys.stdin.read()
@@ -47,22 +245,14 @@ def main():
         # Parse the JSON input
         data = json.loads(input_data)
         
-        # Extract parameters
-        text = data.get('text', '')
-        language = data.get('language', 'en')
-        output_path = data.get('output_path', '')
-        
-        # Validate inputs
-        if not text:
-            print(json.dumps({"success": False, "error": "Text is required"}))
-            sys.exit(1)
-        
-        if not output_path:
-            print(json.dumps({"success": False, "error": "Output path is required"}))
-            sys.exit(1)
+        if data.get('stream'):
+            # One JSON line per chunk as it becomes ready
+            for message in stream_request(data):
+                print(json.dumps(message), flush=True)
+            return
         
         # Convert text to speech
-        result = text_to_speech(text, language, output_path)
+        result = handle_request(data)
         
         # Output result as JSON
         print(json.dumps(result))
@@ -0,0 +1,132 @@
+import itertools
+import re
+from collections import deque
+
+# Words that end in a period without ending the sentence (compared lowercased,
+# without the trailing period)
+ABBREVIATIONS = {
+    'sec', 'secs', 's', 'ss', 'art', 'arts', 'cl', 'no', 'nos', 'para', 'paras',
+    'ch', 'vol', 'p', 'pp', 'r', 'o', 'sch', 'hon', "hon'ble", 'honble', 'ld',
+    'mr', 'mrs', 'ms', 'dr', 'smt', 'shri', 'sri', 'adv', 'jr', 'sr', 'st',
+    'v', 'vs', 'anr', 'ors', 'govt', 'dept', 'ltd', 'pvt', 'co', 'inc', 'corp',
+    'rs', 'viz', 'etc', 'approx', 'i.e', 'e.g', 'cf', 'ibid', 'supra', 'ref',
+}
+
+# Dotted initialisms such as I.P.C, Cr.P.C, A.I.R or a lone initial
+INITIALISM = re.compile(r"^(?:[A-Za-z][a-z]?\.)*[A-Za-z][a-z]?$")
+
+# Candidate sentence ends: terminal punctuation, closing quotes/brackets, space
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*(?=\s+)")
+
+# Places to break an over-long sentence, best first
+CLAUSE_BREAKS = [re.compile(r"[;:]\s+"), re.compile(r"\s+[-–—]\s+"), re.compile(r",\s+")]
+
+
+def _is_boundary(text, match):
+    end = match.end()
+    rest = text[end:].lstrip()
+    if not rest:
+        return True
+    if '.' not in match.group() or match.group().startswith(('!', '?')):
+        return True
+    # "Sec. 437", "Rs. 50,000", "u/s. 302 and ..." continue the sentence
+    if rest[0].isdigit() or rest[0].islower():
+        return False
+    token = text[:match.start()].rsplit(None, 1)[-1] if text[:match.start()].strip() else ''
+    token = token.lstrip('("\'[')
+    if token.lower() in ABBREVIATIONS:
+        return False
+    return not INITIALISM.match(token)
+
+
+def split_sentences(text):
+    """
+    Split text into sentences, keeping abbreviations such as "Sec.",
+    "Hon'ble", "Cr.P.C." and "Mr." inside their sentence
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        if _is_boundary(text, match):
+            sentence = text[start:match.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def _split_long(sentence, max_chars):
+    """
+    Break a sentence longer than max_chars at the latest clause boundary
+    that fits, falling back to whitespace
+    """
+    pieces = []
+    while len(sentence) > max_chars:
+        cut = None
+        for pattern in CLAUSE_BREAKS:
+            ends = [m.end() for m in pattern.finditer(sentence, 0, max_chars) if m.start() > 0]
+            if ends:
+                cut = ends[-1]
+                break
+        if cut is None:
+            cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+        pieces.append(sentence[:cut].strip())
+        sentence = sentence[cut:].strip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def chunk_text(text, max_chars=240, first_chunk_chars=100):
+    """
+    Split text into synthesis chunks on sentence and clause boundaries.
+    Short sentences are packed together up to max_chars; the first chunk is
+    kept to first_chunk_chars so playback can start quickly.
+    """
+    pieces = []
+    for sentence in split_sentences(' '.join(text.split())):
+        pieces.extend(_split_long(sentence, max_chars))
+    if pieces and len(pieces[0]) > first_chunk_chars:
+        head = _split_long(pieces[0], first_chunk_chars)[0]
+        pieces[0:1] = [head, pieces[0][len(head):].strip()]
+
+    chunks = []
+    current = ''
+    for piece in pieces:
+        limit = max_chars if chunks else first_chunk_chars
+        if current and len(current) + 1 + len(piece) > limit:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def stream_chunks(chunks, render, executor, lookahead=4):
+    """
+    Render chunks on executor and yield (index, chunk, result) in order.
+    At most lookahead chunks are in flight, so the first chunk is never
+    queued behind the rest of the text and memory stays bounded.
+    """
+    pending = deque()
+    numbered = enumerate(chunks)
+    try:
+        for index, chunk in itertools.islice(numbered, max(1, lookahead)):
+            pending.append((index, chunk, executor.submit(render, index, chunk)))
+        while pending:
+            index, chunk, future = pending.popleft()
+            result = future.result()
+            following = next(numbered, None)
+            if following is not None:
+                pending.append((following[0], following[1], executor.submit(render, *following)))
+            yield index, chunk, result
+    finally:
+        for _, _, future in pending:
+            future.cancel()
@@ -0,0 +1,123 @@
+import os
+import random
+import tempfile
+
+from document_dedup import (DocumentAnalysisCache, LSHIndex, MinHasher, choose_bands,
+                            estimate_similarity, tokenize)
+
+WORDS = ("accused court section bail witness evidence police station magistrate order "
+         "complaint property theft recovery statement hearing counsel petition appeal judgment").split()
+
+
+def make_document(seed, paragraphs=20, words=60):
+    rng = random.Random(seed)
+    return "\n\n".join(" ".join(rng.choice(WORDS) + str(rng.randrange(50)) for _ in range(words))
+                       for _ in range(paragraphs))
+
+
+def jaccard(hasher, a, b):
+    shingles = []
+    for text in (a, b):
+        tokens = tokenize(text)
+        k = hasher.shingle_size
+        shingles.append({' '.join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)})
+    return len(shingles[0] & shingles[1]) / len(shingles[0] | shingles[1])
+
+
+def edit(text, paragraphs):
+    parts = text.split("\n\n")
+    for i in paragraphs:
+        parts[i] = make_document(1000 + i, paragraphs=1)
+    return "\n\n".join(parts)
+
+
+def test_signature_estimates_jaccard():
+    hasher = MinHasher(num_perm=256)
+    original = make_document(1)
+    for changed in ([0], [0, 1, 2], list(range(10))):
+        other = edit(original, changed)
+        estimate = estimate_similarity(hasher.signature(original), hasher.signature(other))
+        assert abs(estimate - jaccard(hasher, original, other)) < 0.1
+
+
+def candidate_probability(similarity, bands, rows):
+    return 1 - (1 - similarity ** rows) ** bands
+
+
+def test_bands_catch_documents_above_the_threshold():
+    for threshold in (0.5, 0.8, 0.9):
+        bands, rows = choose_bands(threshold, 128)
+        assert bands * rows == 128
+        assert (1.0 / bands) ** (1.0 / rows) <= threshold
+        assert candidate_probability(threshold, bands, rows) > 0.8
+        assert candidate_probability(min(1.0, threshold + 0.1), bands, rows) > 0.98
+
+
+def test_index_finds_near_duplicates_only():
+    hasher = MinHasher()
+    index = LSHIndex(threshold=0.8)
+    documents = {f"doc{i}": make_document(i) for i in range(50)}
+    for doc_id, text in documents.items():
+        index.insert(doc_id, hasher.signature(text))
+
+    near = edit(documents["doc7"], [3])  # one paragraph of twenty rewritten
+    matches = index.query(hasher.signature(near))
+    assert [doc_id for doc_id, _ in matches] == ["doc7"]
+    assert matches[0][1] >= 0.8
+
+    far = edit(documents["doc7"], range(12))
+    assert index.query(hasher.signature(far)) == []
+
+    index.remove("doc7")
+    assert index.query(hasher.signature(near)) == []
+
+
+def test_near_duplicate_reuses_unchanged_sections():
+    analyzed = []
+
+    def analyze_section(section):
+        analyzed.append(section)
+        return len(section)
+
+    cache = DocumentAnalysisCache(threshold=0.8)
+    original = make_document(1)
+    total, info = cache.analyze(original, analyze_section, sum)
+    assert info["duplicate_of"] is None and info["sections_analyzed"] == 20
+
+    near = edit(original, [3])
+    result, info = cache.analyze(near, analyze_section, sum)
+    assert info["sections_analyzed"] == 1 and info["duplicate_of"] is not None
+    assert result == sum(len(part) for part in near.split("\n\n"))
+
+    _, info = cache.analyze(near, analyze_section, sum)
+    assert info["similarity"] == 1.0 and info["sections_analyzed"] == 0
+    assert len(analyzed) == 21
+
+
+def test_saved_periodically_and_reloaded():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "dedup.pickle")
+        cache = DocumentAnalysisCache(path=path, save_every=3, save_interval=3600)
+        for i in range(2):
+            cache.analyze(make_document(i), len, sum)
+            cache.maybe_save()
+        assert not os.path.exists(path)
+        cache.analyze(make_document(2), len, sum)
+        cache.maybe_save()
+        assert len(DocumentAnalysisCache(path=path).documents) == 3
+
+        cache.analyze(make_document(3), len, sum)
+        cache.save()
+        reloaded = DocumentAnalysisCache(path=path)
+        _, info = reloaded.analyze(edit(make_document(3), [0]), len, sum)
+        assert info["sections_analyzed"] == 1
+        reloaded.save()  # while the directory still exists, rather than at exit
+
+
+if __name__ == "__main__":
+    test_signature_estimates_jaccard()
+    test_bands_catch_documents_above_the_threshold()
+    test_index_finds_near_duplicates_only()
+    test_near_duplicate_reuses_unchanged_sections()
+    test_saved_periodically_and_reloaded()
+    print("document dedup tests passed")
@@ -0,0 +1,67 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+from legal_entities import StreamingExtractor, evaluate, extract_entities
+
+GENERATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'generate_legal_corpus.py')
+
+
+def generated_corpus(directory, count=20, seed=11):
+    subprocess.run([sys.executable, GENERATOR, '--count', str(count), '--output', directory,
+                    '--formats', 'txt', '--seed', str(seed)], check=True, stdout=subprocess.DEVNULL)
+    manifest = os.path.join(directory, 'manifest.jsonl')
+    with open(manifest, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    texts = []
+    for entry in entries:
+        with open(os.path.join(directory, entry['files']['txt']), encoding='utf-8') as f:
+            texts.append(f.read())
+    return manifest, texts
+
+
+def stream(text, rng):
+    extractor = StreamingExtractor()
+    position = 0
+    while position < len(text):
+        # Pieces end anywhere: mid-word, mid-citation, mid-line
+        size = rng.randint(1, 400)
+        extractor(text[position:position + size])
+        position += size
+    return extractor.finish()
+
+
+def test_streaming_matches_one_shot():
+    rng = random.Random(4)
+    with tempfile.TemporaryDirectory() as directory:
+        _, texts = generated_corpus(directory)
+    for text in texts:
+        assert stream(text, rng) == extract_entities(text)
+
+
+def test_citations_in_any_case():
+    text = "Bail is sought under section 437 crpc. The officer relied on Sec. 302 IPC and Article 21."
+    provisions = [e for e in extract_entities(text) if e["type"] == "PROVISION"]
+    assert [e["text"] for e in provisions] == ["section 437 crpc", "Sec. 302 IPC", "Article 21"]
+    assert provisions[0]["value"] == {"sections": ["437"], "act": "CrPC"}
+    for entity in provisions:
+        assert text[entity["start"]:entity["end"]] == entity["text"]
+
+
+def test_generated_corpus_evaluation():
+    with tempfile.TemporaryDirectory() as directory:
+        manifest, _ = generated_corpus(directory)
+        report = evaluate(manifest)["per_type"]
+    for label in ("PROVISION", "COURT", "CASE_NUMBER", "DATE", "AMOUNT"):
+        assert report[label]["precision"] >= 0.95, (label, report[label])
+        assert report[label]["recall"] >= 0.95, (label, report[label])
+
+
+if __name__ == "__main__":
+    test_streaming_matches_one_shot()
+    test_citations_in_any_case()
+    test_generated_corpus_evaluation()
+    print("legal entity tests passed")
@@ -0,0 +1,395 @@
+"""
+Synthetic legal-document corpus generator for benchmarks.
+
+Writes FIRs, bail applications, sale agreements and seizure memos as plain
+text (and PDF when reportlab is installed), with parties, dates, amounts and
+section citations drawn from a seeded RNG, so the same seed always gives the
+same corpus. manifest.jsonl records every document with its ground-truth
+entities and their character offsets in the text.
+
+    python generate_legal_corpus.py --count 2000 --output corpus --seed 7
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.lib.utils import simpleSplit
+    from reportlab.pdfgen import canvas
+    HAS_REPORTLAB = True
+except ImportError:
+    HAS_REPORTLAB = False
+
+FIRST_NAMES = ["Rajesh", "Priya", "Arjun", "Meena", "Vikram", "Anjali", "Suresh", "Kavya", "Ramesh",
+               "Lakshmi", "Arun", "Deepa", "Karthik", "Sunita", "Mohan", "Farhan", "Gurpreet", "Ayesha",
+               "Joseph", "Nandini", "Prakash", "Shalini", "Imran", "Divya", "Harish", "Rekha"]
+LAST_NAMES = ["Kumar", "Sharma", "Rao", "Iyer", "Singh", "Patel", "Reddy", "Nair", "Gupta", "Khan",
+              "Das", "Menon", "Joshi", "Verma", "Pillai", "Mehta", "Chatterjee", "Fernandes", "Gowda"]
+PLACES = [("Bengaluru", "Karnataka", "5600"), ("Mumbai", "Maharashtra", "4000"), ("Chennai", "Tamil Nadu", "6000"),
+          ("Hyderabad", "Telangana", "5000"), ("Kolkata", "West Bengal", "7000"), ("Pune", "Maharashtra", "4110"),
+          ("Delhi", "Delhi", "1100"), ("Kochi", "Kerala", "6820"), ("Jaipur", "Rajasthan", "3020")]
+LOCALITIES = ["MG Road", "Indiranagar", "Park Street", "Andheri (West)", "T. Nagar", "Banjara Hills",
+              "Koramangala", "Salt Lake", "Civil Lines", "Jayanagar", "Whitefield", "Marine Drive"]
+OFFENCES = [("Section 379", "IPC", "theft"), ("Section 380", "IPC", "theft in a dwelling house"),
+            ("Section 381", "IPC", "theft by clerk or servant in possession of property of master"),
+            ("Section 406", "IPC", "criminal breach of trust"), ("Section 420", "IPC", "cheating"),
+            ("Section 323", "IPC", "voluntarily causing hurt"), ("Section 506", "IPC", "criminal intimidation"),
+            ("Section 303", "BNS", "theft"), ("Section 316", "BNS", "criminal breach of trust"),
+            ("Section 318", "BNS", "cheating")]
+BAIL_PROVISIONS = [("Section 437", "CrPC"), ("Section 439", "CrPC"), ("Section 438", "CrPC"),
+                   ("Section 480", "BNSS"), ("Section 483", "BNSS")]
+PROPERTY_ITEMS = ["laptop", "mobile phone", "gold chain", "two-wheeler", "cash box", "wrist watch",
+                  "laptop charger", "camera", "set of tools", "bicycle"]
+GROUNDS = [
+    "the applicant has no prior criminal antecedents and is a permanent resident of {city}",
+    "the investigation is substantially complete and the applicant is no longer required for custodial interrogation",
+    "the applicant is the sole earning member of the family and has dependents including aged parents",
+    "the alleged offence is punishable with imprisonment of less than seven years",
+    "the applicant undertakes to abide by any condition imposed by this Hon'ble Court",
+    "the recovery, if any, has already been effected and there is no likelihood of tampering with evidence",
+    "the applicant has been in judicial custody since {date} and the trial is not likely to conclude soon",
+    "co-accused persons similarly placed have already been enlarged on bail",
+]
+
+LINE_CHARS = 90
+LINES_PER_PAGE = 52
+DOCUMENT_TYPES = ("fir", "bail_application", "sale_agreement", "seizure_memo")
+
+
+def indian_amount(value):
+    """Format rupees with Indian digit grouping, e.g. 50,00,000"""
+    digits = str(value)
+    if len(digits) <= 3:
+        return digits
+    head, tail = digits[:-3], digits[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    return ",".join(groups) + "," + tail
+
+
+class DocumentBuilder:
+    """Accumulates text while recording entity spans as they are written"""
+
+    def __init__(self):
+        self.parts = []
+        self.length = 0
+        self.entities = []
+
+    def write(self, *segments):
+        for segment in segments:
+            if isinstance(segment, tuple):
+                label, value = segment
+                self.entities.append({"type": label, "text": value,
+                                      "start": self.length, "end": self.length + len(value)})
+                segment = value
+            self.parts.append(segment)
+            self.length += len(segment)
+
+    def line(self, *segments):
+        self.write(*segments)
+        self.write("\n")
+
+    def text(self):
+        return "".join(self.parts)
+
+
+class Generator:
+    """Random but reproducible document content for one document index"""
+
+    def __init__(self, seed, index):
+        self.rng = random.Random(f"{seed}:{index}")
+
+    def person(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def place(self):
+        city, state, pin = self.rng.choice(PLACES)
+        return city, state, f"{pin}{self.rng.randint(1, 99):02d}"
+
+    def address(self):
+        city, state, pin = self.place()
+        return f"{self.rng.randint(1, 999)}, {self.rng.choice(LOCALITIES)}, {city}, {state} - {pin}"
+
+    def date(self, start=date(2023, 1, 1), days=900):
+        return start + timedelta(days=self.rng.randint(0, days))
+
+    def amount(self, low, high):
+        return self.rng.randrange(low, high, 500)
+
+    def pages(self, median, max_pages):
+        # Lognormal: most documents are short, a long tail runs to max_pages
+        return max(1, min(max_pages, int(round(self.rng.lognormvariate(math.log(median), 1.2)))))
+
+
+def fmt_date(d):
+    return d.strftime("%d/%m/%Y")
+
+
+def long_date(d):
+    return d.strftime("%d %B %Y")
+
+
+def build_fir(g, b, target_chars):
+    city, state, _ = g.place()
+    station = f"{g.rng.choice(LOCALITIES)} Police Station"
+    number = f"FIR No. {g.rng.randint(1, 999)}/{g.rng.randint(2023, 2025)}"
+    complainant, accused = g.person(), g.person()
+    offence = g.rng.choice(OFFENCES)
+    when = g.date()
+    b.line("FIRST INFORMATION REPORT")
+    b.line("(Under ", ("PROVISION", "Section 154 Cr.P.C."), ")")
+    b.line()
+    b.line(("CASE_NUMBER", number))
+    b.line("Police Station: ", ("POLICE_STATION", station), f", {city}, {state}")
+    b.line("Date of report: ", ("DATE", fmt_date(when + timedelta(days=1))))
+    b.line("Act and Sections: ", ("PROVISION", f"{offence[0]} {offence[1]}"), f" ({offence[2]})")
+    b.line("Complainant: ", ("PERSON", complainant), f", residing at {g.address()}")
+    b.line("Accused: ", ("PERSON", accused), f", residing at {g.address()}")
+    b.line()
+    b.line("STATEMENT OF THE COMPLAINANT")
+    item = g.rng.choice(PROPERTY_ITEMS)
+    value = g.amount(2000, 300000)
+    b.line(f"The complainant states that on ", ("DATE", long_date(when)),
+           f" at about {g.rng.randint(1, 12)}:{g.rng.randint(0, 59):02d} hours, a {item} worth Rs. ",
+           ("AMOUNT", indian_amount(value)), " was found missing and the complainant suspects ",
+           ("PERSON", accused), ", who was present at the premises at the relevant time.")
+    b.line()
+    n = 1
+    while b.length < target_chars:
+        witness = g.person()
+        b.line(f"{n}. Further statement recorded on ", ("DATE", fmt_date(g.date(when, 60))), ": ",
+               ("PERSON", witness), f" states that the {g.rng.choice(PROPERTY_ITEMS)} was last seen near the "
+               f"{g.rng.choice(['storage room', 'front office', 'parking area', 'reception'])} and that entries in the "
+               f"register were made by {g.rng.choice(['the accused', 'the supervisor', 'security staff'])}.")
+        n += 1
+    b.line()
+    b.line("Signature of the officer in charge: ", ("PERSON", g.person()))
+
+
+def build_bail_application(g, b, target_chars):
+    city, state, _ = g.place()
+    applicant = g.person()
+    provision = g.rng.choice(BAIL_PROVISIONS)
+    offence = g.rng.choice(OFFENCES)
+    custody = g.date()
+    court = g.rng.choice(['CHIEF JUDICIAL MAGISTRATE', 'SESSIONS JUDGE', 'METROPOLITAN MAGISTRATE'])
+    b.line("IN THE COURT OF THE ", ("COURT", court), f", {city.upper()}")
+    b.line(("CASE_NUMBER", f"Crl. Misc. No. {g.rng.randint(100, 9999)}/{custody.year}"))
+    b.line()
+    b.line(("PERSON", applicant), " ... Applicant")
+    b.line("Vs.")
+    b.line(f"STATE OF {state.upper()} ... Respondent")
+    b.line()
+    b.line("APPLICATION FOR BAIL UNDER ", ("PROVISION", f"{provision[0]} {provision[1]}"))
+    b.line()
+    b.line("The applicant respectfully submits as follows:")
+    b.line("1. That the applicant has been arrested in connection with a case registered under ",
+           ("PROVISION", f"{offence[0]} {offence[1]}"), " and has been in custody since ",
+           ("DATE", long_date(custody)), ".")
+    n = 2
+    while b.length < target_chars:
+        ground = g.rng.choice(GROUNDS)
+        if "{date}" in ground:
+            head, tail = ground.split("{date}")
+            b.line(f"{n}. That ", head.format(city=city), ("DATE", fmt_date(custody)), tail.format(city=city), ".")
+        else:
+            b.line(f"{n}. That {ground.format(city=city)}.")
+        n += 1
+        if g.rng.random() < 0.15:
+            surety = g.amount(10000, 200000)
+            b.line(f"{n}. That the applicant is ready to furnish surety of Rs. ", ("AMOUNT", indian_amount(surety)),
+                   " through ", ("PERSON", g.person()), ".")
+            n += 1
+    b.line()
+    b.line("PRAYER")
+    b.line("It is therefore respectfully prayed that this Hon'ble Court may be pleased to enlarge the applicant on bail.")
+    b.line("Place: ", city)
+    b.line("Date: ", ("DATE", fmt_date(custody + timedelta(days=g.rng.randint(1, 30)))))
+    b.line("Counsel for the Applicant: Adv. ", ("PERSON", g.person()))
+
+
+def build_sale_agreement(g, b, target_chars):
+    vendor, purchaser = g.person(), g.person()
+    signed = g.date()
+    price = g.amount(500000, 50000000)
+    advance = price // 5 // 500 * 500
+    b.line("AGREEMENT FOR SALE")
+    b.line()
+    b.line("This Agreement for Sale is made on ", ("DATE", long_date(signed)))
+    b.line("BETWEEN")
+    b.line(("PERSON", vendor), f", residing at {g.address()} (the \"Vendor\")")
+    b.line("AND")
+    b.line(("PERSON", purchaser), f", residing at {g.address()} (the \"Purchaser\")")
+    b.line()
+    b.line("1. The Vendor shall sell and the Purchaser shall purchase the property described in the Schedule for a "
+           "total consideration of Rs. ", ("AMOUNT", indian_amount(price)), ".")
+    b.line("2. The Purchaser has paid Rs. ", ("AMOUNT", indian_amount(advance)), " as earnest money on ",
+           ("DATE", fmt_date(signed)), ".")
+    b.line("3. This Agreement is subject to ", ("PROVISION", "Section 54 of the Transfer of Property Act, 1882"),
+           " and stamp duty under the applicable ", ("ACT", "Stamp Act"), ".")
+    n = 4
+    while b.length < target_chars:
+        kind = g.rng.random()
+        if kind < 0.4:
+            b.line(f"{n}. Instalment of Rs. ", ("AMOUNT", indian_amount(g.amount(10000, 2000000))),
+                   " shall be paid on or before ", ("DATE", fmt_date(g.date(signed, 365))), ".")
+        elif kind < 0.7:
+            b.line(f"{n}. The Vendor warrants that the property is free from all encumbrances, charges, liens and "
+                   f"attachments, and shall indemnify the Purchaser against any claim arising before completion.")
+        else:
+            b.line(f"{n}. Schedule item: {g.rng.choice(['Flat', 'Plot', 'Shop', 'Villa'])} No. {g.rng.randint(1, 999)}, "
+                   f"{g.address()}, measuring {g.rng.randint(400, 5000)} sq. ft.")
+        n += 1
+    b.line()
+    b.line("SIGNED by the Vendor: ", ("PERSON", vendor))
+    b.line("SIGNED by the Purchaser: ", ("PERSON", purchaser))
+    b.line("WITNESSES: ", ("PERSON", g.person()), ", ", ("PERSON", g.person()))
+
+
+def build_seizure_memo(g, b, target_chars):
+    city, state, _ = g.place()
+    station = f"{g.rng.choice(LOCALITIES)} Police Station"
+    seized = g.date()
+    offence = g.rng.choice(OFFENCES)
+    b.line("SEIZURE MEMO")
+    b.line("(Under ", ("PROVISION", "Section 102 Cr.P.C."), ")")
+    b.line()
+    b.line("In ", ("CASE_NUMBER", f"FIR No. {g.rng.randint(1, 999)}/{seized.year}"), " of ",
+           ("POLICE_STATION", station), f", {city}, under ", ("PROVISION", f"{offence[0]} {offence[1]}"))
+    b.line("Date and place of seizure: ", ("DATE", fmt_date(seized)), f", {g.address()}")
+    b.line("Seized from: ", ("PERSON", g.person()))
+    b.line()
+    b.line("Description of articles seized:")
+    n = 1
+    total = 0
+    while b.length < target_chars:
+        value = g.amount(500, 150000)
+        total += value
+        b.line(f"{n}. One {g.rng.choice(PROPERTY_ITEMS)}, serial/identification no. "
+               f"{g.rng.choice('ABCDEFGHJK')}{g.rng.randint(100000, 999999)}, approximate value Rs. ",
+               ("AMOUNT", indian_amount(value)), ", sealed with seal impression marked ", f"'{g.rng.choice('PQRSTUV')}'.")
+        n += 1
+    b.line()
+    b.line("Total approximate value: Rs. ", ("AMOUNT", indian_amount(total)))
+    b.line("Witnesses: ", ("PERSON", g.person()), " and ", ("PERSON", g.person()))
+    b.line("Seizing officer: ", ("PERSON", g.person()))
+
+
+BUILDERS = {
+    "fir": build_fir,
+    "bail_application": build_bail_application,
+    "sale_agreement": build_sale_agreement,
+    "seizure_memo": build_seizure_memo,
+}
+
+
+def write_pdf(path, text):
+    pdf = canvas.Canvas(path, pagesize=A4)
+    width, height = A4
+    margin = 0.8 * inch
+    y = height - margin
+    pdf.setFont("Helvetica", 10)
+    for paragraph in text.split("\n"):
+        for line in simpleSplit(paragraph, "Helvetica", 10, width - 2 * margin) or [""]:
+            if y < margin:
+                pdf.showPage()
+                pdf.setFont("Helvetica", 10)
+                y = height - margin
+            pdf.drawString(margin, y, line)
+            y -= 13
+    pdf.save()
+
+
+def generate_document(job):
+    """Build and write one document; returns its manifest entry"""
+    index, seed, output_dir, doc_types, median_pages, max_pages, formats = job
+    g = Generator(seed, index)
+    doc_type = g.rng.choice(doc_types)
+    pages = g.pages(median_pages, max_pages)
+    builder = DocumentBuilder()
+    BUILDERS[doc_type](g, builder, pages * LINES_PER_PAGE * LINE_CHARS * 0.8)
+    text = builder.text()
+
+    doc_id = f"{doc_type}_{index:06d}"
+    subdir = os.path.join(output_dir, f"{index // 1000:03d}")
+    os.makedirs(subdir, exist_ok=True)
+    files = {}
+    if "txt" in formats:
+        files["txt"] = os.path.relpath(os.path.join(subdir, doc_id + ".txt"), output_dir)
+        with open(os.path.join(output_dir, files["txt"]), "w", encoding="utf-8") as f:
+            f.write(text)
+    if "pdf" in formats and HAS_REPORTLAB:
+        files["pdf"] = os.path.relpath(os.path.join(subdir, doc_id + ".pdf"), output_dir)
+        write_pdf(os.path.join(output_dir, files["pdf"]), text)
+
+    return {
+        "id": doc_id,
+        "index": index,
+        "type": doc_type,
+        "target_pages": pages,
+        "characters": len(text),
+        "files": files,
+        "entities": builder.entities,
+    }
+
+
+def generate_corpus(output_dir, count, seed=42, doc_types=DOCUMENT_TYPES, median_pages=3, max_pages=400,
+                    formats=("txt", "pdf"), workers=None):
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(i, seed, output_dir, tuple(doc_types), median_pages, max_pages, tuple(formats)) for i in range(count)]
+    start = time.perf_counter()
+    stats = {"documents": 0, "characters": 0, "entities": 0, "by_type": {}}
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(os.path.join(output_dir, "manifest.jsonl"), "w", encoding="utf-8") as manifest:
+        # map() keeps manifest order equal to index order regardless of which worker finishes first
+        for entry in pool.map(generate_document, jobs, chunksize=max(1, count // 256)):
+            manifest.write(json.dumps(entry) + "\n")
+            stats["documents"] += 1
+            stats["characters"] += entry["characters"]
+            stats["entities"] += len(entry["entities"])
+            stats["by_type"][entry["type"]] = stats["by_type"].get(entry["type"], 0) + 1
+    stats["seconds"] = time.perf_counter() - start
+    stats["pdf"] = HAS_REPORTLAB and "pdf" in formats
+    with open(os.path.join(output_dir, "corpus.json"), "w", encoding="utf-8") as f:
+        json.dump(dict(stats, seed=seed, median_pages=median_pages, max_pages=max_pages,
+                       types=list(doc_types)), f, indent=2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic legal-document corpus")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--output", default="corpus")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--types", default=",".join(DOCUMENT_TYPES))
+    parser.add_argument("--median-pages", type=float, default=3)
+    parser.add_argument("--max-pages", type=int, default=400)
+    parser.add_argument("--formats", default="txt,pdf")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    unknown = set(args.types.split(",")) - set(BUILDERS)
+    if unknown:
+        parser.error(f"unknown document types: {', '.join(sorted(unknown))}")
+    formats = args.formats.split(",")
+    if "pdf" in formats and not HAS_REPORTLAB:
+        print("reportlab not installed; writing text only")
+    stats = generate_corpus(args.output, args.count, args.seed, args.types.split(","), args.median_pages,
+                            args.max_pages, formats, args.workers)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
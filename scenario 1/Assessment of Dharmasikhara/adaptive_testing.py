@@ -0,0 +1,228 @@
+"""
+Dharmasikhara Adaptive Testing
+IRT-based (2PL/3PL) item calibration and maximum-information question selection
+"""
+
+import json
+import math
+from dataclasses import dataclass, asdict
+from statistics import NormalDist
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from assessment_framework import Assessment, PerformanceTier, Question, ScoringEngine, Section
+
+# Scaling constant that makes the logistic curve approximate the normal ogive
+D = 1.702
+
+THETA_MIN = -4.0
+THETA_MAX = 4.0
+THETA_STEP = 0.05
+
+
+@dataclass
+class ItemParameters:
+    question_id: str
+    discrimination: float = 1.0  # a
+    difficulty: float = 0.0      # b
+    guessing: float = 0.0        # c
+    responses: int = 0           # sample size the parameters were calibrated on
+
+
+def is_correct(question: Question, response: Any) -> bool:
+    """Dichotomise a response: at least half the available points counts as correct"""
+    points = ScoringEngine.score_question(question, response)
+    return question.score > 0 and points >= question.score / 2
+
+
+def calibrate_items(questions: Iterable[Question], past_responses: Iterable[Dict[str, Any]],
+                    min_responses: int = 30) -> List[ItemParameters]:
+    """Estimate item parameters from past candidates' responses.
+
+    Uses the classical-test-theory approximations (Lord, 1980): difficulty
+    from the proportion correct and discrimination from the biserial
+    correlation with the rest-of-test score. Items answered fewer than
+    ``min_responses`` times keep default parameters.
+    """
+    questions = list(questions)
+    index = {q.id: i for i, q in enumerate(questions)}
+    rows = []
+    for responses in past_responses:
+        row = np.full(len(questions), np.nan)
+        for question_id, response in responses.items():
+            i = index.get(question_id)
+            if i is not None:
+                row[i] = 1.0 if is_correct(questions[i], response) else 0.0
+        rows.append(row)
+    matrix = np.array(rows) if rows else np.zeros((0, len(questions)))
+
+    normal = NormalDist()
+    params = []
+    for i, question in enumerate(questions):
+        item = ItemParameters(question.id)
+        answered = ~np.isnan(matrix[:, i]) if len(matrix) else np.zeros(0, dtype=bool)
+        item.responses = int(answered.sum())
+        if item.responses >= min_responses:
+            x = matrix[answered, i]
+            rest = np.nansum(np.delete(matrix[answered], i, axis=1), axis=1)
+            p = float(np.clip(x.mean(), 0.01, 0.99))
+            if rest.std() > 0 and x.std() > 0:
+                r_pbis = float(np.corrcoef(x, rest)[0, 1])
+                # Convert point-biserial to biserial correlation
+                y = math.exp(-normal.inv_cdf(p) ** 2 / 2) / math.sqrt(2 * math.pi)
+                r_bis = float(np.clip(r_pbis * math.sqrt(p * (1 - p)) / y, 0.05, 0.95))
+                item.discrimination = r_bis / math.sqrt(1 - r_bis ** 2)
+                item.difficulty = float(np.clip(normal.inv_cdf(1 - p) / r_bis, THETA_MIN, THETA_MAX))
+            else:
+                item.difficulty = float(np.clip(normal.inv_cdf(1 - p), THETA_MIN, THETA_MAX))
+        params.append(item)
+    return params
+
+
+class ItemBank:
+    """Calibrated questions with precomputed probability and information tables.
+
+    Everything that depends only on the item parameters is tabulated once
+    over a fixed ability grid, so selecting the next item is a lookup in a
+    pre-sorted list and updating the ability estimate is one vector add.
+    """
+
+    def __init__(self, questions: Iterable[Question], parameters: Iterable[ItemParameters]):
+        by_id = {p.question_id: p for p in parameters}
+        self.questions = [q for q in questions if q.id in by_id]
+        self.parameters = [by_id[q.id] for q in self.questions]
+        self.index = {q.id: i for i, q in enumerate(self.questions)}
+
+        self.theta = np.arange(THETA_MIN, THETA_MAX + THETA_STEP / 2, THETA_STEP)
+        a = np.array([p.discrimination for p in self.parameters])[:, None]
+        b = np.array([p.difficulty for p in self.parameters])[:, None]
+        c = np.array([p.guessing for p in self.parameters])[:, None]
+
+        logistic = 1.0 / (1.0 + np.exp(-D * a * (self.theta[None, :] - b)))
+        prob = c + (1 - c) * logistic
+        prob = np.clip(prob, 1e-9, 1 - 1e-9)
+        self.prob = prob
+        self.log_p = np.log(prob)
+        self.log_q = np.log(1 - prob)
+        # Fisher information for the 3PL model
+        self.information = (D * a) ** 2 * ((prob - c) / (1 - c)) ** 2 * (1 - prob) / prob
+        # For every grid point, item indexes ordered by information (best first)
+        self.ranking = np.argsort(-self.information, axis=0).T.copy()
+        # Standard normal prior on ability, up to a constant
+        self.log_prior = -0.5 * self.theta ** 2
+
+    def grid_index(self, theta: float) -> int:
+        i = int(round((theta - THETA_MIN) / THETA_STEP))
+        return min(max(i, 0), len(self.theta) - 1)
+
+    def expected_percentage(self, theta: float, item_ids: Optional[Iterable[str]] = None) -> float:
+        """Expected percentage of points at ``theta`` (test characteristic curve)"""
+        g = self.grid_index(theta)
+        rows = (range(len(self.questions)) if item_ids is None
+                else [self.index[i] for i in item_ids if i in self.index])
+        weights = [self.questions[i].score for i in rows]
+        if not weights or sum(weights) == 0:
+            return 0.0
+        earned = sum(self.prob[i, g] * w for i, w in zip(rows, weights))
+        return 100.0 * earned / sum(weights)
+
+    def save(self, filepath: str):
+        with open(filepath, 'w') as f:
+            json.dump({"items": [asdict(p) for p in self.parameters]}, f, indent=2)
+
+    @classmethod
+    def load(cls, questions: Iterable[Question], filepath: str) -> "ItemBank":
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+        return cls(questions, [ItemParameters(**item) for item in data["items"]])
+
+
+class AdaptiveSession:
+    """Runs one candidate through a computer-adaptive test.
+
+    The ability posterior is kept on the bank's grid (standard normal
+    prior); the estimate is its mean (EAP) and the standard error its
+    standard deviation. The test stops once the standard error falls below
+    ``se_threshold`` (after ``min_items``), at ``max_items``, or when the
+    pool is exhausted.
+    """
+
+    def __init__(self, bank: ItemBank, se_threshold: float = 0.3,
+                 min_items: int = 5, max_items: Optional[int] = None):
+        self.bank = bank
+        self.se_threshold = se_threshold
+        self.min_items = min_items
+        self.max_items = max_items or len(bank.questions)
+        self.log_posterior = bank.log_prior.copy()
+        self.administered: List[str] = []
+        self._used = np.zeros(len(bank.questions), dtype=bool)
+        self.theta = 0.0
+        self.standard_error = 1.0
+        self._pending: Optional[int] = None
+
+    def _update_estimate(self):
+        weights = np.exp(self.log_posterior - self.log_posterior.max())
+        weights /= weights.sum()
+        self.theta = float((weights * self.bank.theta).sum())
+        self.standard_error = float(math.sqrt((weights * (self.bank.theta - self.theta) ** 2).sum()))
+
+    def is_finished(self) -> bool:
+        count = len(self.administered)
+        if count >= self.max_items or count >= len(self.bank.questions):
+            return True
+        return count >= self.min_items and self.standard_error < self.se_threshold
+
+    def next_question(self) -> Optional[Question]:
+        """Most informative unused question at the current ability estimate"""
+        if self._pending is not None:
+            return self.bank.questions[self._pending]
+        if self.is_finished():
+            return None
+        for i in self.bank.ranking[self.bank.grid_index(self.theta)]:
+            if not self._used[i]:
+                self._pending = int(i)
+                return self.bank.questions[i]
+        return None
+
+    def record_response(self, question_id: str, response: Any) -> bool:
+        """Update the ability estimate; returns False for unknown or repeated items"""
+        i = self.bank.index.get(question_id)
+        if i is None or self._used[i]:
+            return False
+        self._used[i] = True
+        self._pending = None
+        self.administered.append(question_id)
+        correct = is_correct(self.bank.questions[i], response)
+        self.log_posterior += self.bank.log_p[i] if correct else self.bank.log_q[i]
+        self._update_estimate()
+        return True
+
+    def section_scores(self, sections: Iterable[Section]) -> Tuple[Dict[str, float], float]:
+        """Expected percentage on each full section at the estimated ability,
+        and their total weighted by section weightage as in fixed-form scoring
+        """
+        scores = {}
+        total_weighted_score = 0
+        for section in sections:
+            scores[section.id] = self.bank.expected_percentage(
+                self.theta, [q.id for q in section.questions])
+            total_weighted_score += scores[section.id] * (section.weightage / 100)
+        return scores, total_weighted_score
+
+    def performance_tier(self, assessment: Assessment) -> PerformanceTier:
+        """The tier apply_scores would give the assessment now"""
+        _, total = self.section_scores(assessment.sections)
+        return ScoringEngine.determine_performance_tier(total)
+
+    def apply_scores(self, assessment: Assessment):
+        """Fill section scores, total and tier from the ability estimate.
+
+        Scores are the expected percentages on each full section at the
+        estimated ability, so they stay comparable with fixed-form results.
+        """
+        scores, total = self.section_scores(assessment.sections)
+        assessment.scores.update(scores)
+        assessment.total_score = total
+        assessment.tier = ScoringEngine.determine_performance_tier(total)
+        assessment.provisional = ScoringEngine.awaiting_review(assessment)
@@ -5,9 +5,10 @@ Post-Scenario Legal Competency Evaluation Framework
 
 import json
 import time
+import uuid
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from dataclasses import dataclass, field
 
 class QuestionType(Enum):
@@ -25,6 +26,12 @@ class PerformanceTier(Enum):
     DEVELOPING_ADVOCATE = "C"
     NEEDS_IMPROVEMENT = "F"
 
+@dataclass
+class RubricCriterion:
+    id: str
+    description: str
+    points: float
+
 @dataclass
 class Question:
     id: str
@@ -35,6 +42,8 @@ class Question:
     score: int = 0
     time_limit: int = 0  # in minutes
     competency_tags: List[str] = field(default_factory=list)
+    reference_answers: List[str] = field(default_factory=list)  # model answers for rubric scoring
+    rubric: List[RubricCriterion] = field(default_factory=list)
 
 @dataclass
 class Section:
@@ -58,6 +67,9 @@ class Assessment:
     scores: Dict[str, float] = field(default_factory=dict)
     total_score: float = 0.0
     tier: Optional[PerformanceTier] = None
+    candidate_id: Optional[str] = None
+    cohort: Optional[str] = None  # e.g. institution or batch, for percentile standings
+    provisional: bool = False  # scored while rubric answers await human review
 
 class AssessmentTrigger:
     def __init__(self):
@@ -78,46 +90,49 @@ class AssessmentTrigger:
         return self.secondary_activated
 
 class CooldownManager:
-    def __init__(self, cooldown_period: int = 120):  # 2 minutes default
+    def __init__(self, cooldown_period: int = 120,  # 2 minutes default
+                 clock: Callable[[], datetime] = datetime.now):
         self.cooldown_period = cooldown_period
+        self.clock = clock
         self.start_time = None
     
     def start_cooldown(self):
-        self.start_time = datetime.now()
+        self.start_time = self.clock()
     
     def is_active(self) -> bool:
         if not self.start_time:
             return False
-        elapsed = datetime.now() - self.start_time
+        elapsed = self.clock() - self.start_time
         return elapsed.total_seconds() < self.cooldown_period
     
     def get_remaining_time(self) -> int:
         if not self.start_time:
             return 0
-        elapsed = datetime.now() - self.start_time
+        elapsed = self.clock() - self.start_time
         remaining = self.cooldown_period - elapsed.total_seconds()
         return max(0, int(remaining))
 
 class AssessmentTimer:
-    def __init__(self, time_limit: int):
+    def __init__(self, time_limit: int, clock: Callable[[], datetime] = datetime.now):
         self.time_limit = time_limit * 60  # convert to seconds
+        self.clock = clock
         self.start_time = None
         self.end_time = None
         self.is_running = False
     
     def start(self):
-        self.start_time = datetime.now()
+        self.start_time = self.clock()
         self.is_running = True
     
     def stop(self):
-        self.end_time = datetime.now()
+        self.end_time = self.clock()
         self.is_running = False
     
     def get_elapsed_time(self) -> int:
         if not self.start_time:
             return 0
         if self.is_running:
-            elapsed = datetime.now() - self.start_time
+            elapsed = self.clock() - self.start_time
         else:
             elapsed = self.end_time - self.start_time
         return int(elapsed.total_seconds())
@@ -137,13 +152,17 @@ class ScoringEngine:
         
         for question in section.questions:
             total_points += question.score
-            response = responses.get(question.id)
-            
-            if response is not None:
-                earned_points += ScoringEngine._score_question(question, response)
+            earned_points += ScoringEngine.score_question(question, responses.get(question.id))
         
         return (earned_points / total_points) * 100 if total_points > 0 else 0
     
+    @staticmethod
+    def score_question(question: Question, response: Any) -> float:
+        """Points a response earns on one question; no response earns none"""
+        if response is None:
+            return 0
+        return ScoringEngine._score_question(question, response)
+    
     @staticmethod
     def _score_question(question: Question, response: Any) -> int:
         if question.type == QuestionType.SINGLE_SELECT_MCQ:
@@ -155,8 +174,7 @@ class ScoringEngine:
                 return question.score
         elif question.type == QuestionType.CASE_BASED_REASONING:
             # Rubric-based scoring (0-4 points per question)
-            # Assuming response is a score between 0-4
-            return min(4, max(0, response))
+            return min(4, max(0, ScoringEngine._rubric_points(response)))
         elif question.type == QuestionType.SITUATIONAL_JUDGMENT:
             # Scoring based on appropriateness ranking
             # Best answer (3 pts), Acceptable (2 pts), Poor (1 pt), Unethical (0 pts)
@@ -164,15 +182,55 @@ class ScoringEngine:
             return scoring_map.get(response, 0)
         elif question.type == QuestionType.ARGUMENT_DECONSTRUCTION:
             # AI-assisted rubric scoring
-            # Assuming response is a score based on rubric
-            return min(question.score, max(0, response))
+            return min(question.score, max(0, ScoringEngine._rubric_points(response)))
         elif question.type == QuestionType.OPEN_ENDED_JUSTIFICATION:
             # AI + Peer/Expert review scoring
-            # Assuming response is a score based on holistic rubric
-            return min(question.score, max(0, response))
+            return min(question.score, max(0, ScoringEngine._rubric_points(response)))
         
         return 0
     
+    @staticmethod
+    def _rubric_points(response: Any) -> float:
+        """Points for a rubric-scored response.
+
+        Accepts a numeric score from a grader, or a graded result from the
+        rubric scoring stage (anything exposing ``suggested_score``). Raw
+        text that has not been graded yet, and a result still waiting for
+        human review, earn nothing.
+        """
+        if getattr(response, "needs_review", False):
+            return 0
+        if hasattr(response, "suggested_score"):
+            return response.suggested_score
+        if isinstance(response, (int, float)):
+            return response
+        return 0
+    
+    @staticmethod
+    def awaiting_review(assessment: Assessment) -> bool:
+        """Whether any rubric-graded response is still waiting for human review"""
+        return any(getattr(response, "needs_review", False)
+                   for response in assessment.user_responses.values())
+    
+    @staticmethod
+    def score_assessment(assessment: Assessment):
+        """Calculate section scores, weighted total and tier in place.
+
+        Safe to call again after rubric grading replaces free-text responses.
+        Responses awaiting review score nothing and leave the assessment
+        provisional until they are resolved and it is scored again.
+        """
+        total_weighted_score = 0
+        for section in assessment.sections:
+            section_score = ScoringEngine.calculate_section_score(
+                section, assessment.user_responses)
+            assessment.scores[section.id] = section_score
+            total_weighted_score += section_score * (section.weightage / 100)
+        
+        assessment.total_score = total_weighted_score
+        assessment.tier = ScoringEngine.determine_performance_tier(total_weighted_score)
+        assessment.provisional = ScoringEngine.awaiting_review(assessment)
+    
     @staticmethod
     def determine_performance_tier(percentage: float) -> PerformanceTier:
         if percentage >= 90:
@@ -187,12 +245,18 @@ class ScoringEngine:
             return PerformanceTier.NEEDS_IMPROVEMENT
 
 class AssessmentFramework:
-    def __init__(self):
+    def __init__(self, response_log=None, leaderboard=None,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.clock = clock  # injectable so simulations can run on virtual time
         self.trigger = AssessmentTrigger()
-        self.cooldown = CooldownManager()
+        self.cooldown = CooldownManager(clock=clock)
         self.current_assessment: Optional[Assessment] = None
         self.timer: Optional[AssessmentTimer] = None
         self.scoring_engine = ScoringEngine()
+        self.adaptive_session = None  # adaptive_testing.AdaptiveSession when running adaptively
+        self.response_log = response_log  # response_log.ResponseLog for crash recovery
+        self.session_id: Optional[str] = None
+        self.leaderboard = leaderboard  # leaderboard.LeaderboardService for rank/percentile
     
     def activate_assessment(self, scenario_completed: bool = False, 
                           scenario_progress: float = 0.0) -> bool:
@@ -213,20 +277,64 @@ class AssessmentFramework:
         """Get remaining cooldown time in seconds"""
         return self.cooldown.get_remaining_time()
     
-    def start_assessment(self, assessment: Assessment) -> bool:
-        """Start the assessment if cooldown is finished"""
+    def start_assessment(self, assessment: Assessment, adaptive_session=None) -> bool:
+        """Start the assessment if cooldown is finished
+        
+        Pass an adaptive_testing.AdaptiveSession to run in adaptive mode, where
+        questions are served one at a time through next_question().
+        """
         if self.is_cooldown_active():
             return False
         
         self.current_assessment = assessment
-        self.timer = AssessmentTimer(assessment.total_time_limit)
+        self.adaptive_session = adaptive_session
+        self.timer = AssessmentTimer(assessment.total_time_limit, self.clock)
         self.timer.start()
+        self.session_id = uuid.uuid4().hex
+        if self.response_log:
+            # Start time by this framework's clock, so a resumed timer uses the same clock
+            self.response_log.start_session(self.session_id, assessment.id, assessment.candidate_id,
+                                            started_at=self.timer.start_time.timestamp())
         return True
     
+    def resume_assessment(self, assessment: Assessment, state, adaptive_session=None) -> bool:
+        """Resume a session replayed from the response log after a restart
+        
+        The timer keeps counting from the original start time and the
+        responses recorded before the crash are restored. An adaptive
+        session is resumed by passing a new AdaptiveSession on the same item
+        bank; the logged responses are replayed into it in the order they
+        were given, which rebuilds its ability estimate.
+        """
+        self.current_assessment = assessment
+        self.adaptive_session = adaptive_session
+        self.session_id = state.session_id
+        self.timer = AssessmentTimer(assessment.total_time_limit, self.clock)
+        self.timer.start()
+        # started_at was logged from self.clock (see start_assessment); keep
+        # the clock's timezone so elapsed time is computed on the same clock
+        self.timer.start_time = datetime.fromtimestamp(state.started_at, self.timer.start_time.tzinfo)
+        assessment.user_responses.update(state.responses)
+        if self.adaptive_session:
+            for question_id, response in state.responses.items():
+                self.adaptive_session.record_response(question_id, response)
+        return True
+    
+    def next_question(self) -> Optional[Question]:
+        """Next question to present in adaptive mode, or None when the test is done"""
+        if not self.adaptive_session:
+            return None
+        return self.adaptive_session.next_question()
+    
     def submit_response(self, question_id: str, response: Any):
         """Submit user response for a question"""
         if self.current_assessment:
+            if self.response_log:
+                # Durable before it is acknowledged; fsyncs are shared across sessions
+                self.response_log.log_response(self.session_id, question_id, response)
             self.current_assessment.user_responses[question_id] = response
+            if self.adaptive_session:
+                self.adaptive_session.record_response(question_id, response)
     
     def complete_assessment(self) -> Dict[str, Any]:
         """Complete assessment and calculate scores"""
@@ -234,21 +342,20 @@ class AssessmentFramework:
             raise Exception("No assessment in progress")
         
         self.timer.stop()
-        self.current_assessment.completed_at = datetime.now()
-        
-        # Calculate section scores
-        total_weighted_score = 0
-        for section in self.current_assessment.sections:
-            section_score = self.scoring_engine.calculate_section_score(
-                section, self.current_assessment.user_responses)
-            self.current_assessment.scores[section.id] = section_score
-            total_weighted_score += section_score * (section.weightage / 100)
-        
-        self.current_assessment.total_score = total_weighted_score
-        self.current_assessment.tier = self.scoring_engine.determine_performance_tier(
-            total_weighted_score)
+        self.current_assessment.completed_at = self.clock()
+        if self.adaptive_session:
+            self.adaptive_session.apply_scores(self.current_assessment)
+        else:
+            self.scoring_engine.score_assessment(self.current_assessment)
         
-        return self._generate_assessment_report()
+        report = self._generate_assessment_report()
+        if self.leaderboard:
+            report["standing"] = self.leaderboard.record(
+                self.current_assessment.id, self.current_assessment.total_score,
+                self.current_assessment.cohort)
+        if self.response_log:
+            self.response_log.complete_session(self.session_id, report)
+        return report
     
     def _generate_assessment_report(self) -> Dict[str, Any]:
         """Generate detailed assessment report"""
@@ -257,11 +364,13 @@ class AssessmentFramework:
         
         report = {
             "assessment_id": self.current_assessment.id,
+            "candidate_id": self.current_assessment.candidate_id,
             "title": self.current_assessment.title,
             "scenario": self.current_assessment.scenario,
             "completed_at": self.current_assessment.completed_at.isoformat(),
             "total_score": self.current_assessment.total_score,
             "performance_tier": self.current_assessment.tier.value,
+            "provisional": self.current_assessment.provisional,
             "sections": {},
             "recommendations": [],
             "badges_earned": []
@@ -276,6 +385,13 @@ class AssessmentFramework:
                 "weightage": section.weightage
             }
         
+        if self.adaptive_session:
+            report["adaptive"] = {
+                "ability_estimate": self.adaptive_session.theta,
+                "standard_error": self.adaptive_session.standard_error,
+                "questions_administered": len(self.adaptive_session.administered)
+            }
+        
         # Add recommendations based on performance
         if self.current_assessment.total_score < 70:
             report["recommendations"].append("Must complete micro-learning modules on weak areas before scenario retry")
@@ -0,0 +1,368 @@
+"""
+Dharmasikhara Assessment Loader
+Validates, compiles and caches assessment definitions loaded from JSON
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+
+from assessment_framework import Assessment, Section, Question, QuestionType, RubricCriterion
+
+# Bump whenever the compiled layout changes so stale disk caches are ignored
+CACHE_FORMAT_VERSION = 2
+
+MCQ_TYPES = (QuestionType.SINGLE_SELECT_MCQ, QuestionType.MULTI_SELECT_MCQ)
+VALID_TYPES = {t.value for t in QuestionType}
+
+
+class AssessmentSchemaError(ValueError):
+    """Raised when an assessment definition fails validation.
+
+    All problems found in the definition are collected in ``errors`` so that
+    authors can fix them in one pass.
+    """
+
+    def __init__(self, source: str, errors: List[str]):
+        self.source = source
+        self.errors = errors
+        details = "\n".join(f"  - {e}" for e in errors)
+        super().__init__(f"Invalid assessment definition in {source} "
+                         f"({len(errors)} error(s)):\n{details}")
+
+
+@dataclass(frozen=True)
+class CompiledAssessment:
+    """Validated, immutable form of an assessment definition"""
+    id: str
+    title: str
+    scenario: str
+    sections: Tuple[Section, ...]
+    total_time_limit: int
+    passing_score: float
+    content_hash: str
+
+    def instantiate(self, candidate_id: Optional[str] = None) -> Assessment:
+        """Create a fresh Assessment for one candidate.
+
+        Sections and questions are shared between candidates; only the
+        per-candidate state (responses, scores, timestamps) is new.
+        """
+        return Assessment(
+            id=self.id,
+            title=self.title,
+            scenario=self.scenario,
+            sections=list(self.sections),
+            total_time_limit=self.total_time_limit,
+            passing_score=self.passing_score,
+            candidate_id=candidate_id
+        )
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_str(errors: List[str], obj: Dict[str, Any], key: str, path: str):
+    value = obj.get(key)
+    if not isinstance(value, str) or not value.strip():
+        errors.append(f"{path}.{key}: expected a non-empty string, got {value!r}")
+
+
+def _check_number(errors: List[str], obj: Dict[str, Any], key: str, path: str,
+                  required: bool = True, minimum: float = 0, maximum: Optional[float] = None):
+    if key not in obj:
+        if required:
+            errors.append(f"{path}.{key}: missing required field")
+        return
+    value = obj[key]
+    if not _is_number(value):
+        errors.append(f"{path}.{key}: expected a number, got {value!r}")
+    elif value < minimum or (maximum is not None and value > maximum):
+        bounds = f">= {minimum}" if maximum is None else f"between {minimum} and {maximum}"
+        errors.append(f"{path}.{key}: must be {bounds}, got {value!r}")
+
+
+def _validate_question(errors: List[str], q_data: Any, path: str, seen_ids: Dict[str, str]):
+    if not isinstance(q_data, dict):
+        errors.append(f"{path}: expected an object, got {type(q_data).__name__}")
+        return
+
+    _check_str(errors, q_data, 'id', path)
+    _check_str(errors, q_data, 'text', path)
+
+    q_id = q_data.get('id')
+    if isinstance(q_id, str):
+        if q_id in seen_ids:
+            errors.append(f"{path}.id: duplicate question id {q_id!r} (first defined at {seen_ids[q_id]})")
+        else:
+            seen_ids[q_id] = path
+
+    q_type = q_data.get('type')
+    if q_type not in VALID_TYPES:
+        errors.append(f"{path}.type: {q_type!r} is not a valid question type "
+                      f"(expected one of {sorted(VALID_TYPES)})")
+
+    options = q_data.get('options', [])
+    if not isinstance(options, list) or not all(isinstance(o, str) for o in options):
+        errors.append(f"{path}.options: expected a list of strings")
+        options = None
+
+    correct = q_data.get('correct_answers', [])
+    if not isinstance(correct, list) or not all(_is_int(c) for c in correct):
+        errors.append(f"{path}.correct_answers: expected a list of option indexes")
+    elif options is not None:
+        for index in correct:
+            if not 0 <= index < len(options):
+                errors.append(f"{path}.correct_answers: index {index} is out of range "
+                              f"for {len(options)} option(s)")
+
+    if q_type in (t.value for t in MCQ_TYPES):
+        if not options:
+            errors.append(f"{path}.options: {q_type} questions need at least one option")
+        if isinstance(correct, list) and not correct:
+            errors.append(f"{path}.correct_answers: {q_type} questions need a correct answer")
+
+    if 'score' in q_data and not (_is_int(q_data['score']) and q_data['score'] >= 0):
+        errors.append(f"{path}.score: expected a non-negative integer, got {q_data['score']!r}")
+    _check_number(errors, q_data, 'time_limit_minutes', path, required=False)
+
+    tags = q_data.get('competency_tags', [])
+    if not isinstance(tags, list) or not all(isinstance(t, str) for t in tags):
+        errors.append(f"{path}.competency_tags: expected a list of strings")
+
+    references = q_data.get('reference_answers', [])
+    if not isinstance(references, list) or not all(isinstance(r, str) for r in references):
+        errors.append(f"{path}.reference_answers: expected a list of strings")
+
+    rubric = q_data.get('rubric', [])
+    if not isinstance(rubric, list):
+        errors.append(f"{path}.rubric: expected a list of criteria")
+    else:
+        for c_index, criterion in enumerate(rubric):
+            c_path = f"{path}.rubric[{c_index}]"
+            if not isinstance(criterion, dict):
+                errors.append(f"{c_path}: expected an object, got {type(criterion).__name__}")
+                continue
+            _check_str(errors, criterion, 'id', c_path)
+            _check_str(errors, criterion, 'description', c_path)
+            _check_number(errors, criterion, 'points', c_path)
+
+
+def validate_assessment_data(data: Any) -> List[str]:
+    """Validate a raw assessment definition and return every error found"""
+    errors: List[str] = []
+
+    if not isinstance(data, dict) or not isinstance(data.get('assessment'), dict):
+        return ["assessment: expected a top-level 'assessment' object"]
+
+    assessment_data = data['assessment']
+    path = "assessment"
+    _check_str(errors, assessment_data, 'id', path)
+    _check_str(errors, assessment_data, 'title', path)
+    _check_str(errors, assessment_data, 'scenario', path)
+    _check_number(errors, assessment_data, 'total_time_limit_minutes', path)
+    _check_number(errors, assessment_data, 'passing_score', path, required=False, maximum=100)
+
+    sections = assessment_data.get('sections')
+    if not isinstance(sections, list) or not sections:
+        errors.append(f"{path}.sections: expected a non-empty list")
+        return errors
+
+    seen_section_ids: Dict[str, str] = {}
+    seen_question_ids: Dict[str, str] = {}
+    for s_index, section_data in enumerate(sections):
+        s_path = f"{path}.sections[{s_index}]"
+        if not isinstance(section_data, dict):
+            errors.append(f"{s_path}: expected an object, got {type(section_data).__name__}")
+            continue
+
+        _check_str(errors, section_data, 'id', s_path)
+        _check_str(errors, section_data, 'name', s_path)
+        _check_number(errors, section_data, 'time_limit_minutes', s_path)
+        _check_number(errors, section_data, 'weightage_percent', s_path, maximum=100)
+
+        s_id = section_data.get('id')
+        if isinstance(s_id, str):
+            if s_id in seen_section_ids:
+                errors.append(f"{s_path}.id: duplicate section id {s_id!r} "
+                              f"(first defined at {seen_section_ids[s_id]})")
+            else:
+                seen_section_ids[s_id] = s_path
+
+        questions = section_data.get('questions')
+        if not isinstance(questions, list):
+            errors.append(f"{s_path}.questions: expected a list")
+            continue
+        for q_index, q_data in enumerate(questions):
+            _validate_question(errors, q_data, f"{s_path}.questions[{q_index}]", seen_question_ids)
+
+    return errors
+
+
+def compile_assessment(data: Dict[str, Any], content_hash: str = "",
+                       source: str = "<memory>") -> CompiledAssessment:
+    """Validate a raw assessment definition and build its compiled form"""
+    errors = validate_assessment_data(data)
+    if errors:
+        raise AssessmentSchemaError(source, errors)
+
+    assessment_data = data['assessment']
+    sections = []
+    for section_data in assessment_data['sections']:
+        questions = [
+            Question(
+                id=q_data['id'],
+                text=q_data['text'],
+                type=QuestionType(q_data['type']),
+                options=list(q_data.get('options', [])),
+                correct_answers=list(q_data.get('correct_answers', [])),
+                score=q_data.get('score', 1),
+                time_limit=q_data.get('time_limit_minutes', 0),
+                competency_tags=list(q_data.get('competency_tags', [])),
+                reference_answers=list(q_data.get('reference_answers', [])),
+                rubric=[
+                    RubricCriterion(c['id'], c['description'], c['points'])
+                    for c in q_data.get('rubric', [])
+                ]
+            )
+            for q_data in section_data['questions']
+        ]
+        sections.append(Section(
+            id=section_data['id'],
+            name=section_data['name'],
+            questions=questions,
+            time_limit=section_data['time_limit_minutes'],
+            weightage=section_data['weightage_percent']
+        ))
+
+    return CompiledAssessment(
+        id=assessment_data['id'],
+        title=assessment_data['title'],
+        scenario=assessment_data['scenario'],
+        sections=tuple(sections),
+        total_time_limit=assessment_data['total_time_limit_minutes'],
+        passing_score=assessment_data.get('passing_score', 70.0),
+        content_hash=content_hash
+    )
+
+
+class AssessmentLoader:
+    """Loads assessment definitions, compiling each file at most once.
+
+    Compiled assessments are cached in memory keyed by absolute path and
+    file stat (mtime + size). When ``cache_dir`` is set they are also
+    pickled to disk so that a freshly started worker can skip the JSON
+    parse; the content hash guards against a file rewritten with the same
+    mtime, and lets a file that was only touched reuse its entry. The disk
+    cache is written only when a file is compiled.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._memory: Dict[str, Tuple[Tuple[int, int], CompiledAssessment]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "compiles": 0}
+
+    def load(self, filepath: str, candidate_id: Optional[str] = None) -> Assessment:
+        """Return a fresh Assessment instance for one candidate"""
+        return self.load_compiled(filepath).instantiate(candidate_id)
+
+    def load_compiled(self, filepath: str) -> CompiledAssessment:
+        path = os.path.abspath(filepath)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            cached = self._memory.get(path)
+            if cached and cached[0] == stamp:
+                self.stats["memory_hits"] += 1
+                return cached[1]
+
+        compiled = self._load_from_disk_cache(path, stamp)
+        if compiled is not None:
+            self.stats["disk_hits"] += 1
+        else:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            content_hash = hashlib.sha256(raw).hexdigest()
+            compiled = self._load_from_disk_cache(path, stamp, content_hash)
+            if compiled is not None:
+                self.stats["disk_hits"] += 1
+            else:
+                try:
+                    data = json.loads(raw.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                    raise AssessmentSchemaError(path, [f"invalid JSON: {e}"])
+                compiled = compile_assessment(data, content_hash, source=path)
+                self.stats["compiles"] += 1
+                self._write_disk_cache(path, stamp, compiled)
+
+        with self._lock:
+            self._memory[path] = (stamp, compiled)
+        return compiled
+
+    def invalidate(self, filepath: Optional[str] = None):
+        """Drop in-memory entries (all of them when no path is given)"""
+        with self._lock:
+            if filepath is None:
+                self._memory.clear()
+            else:
+                self._memory.pop(os.path.abspath(filepath), None)
+
+    def _cache_path(self, path: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        key = hashlib.sha1(path.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"assessment_{key}.pickle")
+
+    def _load_from_disk_cache(self, path: str, stamp: Tuple[int, int],
+                              content_hash: Optional[str] = None) -> Optional[CompiledAssessment]:
+        cache_path = self._cache_path(path)
+        if not cache_path or not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                version, cached_stamp, compiled = pickle.load(f)
+        except Exception:
+            # A corrupt or incompatible cache file is just a miss
+            return None
+        if version != CACHE_FORMAT_VERSION:
+            return None
+        if content_hash is None:
+            return compiled if tuple(cached_stamp) == stamp else None
+        return compiled if compiled.content_hash == content_hash else None
+
+    def _write_disk_cache(self, path: str, stamp: Tuple[int, int], compiled: CompiledAssessment):
+        cache_path = self._cache_path(path)
+        if not cache_path:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((CACHE_FORMAT_VERSION, stamp, compiled), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+_default_loader = AssessmentLoader(
+    cache_dir=os.environ.get('ASSESSMENT_CACHE_DIR')
+)
+
+
+def load_assessment(filepath: str, candidate_id: Optional[str] = None) -> Assessment:
+    """Load an assessment using the process-wide cached loader"""
+    return _default_loader.load(filepath, candidate_id)
@@ -0,0 +1,205 @@
+"""
+Dharmasikhara Leaderboard
+Rank and percentile queries over assessment scores using Fenwick trees
+"""
+
+import os
+import tempfile
+import threading
+import time
+from array import array
+from typing import Dict, Optional, Tuple
+
+# Scores are percentages; bucket them to a hundredth of a point
+SCORE_MIN = 0.0
+SCORE_MAX = 100.0
+RESOLUTION = 100  # buckets per point
+NUM_BUCKETS = int((SCORE_MAX - SCORE_MIN) * RESOLUTION) + 1
+
+
+def score_bucket(score: float) -> int:
+    bucket = int(round((score - SCORE_MIN) * RESOLUTION))
+    return min(max(bucket, 0), NUM_BUCKETS - 1)
+
+
+class FenwickTree:
+    """Binary indexed tree of counts supporting O(log n) update and prefix sum"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.tree = array('q', [0]) * (size + 1)
+
+    def add(self, index: int, delta: int):
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, index: int) -> int:
+        """Sum of counts in buckets [0, index]"""
+        i = index + 1
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find_by_rank(self, k: int) -> int:
+        """Smallest bucket whose prefix sum is >= k (k is 1-based)"""
+        pos = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] < k:
+                pos = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return pos  # zero-based bucket index
+
+    def counts(self) -> array:
+        """Per-bucket counts (inverse of the tree layout), for persistence"""
+        tree = array('q', self.tree)
+        # Undo from_counts: each node subtracts itself from its parent, walking
+        # down so a node is still unmodified when its parent is adjusted
+        for i in range(self.size, 0, -1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                tree[parent] -= tree[i]
+        return tree[1:]
+
+    @classmethod
+    def from_counts(cls, counts: array) -> "FenwickTree":
+        tree = cls(len(counts))
+        # Linear-time construction
+        for i in range(1, tree.size + 1):
+            tree.tree[i] += counts[i - 1]
+            parent = i + (i & -i)
+            if parent <= tree.size:
+                tree.tree[parent] += tree.tree[i]
+        return tree
+
+
+class ScoreDistribution:
+    """Score distribution for one assessment and cohort"""
+
+    def __init__(self, tree: Optional[FenwickTree] = None):
+        self.tree = tree or FenwickTree(NUM_BUCKETS)
+        self.total = self.tree.prefix_sum(NUM_BUCKETS - 1)
+        self.lock = threading.Lock()
+        self.dirty = False
+
+    def insert(self, score: float):
+        with self.lock:
+            self.tree.add(score_bucket(score), 1)
+            self.total += 1
+            self.dirty = True
+
+    def remove(self, score: float):
+        with self.lock:
+            self.tree.add(score_bucket(score), -1)
+            self.total -= 1
+            self.dirty = True
+
+    def rank(self, score: float) -> int:
+        """1-based rank: one more than the number of strictly higher scores"""
+        with self.lock:
+            return self.total - self.tree.prefix_sum(score_bucket(score)) + 1
+
+    def percentile(self, score: float) -> float:
+        """Percentage of the cohort scoring at or below ``score``"""
+        with self.lock:
+            if self.total == 0:
+                return 100.0
+            return 100.0 * self.tree.prefix_sum(score_bucket(score)) / self.total
+
+    def top_percent(self, score: float) -> float:
+        """The "you scored in the top N%" figure (rank over cohort size)"""
+        with self.lock:
+            if self.total == 0:
+                return 100.0
+            higher = self.total - self.tree.prefix_sum(score_bucket(score))
+            return 100.0 * (higher + 1) / self.total
+
+    def score_at_percentile(self, pct: float) -> Optional[float]:
+        """Lowest score at or below which ``pct`` percent of the cohort falls"""
+        with self.lock:
+            if self.total == 0:
+                return None
+            k = max(1, min(self.total, int(-(-pct * self.total // 100))))
+            return SCORE_MIN + self.tree.find_by_rank(k) / RESOLUTION
+
+
+class LeaderboardService:
+    """Keeps a score distribution per (assessment, cohort) and persists them.
+
+    Distributions are saved as raw bucket counts to ``persist_dir``; dirty
+    ones are written at most every ``persist_interval`` seconds from
+    :meth:`record`, and on :meth:`persist`.
+    """
+
+    def __init__(self, persist_dir: Optional[str] = None, persist_interval: float = 30.0):
+        self.persist_dir = persist_dir
+        self.persist_interval = persist_interval
+        self._boards: Dict[Tuple[str, str], ScoreDistribution] = {}
+        self._lock = threading.Lock()
+        self._last_persist = time.monotonic()
+
+    def board(self, assessment_id: str, cohort: Optional[str] = None) -> ScoreDistribution:
+        key = (assessment_id, cohort or "all")
+        with self._lock:
+            board = self._boards.get(key)
+            if board is None:
+                board = self._load(key) or ScoreDistribution()
+                self._boards[key] = board
+            return board
+
+    def record(self, assessment_id: str, score: float,
+               cohort: Optional[str] = None) -> Dict[str, float]:
+        """Add a completed score and return the candidate's standing"""
+        board = self.board(assessment_id, cohort)
+        board.insert(score)
+        standing = {
+            "rank": board.rank(score),
+            "cohort_size": board.total,
+            "percentile": board.percentile(score),
+            "top_percent": board.top_percent(score),
+        }
+        if self.persist_dir and time.monotonic() - self._last_persist >= self.persist_interval:
+            self.persist()
+        return standing
+
+    def _path(self, key: Tuple[str, str]) -> str:
+        name = "__".join("".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in part) for part in key)
+        return os.path.join(self.persist_dir, f"leaderboard_{name}.bin")
+
+    def _load(self, key: Tuple[str, str]) -> Optional[ScoreDistribution]:
+        if not self.persist_dir:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        counts = array('q')
+        with open(path, 'rb') as f:
+            counts.frombytes(f.read())
+        if len(counts) != NUM_BUCKETS:
+            return None
+        return ScoreDistribution(FenwickTree.from_counts(counts))
+
+    def persist(self):
+        """Write every distribution that changed since the last save"""
+        if not self.persist_dir:
+            return
+        os.makedirs(self.persist_dir, exist_ok=True)
+        with self._lock:
+            boards = list(self._boards.items())
+            self._last_persist = time.monotonic()
+        for key, board in boards:
+            with board.lock:
+                if not board.dirty:
+                    continue
+                data = board.tree.counts().tobytes()
+                board.dirty = False
+            fd, tmp_path = tempfile.mkstemp(dir=self.persist_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
@@ -0,0 +1,270 @@
+"""
+Dharmasikhara Assessment Load Test
+Simulates many concurrent candidates against one AssessmentFramework process on virtual time
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from assessment_framework import (AssessmentFramework, Assessment, Section, Question,
+                                  QuestionType)
+from assessment_loader import AssessmentLoader
+
+
+class VirtualClock:
+    """Discrete-event clock for asyncio simulations.
+
+    Simulated candidates call ``await clock.sleep(seconds)`` instead of
+    ``asyncio.sleep``; :meth:`run` jumps virtual time straight to the next
+    wake-up, so a 45-minute assessment takes no real time to wait through.
+    Pass ``clock.now`` wherever the framework expects a clock.
+    """
+
+    def __init__(self, start: Optional[datetime] = None):
+        self._now = start or datetime(2025, 1, 1, 9, 0, 0)
+        self._timers: List = []
+        self._seq = itertools.count()
+
+    def now(self) -> datetime:
+        return self._now
+
+    def sleep(self, seconds: float) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        wake_at = self._now + timedelta(seconds=max(0.0, seconds))
+        heapq.heappush(self._timers, (wake_at, next(self._seq), future))
+        return future
+
+    async def run(self, tasks: List[asyncio.Task]):
+        """Advance virtual time until every task has finished"""
+        # Let every task run up to its first sleep
+        await asyncio.sleep(0)
+        while self._timers:
+            wake_at = self._timers[0][0]
+            self._now = wake_at
+            while self._timers and self._timers[0][0] == wake_at:
+                _, _, future = heapq.heappop(self._timers)
+                if not future.done():
+                    future.set_result(None)
+            # Woken tasks run synchronously until their next sleep
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+
+@dataclass
+class LoadProfile:
+    candidates: int = 1000
+    ramp_up_seconds: float = 600.0       # arrivals are Poisson over this window
+    think_median_seconds: float = 60.0   # per question, lognormal
+    think_sigma: float = 0.6
+    accuracy: float = 0.7                # chance of answering an MCQ correctly
+    abandon_rate: float = 0.02           # candidates who never complete
+    seed: int = 42
+
+
+@dataclass
+class LoadResults:
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    completed: int = 0
+    abandoned: int = 0
+    wall_seconds: float = 0.0
+    virtual_seconds: float = 0.0
+    peak_active: int = 0
+    memory_per_session_bytes: Optional[float] = None
+
+    def summary(self) -> Dict[str, object]:
+        operations = sum(len(v) for v in self.latencies.values())
+        latency = {}
+        for op, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            latency[op] = {
+                "count": len(ordered),
+                "p50_us": _percentile(ordered, 50) * 1e6,
+                "p95_us": _percentile(ordered, 95) * 1e6,
+                "p99_us": _percentile(ordered, 99) * 1e6,
+                "max_us": ordered[-1] * 1e6 if ordered else 0.0,
+            }
+        return {
+            "completed_sessions": self.completed,
+            "abandoned_sessions": self.abandoned,
+            "peak_concurrent_sessions": self.peak_active,
+            "virtual_duration_minutes": self.virtual_seconds / 60,
+            "wall_seconds": self.wall_seconds,
+            "operations_per_second": operations / self.wall_seconds if self.wall_seconds else 0.0,
+            "latency": latency,
+            "memory_per_session_bytes": self.memory_per_session_bytes,
+        }
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build_sample_assessment() -> Assessment:
+    """Synthetic assessment with the section layout described in the README"""
+    def questions(prefix: str, count: int, qtype: QuestionType, score: int) -> List[Question]:
+        return [
+            Question(
+                id=f"{prefix}{i}",
+                text=f"{prefix} question {i}",
+                type=qtype,
+                options=["A", "B", "C", "D"],
+                correct_answers=[0],
+                score=score
+            )
+            for i in range(count)
+        ]
+
+    return Assessment(
+        id="load_test",
+        title="Load Test Assessment",
+        scenario="Synthetic",
+        sections=[
+            Section("legal_knowledge", "Legal Knowledge & Procedure",
+                    questions("lk", 10, QuestionType.SINGLE_SELECT_MCQ, 1), 10, 20.0),
+            Section("case_analysis", "Case Analysis & Reasoning",
+                    questions("ca", 6, QuestionType.MULTI_SELECT_MCQ, 1), 15, 30.0),
+            Section("ethics", "Ethical Judgment",
+                    questions("et", 5, QuestionType.SITUATIONAL_JUDGMENT, 3), 10, 25.0),
+            Section("argument_quality", "Argument Quality Review",
+                    questions("aq", 2, QuestionType.OPEN_ENDED_JUSTIFICATION, 5), 10, 25.0),
+        ],
+        total_time_limit=45
+    )
+
+
+def _response_for(question: Question, rng: random.Random, accuracy: float):
+    correct = rng.random() < accuracy
+    if question.type == QuestionType.SINGLE_SELECT_MCQ:
+        return question.correct_answers[0] if correct else (question.correct_answers[0] + 1) % len(question.options)
+    if question.type == QuestionType.MULTI_SELECT_MCQ:
+        return list(question.correct_answers) if correct else [len(question.options) - 1]
+    if question.type == QuestionType.SITUATIONAL_JUDGMENT:
+        return 0 if correct else rng.randint(1, 3)
+    return rng.randint(0, question.score)
+
+
+async def simulate_candidate(index: int, make_assessment, clock: VirtualClock, profile: LoadProfile,
+                             results: LoadResults, active: List[int], shared: Dict[str, object]):
+    rng = random.Random(profile.seed * 1_000_003 + index)
+
+    def timed(op: str, fn, *args):
+        start = time.perf_counter()
+        value = fn(*args)
+        results.latencies[op].append(time.perf_counter() - start)
+        return value
+
+    # Uniform arrival times over the window are a Poisson process with a known count
+    await clock.sleep(rng.uniform(0, profile.ramp_up_seconds))
+    framework = AssessmentFramework(clock=clock.now, **shared)
+    active[0] += 1
+    results.peak_active = max(results.peak_active, active[0])
+    try:
+        timed("activate", framework.activate_assessment, True)
+        while framework.is_cooldown_active():
+            await clock.sleep(max(1, framework.get_cooldown_remaining()))
+
+        assessment = timed("load", make_assessment, f"candidate_{index}")
+        if not timed("start", framework.start_assessment, assessment):
+            return
+
+        abandons = rng.random() < profile.abandon_rate
+        questions = [q for section in assessment.sections for q in section.questions]
+        for question in questions:
+            await clock.sleep(rng.lognormvariate(0, profile.think_sigma) * profile.think_median_seconds)
+            if framework.timer.is_time_up() or (abandons and rng.random() < 0.1):
+                break
+            timed("submit", framework.submit_response, question.id,
+                  _response_for(question, rng, profile.accuracy))
+
+        if abandons:
+            results.abandoned += 1
+            return
+        timed("complete", framework.complete_assessment)
+        results.completed += 1
+    finally:
+        active[0] -= 1
+
+
+async def run_load_test(profile: LoadProfile, make_assessment, shared: Optional[Dict[str, object]] = None,
+                        measure_memory: bool = False) -> LoadResults:
+    clock = VirtualClock()
+    results = LoadResults()
+    active = [0]
+    started = clock.now()
+
+    if measure_memory:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+    wall_start = time.perf_counter()
+    tasks = [
+        asyncio.ensure_future(simulate_candidate(i, make_assessment, clock, profile,
+                                                 results, active, shared or {}))
+        for i in range(profile.candidates)
+    ]
+    await clock.run(tasks)
+    results.wall_seconds = time.perf_counter() - wall_start
+    results.virtual_seconds = (clock.now() - started).total_seconds()
+
+    if measure_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if results.peak_active:
+            results.memory_per_session_bytes = (peak - baseline) / results.peak_active
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent assessment sessions")
+    parser.add_argument("-n", "--candidates", type=int, default=1000)
+    parser.add_argument("--ramp-up", type=float, default=600.0, help="Arrival window in virtual seconds")
+    parser.add_argument("--think-median", type=float, default=60.0, help="Median seconds per question")
+    parser.add_argument("--think-sigma", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--assessment", help="Assessment JSON (defaults to a synthetic assessment)")
+    parser.add_argument("--response-log", help="Also write responses to this durable log")
+    parser.add_argument("--memory", action="store_true", help="Measure memory per session (slower)")
+    args = parser.parse_args()
+
+    profile = LoadProfile(candidates=args.candidates, ramp_up_seconds=args.ramp_up,
+                          think_median_seconds=args.think_median, think_sigma=args.think_sigma,
+                          seed=args.seed)
+
+    if args.assessment:
+        loader = AssessmentLoader()
+        make_assessment = lambda candidate_id: loader.load(args.assessment, candidate_id)
+    else:
+        template = build_sample_assessment()
+        make_assessment = lambda candidate_id: Assessment(
+            id=template.id, title=template.title, scenario=template.scenario,
+            sections=template.sections, total_time_limit=template.total_time_limit,
+            candidate_id=candidate_id)
+
+    shared = {}
+    if args.response_log:
+        from response_log import ResponseLog
+        # Durable submits block the (single-threaded) simulation until their
+        # group is synced, so this is the worst case for a one-thread worker
+        shared["response_log"] = ResponseLog(args.response_log)
+
+    results = asyncio.run(run_load_test(profile, make_assessment, shared, args.memory))
+    if "response_log" in shared:
+        shared["response_log"].close()
+    print(json.dumps(results.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Dharmasikhara Bulk Report Export
+Streams completed assessment reports for a cohort to JSONL, CSV, Parquet or Arrow
+"""
+
+import csv
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+SUPPORTED_FORMATS = ("jsonl", "csv", "parquet", "arrow")
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+BASE_COLUMNS = [
+    "candidate_id",
+    "assessment_id",
+    "title",
+    "scenario",
+    "completed_at",
+    "total_score",
+    "performance_tier",
+]
+
+# Progress callback receives (reports_written, reports_scanned)
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass
+class ReportFilter:
+    """Selects which reports are exported"""
+    scenario: Optional[str] = None
+    start: Optional[datetime] = None  # inclusive
+    end: Optional[datetime] = None    # exclusive
+
+    def matches(self, report: Dict[str, Any]) -> bool:
+        if self.scenario is not None and report.get("scenario") != self.scenario:
+            return False
+        if self.start is None and self.end is None:
+            return True
+        completed_at = report.get("completed_at")
+        if not completed_at:
+            return False
+        completed = datetime.fromisoformat(completed_at)
+        if self.start is not None and completed < self.start:
+            return False
+        if self.end is not None and completed >= self.end:
+            return False
+        return True
+
+
+@dataclass
+class ExportSummary:
+    output_path: str
+    format: str
+    scanned: int
+    written: int
+    section_ids: List[str]
+
+
+def iter_reports_jsonl(*paths: str) -> Iterator[Dict[str, Any]]:
+    """Lazily read stored reports, one JSON object per line"""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def flatten_report(report: Dict[str, Any], section_ids: List[str]) -> Dict[str, Any]:
+    """Flatten a nested assessment report into a single tabular row"""
+    row = {column: report.get(column) for column in BASE_COLUMNS}
+    sections = report.get("sections", {})
+    for section_id in section_ids:
+        row[f"section_{section_id}_score"] = sections.get(section_id, {}).get("score")
+    row["badges_earned"] = ";".join(report.get("badges_earned", []))
+    row["recommendations"] = " | ".join(report.get("recommendations", []))
+    return row
+
+
+def _columns(section_ids: List[str]) -> List[str]:
+    return (BASE_COLUMNS
+            + [f"section_{section_id}_score" for section_id in section_ids]
+            + ["badges_earned", "recommendations"])
+
+
+class _JsonlWriter:
+    def __init__(self, path: str, section_ids: List[str]):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write_report(self, report: Dict[str, Any]):
+        self._file.write(json.dumps(report, ensure_ascii=False))
+        self._file.write("\n")
+
+    def close(self):
+        self._file.close()
+
+
+class _CsvWriter:
+    def __init__(self, path: str, section_ids: List[str]):
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._section_ids = section_ids
+        self._writer = csv.DictWriter(self._file, fieldnames=_columns(section_ids))
+        self._writer.writeheader()
+
+    def write_report(self, report: Dict[str, Any]):
+        self._writer.writerow(flatten_report(report, self._section_ids))
+
+    def close(self):
+        self._file.close()
+
+
+class _ColumnarWriter:
+    """Buffers rows into fixed-size record batches so memory stays bounded"""
+
+    def __init__(self, path: str, section_ids: List[str], fmt: str, batch_size: int):
+        fields = [
+            pa.field("candidate_id", pa.string()),
+            pa.field("assessment_id", pa.string()),
+            pa.field("title", pa.string()),
+            pa.field("scenario", pa.string()),
+            pa.field("completed_at", pa.string()),
+            pa.field("total_score", pa.float64()),
+            pa.field("performance_tier", pa.string()),
+        ]
+        fields += [pa.field(f"section_{s}_score", pa.float64()) for s in section_ids]
+        fields += [pa.field("badges_earned", pa.list_(pa.string())),
+                   pa.field("recommendations", pa.list_(pa.string()))]
+        self._schema = pa.schema(fields)
+        self._section_ids = section_ids
+        self._batch_size = batch_size
+        self._rows: List[Dict[str, Any]] = []
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = pa_ipc.new_stream(self._sink, self._schema)
+
+    def write_report(self, report: Dict[str, Any]):
+        row = flatten_report(report, self._section_ids)
+        # Columnar formats keep list columns instead of joined strings
+        row["badges_earned"] = list(report.get("badges_earned", []))
+        row["recommendations"] = list(report.get("recommendations", []))
+        self._rows.append(row)
+        if len(self._rows) >= self._batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            batch = pa.RecordBatch.from_pylist(self._rows, schema=self._schema)
+            self._writer.write_batch(batch)
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        if hasattr(self, "_sink"):
+            self._sink.close()
+
+
+def export_reports(reports: Iterable[Dict[str, Any]], output_path: str,
+                   fmt: Optional[str] = None,
+                   report_filter: Optional[ReportFilter] = None,
+                   section_ids: Optional[List[str]] = None,
+                   progress: Optional[ProgressCallback] = None,
+                   progress_every: int = 1000,
+                   batch_size: int = 5000) -> ExportSummary:
+    """Stream reports to ``output_path`` without holding the cohort in memory.
+
+    ``reports`` may be any iterable (a generator over a database cursor or
+    :func:`iter_reports_jsonl`). The format defaults to the file extension.
+    Tabular formats need a fixed set of section columns: pass
+    ``section_ids`` or they are taken from the first matching report.
+    """
+    if fmt is None:
+        fmt = os.path.splitext(output_path)[1].lstrip(".").lower()
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt!r} (expected one of {SUPPORTED_FORMATS})")
+    if fmt in COLUMNAR_FORMATS and not HAS_PYARROW:
+        raise RuntimeError(f"pyarrow library not available; cannot export {fmt}")
+
+    report_filter = report_filter or ReportFilter()
+    writer = None
+    scanned = written = 0
+    try:
+        for report in reports:
+            scanned += 1
+            if report_filter.matches(report):
+                if writer is None:
+                    if section_ids is None:
+                        section_ids = list(report.get("sections", {}).keys())
+                    writer = _open_writer(output_path, fmt, section_ids, batch_size)
+                writer.write_report(report)
+                written += 1
+            if progress and scanned % progress_every == 0:
+                progress(written, scanned)
+        if writer is None:
+            # Still produce a valid (empty) file so downstream jobs don't fail
+            section_ids = section_ids or []
+            writer = _open_writer(output_path, fmt, section_ids, batch_size)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if progress:
+        progress(written, scanned)
+    return ExportSummary(output_path, fmt, scanned, written, section_ids or [])
+
+
+def _open_writer(output_path: str, fmt: str, section_ids: List[str], batch_size: int):
+    if fmt == "jsonl":
+        return _JsonlWriter(output_path, section_ids)
+    if fmt == "csv":
+        return _CsvWriter(output_path, section_ids)
+    return _ColumnarWriter(output_path, section_ids, fmt, batch_size)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Export completed assessment reports")
+    parser.add_argument("inputs", nargs="+", help="JSONL files of stored assessment reports")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.jsonl, .csv, .parquet, .arrow)")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS)
+    parser.add_argument("--scenario")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="ISO date, inclusive")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="ISO date, exclusive")
+    args = parser.parse_args()
+
+    def print_progress(written: int, scanned: int):
+        print(f"Scanned {scanned} report(s), exported {written}", file=sys.stderr)
+
+    summary = export_reports(
+        iter_reports_jsonl(*args.inputs),
+        args.output,
+        fmt=args.format,
+        report_filter=ReportFilter(args.scenario, args.start, args.end),
+        progress=print_progress
+    )
+    print(json.dumps(summary.__dict__, indent=2))
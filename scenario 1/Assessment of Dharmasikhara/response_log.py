@@ -0,0 +1,325 @@
+"""
+Dharmasikhara Response Log
+Durable append-only log of assessment responses with group commit and crash replay
+"""
+
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field, asdict, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+# Record framing: payload length, CRC32 of payload
+FRAME = struct.Struct('<II')
+# Payload header: record type, timestamp (epoch seconds; a session start is
+# taken from the assessment's clock, which may be virtual)
+HEADER = struct.Struct('<Bd')
+# Field length; 32-bit so free-text answers are not capped at 64 KiB
+STR_LEN = struct.Struct('<I')
+
+RECORD_START = 1
+RECORD_RESPONSE = 2
+RECORD_COMPLETE = 3
+
+
+@dataclass
+class SessionState:
+    """Everything needed to rebuild an in-progress assessment session"""
+    session_id: str
+    assessment_id: str
+    candidate_id: Optional[str]
+    started_at: float
+    responses: Dict[str, Any] = field(default_factory=dict)
+    completed_at: Optional[float] = None
+
+
+def _pack_str(value: Optional[str]) -> bytes:
+    data = (value or "").encode('utf-8')
+    return STR_LEN.pack(len(data)) + data
+
+
+def _unpack_str(buf: bytes, offset: int) -> Tuple[str, int]:
+    (length,) = STR_LEN.unpack_from(buf, offset)
+    offset += STR_LEN.size
+    return buf[offset:offset + length].decode('utf-8'), offset + length
+
+
+def encode_record(record_type: int, timestamp: float, *fields: str) -> bytes:
+    payload = HEADER.pack(record_type, timestamp) + b"".join(_pack_str(f) for f in fields)
+    return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path: str) -> Tuple[List[Tuple[int, float, List[str]]], int]:
+    """Read all intact records; returns them with the offset of the last good byte.
+
+    A torn or corrupt tail (from a crash mid-write) ends the scan.
+    """
+    records = []
+    with open(path, 'rb') as f:
+        data = f.read()
+    offset = 0
+    while offset + FRAME.size <= len(data):
+        length, crc = FRAME.unpack_from(data, offset)
+        start = offset + FRAME.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        record_type, timestamp = HEADER.unpack_from(payload, 0)
+        fields = []
+        pos = HEADER.size
+        while pos < len(payload):
+            value, pos = _unpack_str(payload, pos)
+            fields.append(value)
+        records.append((record_type, timestamp, fields))
+        offset = start + length
+    return records, offset
+
+
+def apply_record(sessions: Dict[str, SessionState], record_type: int,
+                 timestamp: float, fields: List[str]):
+    if record_type == RECORD_START:
+        session_id, assessment_id, candidate_id = fields
+        sessions[session_id] = SessionState(session_id, assessment_id, candidate_id or None, timestamp)
+    elif record_type == RECORD_RESPONSE:
+        session_id, question_id, response = fields
+        state = sessions.get(session_id)
+        if state is not None:
+            state.responses[question_id] = json.loads(response)
+    elif record_type == RECORD_COMPLETE:
+        state = sessions.get(fields[0])
+        if state is not None:
+            state.completed_at = timestamp
+
+
+class ResponseLog:
+    """Append-only response log shared by all sessions in a worker.
+
+    Appends are buffered and made durable in groups: a background thread
+    writes everything pending and issues a single fsync once ``max_delay``
+    seconds have passed since the first pending record (or ``max_batch``
+    records are waiting). Callers that need durability block on the append
+    until their group has been synced.
+
+    Completed sessions are written to ``snapshot_dir`` and dropped from the
+    log by :meth:`compact`, which rewrites the log with only live sessions.
+    """
+
+    def __init__(self, path: str, snapshot_dir: Optional[str] = None,
+                 max_delay: float = 0.005, max_batch: int = 256,
+                 compact_after: int = 64):
+        self.path = path
+        self.snapshot_dir = snapshot_dir or os.path.join(os.path.dirname(os.path.abspath(path)), 'snapshots')
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.compact_after = compact_after
+        self.stats = {"records": 0, "fsyncs": 0}
+
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        self.sessions: Dict[str, SessionState] = {}
+        if os.path.exists(path):
+            records, good_offset = read_records(path)
+            for record in records:
+                apply_record(self.sessions, *record)
+            if good_offset < os.path.getsize(path):
+                # Drop the torn tail so new records follow the last good one
+                with open(path, 'r+b') as f:
+                    f.truncate(good_offset)
+        self._file = open(path, 'ab')
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: List[bytes] = []
+        self._pending_since = 0.0
+        self._write_seq = 0    # sequence number of the last record queued
+        self._synced_seq = 0   # sequence number of the last record fsynced
+        self._synced = threading.Condition(self._lock)
+        self._syncing = False
+        self._error: Optional[BaseException] = None  # why the flusher stopped, if it did
+        self._completed_since_compact = 0
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="response-log-flusher", daemon=True)
+        self._flusher.start()
+
+    # -- appending -------------------------------------------------------
+
+    def _append(self, record_type: int, *fields: str, wait: bool = True,
+                timestamp: Optional[float] = None):
+        timestamp = time.time() if timestamp is None else timestamp
+        data = encode_record(record_type, timestamp, *fields)
+        with self._lock:
+            if self._closed:
+                raise ValueError("Response log is closed")
+            if self._error is not None:
+                raise self._error
+            apply_record(self.sessions, record_type, timestamp, list(fields))
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.append(data)
+            self._write_seq += 1
+            seq = self._write_seq
+            self._wakeup.notify()
+            if wait:
+                self._wait_synced(seq)
+
+    def start_session(self, session_id: str, assessment_id: str,
+                      candidate_id: Optional[str] = None, wait: bool = True,
+                      started_at: Optional[float] = None):
+        """Log a new session; ``started_at`` (default now) is the start time
+        its timer resumes from after a restart"""
+        self._append(RECORD_START, session_id, assessment_id, candidate_id or "", wait=wait,
+                     timestamp=started_at)
+
+    def log_response(self, session_id: str, question_id: str, response: Any, wait: bool = True):
+        encoded = json.dumps(response, separators=(',', ':'))
+        self._append(RECORD_RESPONSE, session_id, question_id, encoded, wait=wait)
+
+    def complete_session(self, session_id: str, report: Optional[Dict[str, Any]] = None):
+        """Write the session's snapshot, then mark it complete in the log.
+
+        The snapshot goes first so that a crash in between leaves a session
+        that is replayed as in progress rather than one with no record at all.
+        """
+        with self._lock:
+            state = self.sessions.get(session_id)
+            if state is not None:
+                state = replace(state, responses=dict(state.responses), completed_at=time.time())
+        if state is not None:
+            self._write_snapshot(state, report)
+        self._append(RECORD_COMPLETE, session_id)
+        with self._lock:
+            self._completed_since_compact += 1
+            due = self._completed_since_compact >= self.compact_after
+        if due:
+            self.compact()
+
+    # -- group commit ----------------------------------------------------
+
+    def _flush_loop(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._wakeup.wait()
+                if not self._pending and self._closed:
+                    return
+                # Let the group fill up until the delay expires or it is full
+                deadline = self._pending_since + self.max_delay
+                while (len(self._pending) < self.max_batch and not self._closed
+                       and time.monotonic() < deadline):
+                    self._wakeup.wait(deadline - time.monotonic())
+                batch, self._pending = self._pending, []
+                if not batch:
+                    # A compaction already made these records durable
+                    continue
+                seq = self._write_seq
+                try:
+                    self._file.write(b"".join(batch))
+                    self._file.flush()
+                except Exception as e:
+                    self._fail(e)
+                    return
+                self._syncing = True
+            # fsync outside the lock so new appends can queue meanwhile
+            try:
+                os.fsync(self._file.fileno())
+            except Exception as e:
+                with self._lock:
+                    self._fail(e)
+                return
+            with self._lock:
+                self._syncing = False
+                self.stats["records"] += len(batch)
+                self.stats["fsyncs"] += 1
+                self._synced_seq = max(self._synced_seq, seq)
+                self._synced.notify_all()
+
+    def _fail(self, error: BaseException):
+        # Lock held. The flusher is stopping: wake everyone waiting for a
+        # sync so they (and later appends) get the error instead of hanging
+        self._error = error
+        self._syncing = False
+        self._synced.notify_all()
+
+    def _wait_synced(self, seq: int):
+        # Lock held
+        while self._synced_seq < seq:
+            if self._error is not None:
+                raise self._error
+            self._synced.wait()
+
+    def flush(self):
+        """Block until everything appended so far is durable"""
+        with self._lock:
+            seq = self._write_seq
+            self._wakeup.notify()
+            self._wait_synced(seq)
+
+    # -- snapshots and compaction ----------------------------------------
+
+    def _snapshot_path(self, session_id: str) -> str:
+        safe_id = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in session_id)
+        return os.path.join(self.snapshot_dir, f"{safe_id}.json")
+
+    def _write_snapshot(self, state: SessionState, report: Optional[Dict[str, Any]]):
+        fd, tmp_path = tempfile.mkstemp(dir=self.snapshot_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"session": asdict(state), "report": report}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path(state.session_id))
+
+    def load_snapshot(self, session_id: str) -> Optional[Dict[str, Any]]:
+        path = self._snapshot_path(session_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def compact(self):
+        """Rewrite the log keeping only sessions that are still in progress"""
+        with self._lock:
+            while self._syncing:
+                self._synced.wait()
+            # Pending records are already reflected in the session state, so
+            # the rewritten log covers them and they need not be written again
+            self._pending = []
+            live = [s for s in self.sessions.values() if s.completed_at is None]
+            chunks = []
+            for state in live:
+                chunks.append(encode_record(RECORD_START, state.started_at, state.session_id,
+                                            state.assessment_id, state.candidate_id or ""))
+                for question_id, response in state.responses.items():
+                    chunks.append(encode_record(RECORD_RESPONSE, state.started_at, state.session_id,
+                                                question_id, json.dumps(response, separators=(',', ':'))))
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(b"".join(chunks))
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, 'ab')
+            self.sessions = {s.session_id: s for s in live}
+            self._completed_since_compact = 0
+            self.stats["fsyncs"] += 1
+            self._synced_seq = self._write_seq
+            self._synced.notify_all()
+
+    def in_progress_sessions(self) -> List[SessionState]:
+        """Sessions to resume after a restart"""
+        with self._lock:
+            return [s for s in self.sessions.values() if s.completed_at is None]
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._closed = True
+                self._wakeup.notify()
+            self._flusher.join()
+            self._file.close()
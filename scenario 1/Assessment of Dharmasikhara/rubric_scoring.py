@@ -0,0 +1,274 @@
+"""
+Dharmasikhara Rubric Scoring
+Batched AI scoring of free-text answers against reference answers and rubric criteria
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from assessment_framework import Assessment, Question, QuestionType, ScoringEngine
+
+try:
+    import torch
+    from transformers import AutoTokenizer, AutoModel
+    HAS_TRANSFORMERS = True
+except ImportError:
+    HAS_TRANSFORMERS = False
+
+RUBRIC_TYPES = (
+    QuestionType.CASE_BASED_REASONING,
+    QuestionType.ARGUMENT_DECONSTRUCTION,
+    QuestionType.OPEN_ENDED_JUSTIFICATION,
+)
+
+DEFAULT_MODEL = os.environ.get('INCASELAWBERT_MODEL', 'law-ai/InCaseLawBERT')
+
+
+class InCaseLawBertEncoder:
+    """Sentence encoder using mean-pooled InCaseLawBERT embeddings.
+
+    The model is loaded on first use. ``encode`` runs the whole input in
+    batches of ``batch_size`` and returns L2-normalised vectors, so cosine
+    similarity is a plain dot product. With a ``cancel`` token it stops
+    between batches once the request has been abandoned.
+    """
+
+    def __init__(self, model_path: str = DEFAULT_MODEL, batch_size: int = 32,
+                 max_length: int = 512, device: Optional[str] = None):
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.device = device
+        self._tokenizer = None
+        self._model = None
+
+    def _load(self):
+        if not HAS_TRANSFORMERS:
+            raise RuntimeError("transformers/torch libraries not available")
+        if self.device is None:
+            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+        self._model = AutoModel.from_pretrained(self.model_path).to(self.device)
+        self._model.eval()
+
+    def encode(self, texts: Sequence[str], cancel=None) -> np.ndarray:
+        if self._model is None:
+            self._load()
+        if not texts:
+            return np.zeros((0, self._model.config.hidden_size), dtype=np.float32)
+
+        # Sorting by length keeps padding (and wasted compute) per batch small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.zeros((len(texts), self._model.config.hidden_size), dtype=np.float32)
+        with torch.no_grad():
+            for start in range(0, len(order), self.batch_size):
+                if cancel is not None:
+                    cancel.check()
+                batch_idx = order[start:start + self.batch_size]
+                inputs = self._tokenizer(
+                    [texts[i] for i in batch_idx],
+                    return_tensors="pt",
+                    truncation=True,
+                    padding=True,
+                    max_length=self.max_length
+                ).to(self.device)
+                hidden = self._model(**inputs).last_hidden_state
+                mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                pooled = torch.nn.functional.normalize(pooled, dim=-1)
+                vectors[batch_idx] = pooled.cpu().numpy()
+        return vectors
+
+
+@dataclass
+class RubricItem:
+    """One free-text answer waiting to be scored"""
+    question: Question
+    answer_text: str
+    candidate_id: Optional[str] = None
+
+
+@dataclass
+class RubricResult:
+    question_id: str
+    candidate_id: Optional[str]
+    answer_text: str
+    suggested_score: float
+    max_score: float
+    confidence: float
+    needs_review: bool
+    criterion_coverage: Dict[str, float] = field(default_factory=dict)
+    reference_coverage: Optional[float] = None
+    reviewed: bool = False
+
+
+def resolve_review(result: RubricResult, score: float, assessment: Optional[Assessment] = None):
+    """Record a human grader's score for an item routed to review.
+
+    Until then the item scores nothing and its assessment is provisional;
+    pass the (completed) assessment to re-score it with the reviewed score.
+    """
+    result.suggested_score = min(result.max_score, max(0, score))
+    result.confidence = 1.0
+    result.needs_review = False
+    result.reviewed = True
+    if assessment is not None and assessment.completed_at is not None:
+        ScoringEngine.score_assessment(assessment)
+
+
+def max_points(question: Question) -> float:
+    # Case-based reasoning uses the fixed 0-4 rubric in ScoringEngine
+    if question.type == QuestionType.CASE_BASED_REASONING:
+        return 4
+    return question.score
+
+
+class RubricScorer:
+    """Scores batches of free-text answers by embedding similarity.
+
+    Each answer is compared with the question's reference answers and with
+    each rubric criterion. Similarities are mapped onto [0, 1] coverage by
+    a linear ramp between ``similarity_floor`` and ``similarity_ceiling``.
+    Confidence is high when the coverages sit near the ends of the ramp and
+    when the reference-based and criteria-based estimates agree; answers
+    below ``review_threshold`` are flagged for human review.
+    """
+
+    def __init__(self, encoder=None, similarity_floor: float = 0.35,
+                 similarity_ceiling: float = 0.85, review_threshold: float = 0.6,
+                 min_answer_words: int = 5):
+        self.encoder = encoder or InCaseLawBertEncoder()
+        self.similarity_floor = similarity_floor
+        self.similarity_ceiling = similarity_ceiling
+        self.review_threshold = review_threshold
+        self.min_answer_words = min_answer_words
+        self._reference_cache: Dict[Tuple[str, Tuple[str, ...]], np.ndarray] = {}
+
+    def _reference_texts(self, question: Question) -> Tuple[str, ...]:
+        return tuple(question.reference_answers) + tuple(c.description for c in question.rubric)
+
+    def _coverage(self, similarity: np.ndarray) -> np.ndarray:
+        span = self.similarity_ceiling - self.similarity_floor
+        return np.clip((similarity - self.similarity_floor) / span, 0.0, 1.0)
+
+    def _encode(self, texts: Sequence[str], cancel=None) -> np.ndarray:
+        # Encoders that can stop between batches take the token themselves
+        if cancel is None:
+            return self.encoder.encode(texts)
+        cancel.check()
+        return self.encoder.encode(texts, cancel=cancel)
+
+    def _encode_references(self, questions: Iterable[Question], cancel=None):
+        """Embed reference texts for every question not yet cached, in one call"""
+        pending: Dict[Tuple[str, Tuple[str, ...]], Tuple[str, ...]] = {}
+        for question in questions:
+            texts = self._reference_texts(question)
+            key = (question.id, texts)
+            if texts and key not in self._reference_cache:
+                pending[key] = texts
+        if not pending:
+            return
+
+        flat = [text for texts in pending.values() for text in texts]
+        vectors = self._encode(flat, cancel)
+        offset = 0
+        for key, texts in pending.items():
+            self._reference_cache[key] = vectors[offset:offset + len(texts)]
+            offset += len(texts)
+
+    def score_batch(self, items: Sequence[RubricItem], cancel=None) -> List[RubricResult]:
+        """Score all items with one encoder pass over the distinct answers.
+
+        ``cancel`` (anything with ``check()``) is checked between encoder
+        batches; the encoder must then accept it as ``encode(texts, cancel=)``.
+        """
+        self._encode_references((item.question for item in items), cancel)
+
+        distinct: Dict[str, int] = {}
+        for item in items:
+            distinct.setdefault(item.answer_text.strip(), len(distinct))
+        answer_vectors = self._encode(list(distinct), cancel)
+
+        return [
+            self._score_one(item, answer_vectors[distinct[item.answer_text.strip()]])
+            for item in items
+        ]
+
+    def _score_one(self, item: RubricItem, answer_vector: np.ndarray) -> RubricResult:
+        question = item.question
+        points = max_points(question)
+        result = RubricResult(
+            question_id=question.id,
+            candidate_id=item.candidate_id,
+            answer_text=item.answer_text,
+            suggested_score=0,
+            max_score=points,
+            confidence=0.0,
+            needs_review=True
+        )
+
+        references = self._reference_cache.get((question.id, self._reference_texts(question)))
+        if references is None or len(item.answer_text.split()) < self.min_answer_words:
+            # Nothing to compare against, or too short to judge automatically
+            return result
+
+        coverage = self._coverage(references @ answer_vector)
+        n_refs = len(question.reference_answers)
+        estimates = []
+        if n_refs:
+            result.reference_coverage = float(coverage[:n_refs].max())
+            estimates.append(result.reference_coverage)
+        if question.rubric:
+            criterion_cov = coverage[n_refs:]
+            weights = np.array([c.points for c in question.rubric], dtype=np.float32)
+            result.criterion_coverage = {
+                c.id: float(cov) for c, cov in zip(question.rubric, criterion_cov)
+            }
+            if weights.sum() > 0:
+                estimates.append(float((weights * criterion_cov).sum() / weights.sum()))
+        if not estimates:
+            # Only zero-point criteria and no reference answers: no basis for a score
+            return result
+
+        fraction = sum(estimates) / len(estimates)
+        decisiveness = float(np.abs(2 * coverage - 1).mean())
+        agreement = 1.0 - abs(estimates[0] - estimates[-1])
+        result.confidence = agreement * (0.5 + 0.5 * decisiveness)
+        # Round to the nearest half point, as human graders do
+        result.suggested_score = round(fraction * points * 2) / 2
+        result.needs_review = result.confidence < self.review_threshold
+        return result
+
+
+def grade_assessments(assessments: Iterable[Assessment],
+                      scorer: RubricScorer) -> List[RubricResult]:
+    """Score every ungraded free-text answer across a cohort in one batch.
+
+    Text responses in each assessment's ``user_responses`` are replaced by
+    their RubricResult, which ScoringEngine scores by ``suggested_score``;
+    completed assessments are re-scored. Returns the results that need
+    human review; they score nothing, and their assessments stay
+    provisional, until resolve_review.
+    """
+    items: List[RubricItem] = []
+    targets: List[Assessment] = []
+    for assessment in assessments:
+        for section in assessment.sections:
+            for question in section.questions:
+                if question.type not in RUBRIC_TYPES:
+                    continue
+                response = assessment.user_responses.get(question.id)
+                if isinstance(response, str):
+                    items.append(RubricItem(question, response, assessment.candidate_id))
+                    targets.append(assessment)
+
+    results = scorer.score_batch(items) if items else []
+    for assessment, result in zip(targets, results):
+        assessment.user_responses[result.question_id] = result
+    for assessment in {id(a): a for a in targets}.values():
+        if assessment.completed_at is not None:
+            ScoringEngine.score_assessment(assessment)
+    return [result for result in results if result.needs_review]
@@ -5,50 +5,11 @@ Test script to demonstrate the Dharmasikhara Assessment Framework
 import json
 import time
 from assessment_framework import AssessmentFramework, Assessment, Section, Question, QuestionType
+from assessment_loader import load_assessment
 
 def load_assessment_from_json(filepath):
-    """Load assessment from JSON file"""
-    with open(filepath, 'r') as f:
-        data = json.load(f)
-    
-    assessment_data = data['assessment']
-    
-    # Create sections
-    sections = []
-    for section_data in assessment_data['sections']:
-        questions = []
-        for q_data in section_data['questions']:
-            question = Question(
-                id=q_data['id'],
-                text=q_data['text'],
-                type=QuestionType(q_data['type']),
-                options=q_data.get('options', []),
-                correct_answers=q_data.get('correct_answers', []),
-                score=q_data.get('score', 1),
-                competency_tags=q_data.get('competency_tags', [])
-            )
-            questions.append(question)
-        
-        section = Section(
-            id=section_data['id'],
-            name=section_data['name'],
-            questions=questions,
-            time_limit=section_data['time_limit_minutes'],
-            weightage=section_data['weightage_percent']
-        )
-        sections.append(section)
-    
-    # Create assessment
-    assessment = Assessment(
-        id=assessment_data['id'],
-        title=assessment_data['title'],
-        scenario=assessment_data['scenario'],
-        sections=sections,
-        total_time_limit=assessment_data['total_time_limit_minutes'],
-        passing_score=assessment_data['passing_score']
-    )
-    
-    return assessment
+    """Load assessment from JSON file (validated and cached by the loader)"""
+    return load_assessment(filepath)
 
 def run_sample_assessment():
     """Run a sample assessment demonstration"""
@@ -0,0 +1,68 @@
+import random
+import tempfile
+
+from leaderboard import NUM_BUCKETS, FenwickTree, LeaderboardService, ScoreDistribution
+
+
+def make_scores(count=500, seed=3):
+    rng = random.Random(seed)
+    return [round(rng.uniform(0, 100), 2) for _ in range(count)]
+
+
+def test_rank_and_percentile_match_a_sorted_list():
+    scores = make_scores()
+    board = ScoreDistribution()
+    for score in scores:
+        board.insert(score)
+    for score in scores[:50] + [0.0, 100.0, 55.5]:
+        higher = sum(1 for s in scores if s > score)
+        at_or_below = sum(1 for s in scores if s <= score)
+        assert board.rank(score) == higher + 1
+        assert abs(board.percentile(score) - 100.0 * at_or_below / len(scores)) < 1e-9
+        assert abs(board.top_percent(score) - 100.0 * (higher + 1) / len(scores)) < 1e-9
+
+
+def test_score_at_percentile_and_remove():
+    scores = make_scores()
+    board = ScoreDistribution()
+    for score in scores:
+        board.insert(score)
+    ordered = sorted(scores)
+    for pct in (1, 25, 50, 90, 100):
+        k = -(-pct * len(scores) // 100)
+        assert board.score_at_percentile(pct) == ordered[k - 1]
+    board.remove(ordered[-1])
+    assert board.rank(ordered[-2]) == 1
+    assert ScoreDistribution().score_at_percentile(50) is None
+
+
+def test_counts_round_trip():
+    tree = FenwickTree(NUM_BUCKETS)
+    rng = random.Random(5)
+    for _ in range(1000):
+        tree.add(rng.randrange(NUM_BUCKETS), 1)
+    rebuilt = FenwickTree.from_counts(tree.counts())
+    assert rebuilt.tree == tree.tree
+
+
+def test_persisted_boards_reload():
+    with tempfile.TemporaryDirectory() as directory:
+        service = LeaderboardService(directory)
+        for score in (40.0, 60.0, 80.0):
+            service.record("a1", score, cohort="batch-1")
+        standing = service.record("a1", 70.0, cohort="batch-1")
+        assert standing == {"rank": 2, "cohort_size": 4, "percentile": 75.0, "top_percent": 50.0}
+        service.persist()
+
+        reloaded = LeaderboardService(directory).board("a1", "batch-1")
+        assert reloaded.total == 4
+        assert reloaded.rank(70.0) == 2
+        assert LeaderboardService(directory).board("a1").total == 0
+
+
+if __name__ == "__main__":
+    test_rank_and_percentile_match_a_sorted_list()
+    test_score_at_percentile_and_remove()
+    test_counts_round_trip()
+    test_persisted_boards_reload()
+    print("leaderboard tests passed")
@@ -0,0 +1,90 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from report_export import HAS_PYARROW, ReportFilter, export_reports, iter_reports_jsonl
+
+
+def make_report(i, scenario="theft"):
+    return {
+        "assessment_id": "a1",
+        "candidate_id": f"c{i}",
+        "title": "Theft assessment",
+        "scenario": scenario,
+        "completed_at": datetime(2024, 1, 1 + i % 28).isoformat(),
+        "total_score": float(i % 100),
+        "performance_tier": "B",
+        "sections": {"s1": {"score": 50.0}, "s2": {"score": 75.0}},
+        "recommendations": ["Proceed with advisory notes"],
+        "badges_earned": ["Evidence Hunter", "Ethics Champion"],
+    }
+
+
+def test_reports_are_streamed_not_collected():
+    consumed = []
+
+    def reports(count):
+        for i in range(count):
+            consumed.append(i)
+            yield make_report(i)
+
+    progress = []
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "reports.jsonl")
+        summary = export_reports(reports(250), output,
+                                 progress=lambda w, s: progress.append((w, s, len(consumed))),
+                                 progress_every=100)
+        # Each report is written as it is read; the generator is never drained up front
+        assert progress == [(100, 100, 100), (200, 200, 200), (250, 250, 250)]
+        assert summary.written == 250 and summary.section_ids == ["s1", "s2"]
+        exported = list(iter_reports_jsonl(output))
+    assert [r["candidate_id"] for r in exported] == [f"c{i}" for i in range(250)]
+
+
+def test_filter_and_csv_flattening():
+    reports = [make_report(i, "theft" if i % 2 else "fraud") for i in range(20)]
+    report_filter = ReportFilter(scenario="theft", start=datetime(2024, 1, 5), end=datetime(2024, 1, 10))
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "reports.csv")
+        summary = export_reports(iter(reports), output, report_filter=report_filter)
+        with open(output, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    # Odd i (theft) completed on days 5-9: i = 5, 7
+    assert summary.scanned == 20 and summary.written == 2
+    assert [row["candidate_id"] for row in rows] == ["c5", "c7"]
+    assert rows[0]["section_s2_score"] == "75.0"
+    assert rows[0]["badges_earned"] == "Evidence Hunter;Ethics Champion"
+
+
+def test_no_matches_still_writes_a_valid_file():
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "reports.csv")
+        summary = export_reports([make_report(1)], output, report_filter=ReportFilter(scenario="fraud"),
+                                 section_ids=["s1"])
+        with open(output, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+    assert summary.written == 0
+    assert rows == [["candidate_id", "assessment_id", "title", "scenario", "completed_at", "total_score",
+                     "performance_tier", "section_s1_score", "badges_earned", "recommendations"]]
+
+
+def test_parquet_in_batches():
+    if not HAS_PYARROW:
+        return
+    import pyarrow.parquet as pq
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "reports.parquet")
+        export_reports((make_report(i) for i in range(25)), output, batch_size=10)
+        table = pq.read_table(output)
+    assert table.num_rows == 25
+    assert table.column("badges_earned")[0].as_py() == ["Evidence Hunter", "Ethics Champion"]
+
+
+if __name__ == "__main__":
+    test_reports_are_streamed_not_collected()
+    test_filter_and_csv_flattening()
+    test_no_matches_still_writes_a_valid_file()
+    test_parquet_in_batches()
+    print("report export tests passed")
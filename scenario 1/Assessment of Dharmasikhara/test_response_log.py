@@ -0,0 +1,85 @@
+import os
+import tempfile
+
+from response_log import ResponseLog, read_records, RECORD_RESPONSE
+
+
+def make_log(directory, **kwargs):
+    return ResponseLog(os.path.join(directory, 'responses.log'), **kwargs)
+
+
+def test_long_response_round_trips():
+    # A free-text answer longer than 64 KiB once overflowed the field length
+    answer = "The accused had no dishonest intention. " * 1750
+    assert len(answer) >= 70000
+    with tempfile.TemporaryDirectory() as directory:
+        log = make_log(directory)
+        log.start_session("s1", "theft")
+        log.log_response("s1", "q5", answer)
+        log.close()
+
+        records, good_offset = read_records(log.path)
+        assert good_offset == os.path.getsize(log.path)
+        responses = [fields for record_type, _, fields in records if record_type == RECORD_RESPONSE]
+        assert responses[0][:2] == ["s1", "q5"]
+
+        reopened = make_log(directory)
+        assert reopened.sessions["s1"].responses == {"q5": answer}
+        reopened.close()
+
+
+def test_torn_tail_is_dropped_on_replay():
+    with tempfile.TemporaryDirectory() as directory:
+        log = make_log(directory)
+        log.start_session("s1", "theft", started_at=1000.0)
+        log.log_response("s1", "q1", 3)
+        log.log_response("s1", "q2", [0, 1])
+        log.close()
+        intact = os.path.getsize(log.path)
+        # Simulate a crash partway through writing the last record
+        with open(log.path, 'r+b') as f:
+            f.truncate(intact - 3)
+
+        reopened = make_log(directory)
+        state = reopened.sessions["s1"]
+        assert state.started_at == 1000.0
+        assert state.responses == {"q1": 3}
+        # New records follow the last good one, not the torn bytes
+        reopened.log_response("s1", "q2", [0, 1])
+        reopened.close()
+        records, good_offset = read_records(log.path)
+        assert good_offset == os.path.getsize(log.path)
+        assert len(records) == 3
+
+        again = make_log(directory)
+        assert again.sessions["s1"].responses == {"q1": 3, "q2": [0, 1]}
+        again.close()
+
+
+def test_compaction_keeps_only_live_sessions():
+    with tempfile.TemporaryDirectory() as directory:
+        log = make_log(directory, compact_after=2)
+        for session_id in ("done1", "done2", "live"):
+            log.start_session(session_id, "theft", started_at=1000.0)
+            log.log_response(session_id, "q1", session_id)
+        log.complete_session("done1", {"total_score": 50})
+        log.complete_session("done2", {"total_score": 75})
+        log.log_response("live", "q2", "after compaction")
+        log.close()
+
+        records, _ = read_records(log.path)
+        assert {fields[0] for _, _, fields in records} == {"live"}
+        assert log.load_snapshot("done2")["report"] == {"total_score": 75}
+
+        reopened = make_log(directory)
+        assert list(reopened.sessions) == ["live"]
+        assert reopened.sessions["live"].responses == {"q1": "live", "q2": "after compaction"}
+        assert reopened.sessions["live"].started_at == 1000.0
+        reopened.close()
+
+
+if __name__ == "__main__":
+    test_long_response_round_trips()
+    test_torn_tail_is_dropped_on_replay()
+    test_compaction_keeps_only_live_sessions()
+    print("response log tests passed")
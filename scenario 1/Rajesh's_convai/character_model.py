@@ -0,0 +1,380 @@
+"""
+Compiled conversation-model artifacts
+
+Compiles a character's training data (rajesh_kumar_training_data.json) into
+one binary file of fixed-layout sections: interned strings, intents with
+integer ids, response and link tables, a keyword index, a character
+trigram index over the training patterns and their precomputed intent
+embeddings. CharacterModel memory-maps the file and reads sections as
+numpy views, so opening it costs a header parse and the tables are shared
+between processes through the page cache.
+
+    python character_model.py rajesh_kumar_training_data.json -o rajesh_kumar.rcm
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from intent_service import CharNgramEncoder, normalize
+
+MAGIC = b'RCMODEL\0'
+VERSION = 1
+MODEL_SUFFIX = '.rcm'
+HEADER = struct.Struct('<8sII')           # magic, version, section count
+SECTION = struct.Struct('<16sQQ')         # name, offset, length
+ALIGNMENT = 64
+NO_STRING = 0xFFFFFFFF
+
+INTENT_DTYPE = np.dtype([('name', '<u4'), ('response_start', '<u4'), ('response_count', '<u4'),
+                         ('context_start', '<u4'), ('context_count', '<u4'),
+                         ('follow_start', '<u4'), ('follow_count', '<u4')])
+# extra: string id of a JSON object with any other response fields, or NO_STRING
+RESPONSE_DTYPE = np.dtype([('text', '<u4'), ('emotion', '<u4'), ('trust_impact', '<i4'), ('extra', '<u4')])
+PATTERN_DTYPE = np.dtype([('original', '<u4'), ('text', '<u4'), ('intent', '<u4')])
+
+SECTION_DTYPES = {
+    'string_offsets': np.dtype('<u4'),
+    'string_data': np.dtype('u1'),
+    'intents': INTENT_DTYPE,
+    'responses': RESPONSE_DTYPE,
+    'links': np.dtype('<u4'),             # string ids of context requirements and follow-ups
+    'patterns': PATTERN_DTYPE,            # grouped by intent
+    'keyword_hashes': np.dtype('<u4'),    # sorted
+    'keyword_offsets': np.dtype('<u4'),
+    'keyword_intents': np.dtype('<u4'),
+    'gram_hashes': np.dtype('<u4'),       # sorted
+    'gram_offsets': np.dtype('<u4'),
+    'gram_patterns': np.dtype('<u4'),
+    'embeddings': np.dtype('<f4'),        # (patterns, embedding_dim), rows normalized
+    'idf': np.dtype('<f4'),
+    'meta': np.dtype('u1'),               # JSON: profile, emotions, trust system, shapes
+}
+
+
+def _hash(text):
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def trigrams(text):
+    padded = f"  {normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, text):
+        sid = self.ids.get(text)
+        if sid is None:
+            sid = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return sid
+
+    def arrays(self):
+        encoded = [s.encode('utf-8') for s in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return offsets, np.frombuffer(b''.join(encoded), dtype='u1')
+
+
+def _postings(keyed):
+    """
+    {hash: sorted ids} -> (sorted hashes, CSR offsets, concatenated ids)
+    """
+    hashes = np.array(sorted(keyed), dtype='<u4')
+    lists = [keyed[h] for h in hashes.tolist()]
+    offsets = np.zeros(len(lists) + 1, dtype='<u4')
+    np.cumsum([len(ids) for ids in lists], out=offsets[1:])
+    ids = np.array([i for ids in lists for i in ids], dtype='<u4')
+    return hashes, offsets, ids
+
+
+def compile_character(data, embedding_dim=1024):
+    """
+    Section arrays for a character's raw training data (the
+    conversation_data format read by preprocess_training_data.js)
+    """
+    strings = StringTable()
+    intents, responses, links, patterns = [], [], [], []
+    names = [item['intent'] for item in data['conversation_data']]
+    intent_ids = {name: i for i, name in enumerate(names)}
+
+    for item in data['conversation_data']:
+        record = [strings.intern(item['intent']), len(responses), len(item['character_responses'])]
+        for response in item['character_responses']:
+            extra = {k: v for k, v in response.items() if k not in ('text', 'emotion', 'trust_impact')}
+            responses.append((strings.intern(response['text']), strings.intern(response.get('emotion', 'neutral')),
+                              int(response.get('trust_impact', 0)),
+                              strings.intern(json.dumps(extra, sort_keys=True)) if extra else NO_STRING))
+        context = item.get('context_requirements') or []
+        follow = item.get('follow_up_likely') or []
+        record += [len(links), len(context)]
+        links.extend(strings.intern(c) for c in context)
+        record += [len(links), len(follow)]
+        links.extend(strings.intern(f) for f in follow)
+        intents.append(tuple(record))
+        for text in item['user_inputs']:
+            patterns.append((strings.intern(text), strings.intern(normalize(text)), intent_ids[item['intent']]))
+
+    # Keywords as in preprocess_training_data.js: tokens longer than 3 characters
+    keywords = {}
+    grams = {}
+    for pattern_id, (_, text_sid, intent_id) in enumerate(patterns):
+        text = strings.strings[text_sid]
+        for token in text.split(' '):
+            if len(token) > 3:
+                entry = keywords.setdefault(_hash(token), [])
+                if intent_id not in entry:
+                    entry.append(intent_id)
+        for gram in trigrams(text):
+            grams.setdefault(_hash(gram), []).append(pattern_id)
+
+    encoder = CharNgramEncoder(embedding_dim)
+    texts = [strings.strings[text_sid] for _, text_sid, _ in patterns]
+    encoder.fit(texts)
+    embeddings = encoder.encode(texts).astype('<f4') if texts else np.zeros((0, embedding_dim), dtype='<f4')
+
+    offsets, string_data = strings.arrays()
+    keyword_hashes, keyword_offsets, keyword_intents = _postings(keywords)
+    gram_hashes, gram_offsets, gram_patterns = _postings(grams)
+    meta = {
+        "character": data.get('character_profile', {}),
+        "emotions": data.get('emotional_transitions', {}),
+        "trust": data.get('trust_system', {}),
+        "embedding_dim": embedding_dim,
+        "ngram_range": list(encoder.ngram_range),
+        "counts": {"intents": len(intents), "responses": len(responses), "patterns": len(patterns),
+                   "strings": len(strings.strings), "keywords": len(keywords), "trigrams": len(grams)},
+    }
+    return {
+        'string_offsets': offsets,
+        'string_data': string_data,
+        'intents': np.array(intents, dtype=INTENT_DTYPE),
+        'responses': np.array(responses, dtype=RESPONSE_DTYPE),
+        'links': np.array(links, dtype='<u4'),
+        'patterns': np.array(patterns, dtype=PATTERN_DTYPE),
+        'keyword_hashes': keyword_hashes,
+        'keyword_offsets': keyword_offsets,
+        'keyword_intents': keyword_intents,
+        'gram_hashes': gram_hashes,
+        'gram_offsets': gram_offsets,
+        'gram_patterns': gram_patterns,
+        'embeddings': embeddings,
+        'idf': encoder.idf.astype('<f4'),
+        'meta': np.frombuffer(json.dumps(meta).encode('utf-8'), dtype='u1'),
+    }
+
+
+def write_model(path, sections):
+    """
+    Write sections at ALIGNMENT-byte boundaries behind a section table.
+    Written to a temporary file and renamed, so readers never map a
+    half-written model.
+    """
+    names = list(SECTION_DTYPES)
+    position = HEADER.size + SECTION.size * len(names)
+    table = []
+    for name in names:
+        position += -position % ALIGNMENT
+        size = sections[name].nbytes
+        table.append((name, position, size))
+        position += size
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(names)))
+        for name, offset, size in table:
+            f.write(SECTION.pack(name.encode('ascii'), offset, size))
+        for name, offset, size in table:
+            f.write(b'\0' * (offset - f.tell()))
+            f.write(np.ascontiguousarray(sections[name]).tobytes())
+    os.replace(tmp_path, path)
+
+
+def compile_file(source, output, embedding_dim=1024):
+    with open(source, 'rb') as f:
+        raw = f.read()
+    sections = compile_character(json.loads(raw.decode('utf-8')), embedding_dim)
+    meta = json.loads(sections['meta'].tobytes().decode('utf-8'))
+    meta['source_sha256'] = hashlib.sha256(raw).hexdigest()
+    sections['meta'] = np.frombuffer(json.dumps(meta).encode('utf-8'), dtype='u1')
+    write_model(output, sections)
+    return meta
+
+
+class CharacterModel:
+    """
+    Read-only view of a compiled model. Tables are numpy arrays over the
+    memory-mapped file; strings are decoded on access.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled character model")
+        if version != VERSION:
+            raise ValueError(f"{path} has model version {version}, expected {VERSION}")
+        self.sections = {}
+        for i in range(count):
+            name, offset, size = SECTION.unpack_from(self._map, HEADER.size + i * SECTION.size)
+            name = name.rstrip(b'\0').decode('ascii')
+            dtype = SECTION_DTYPES.get(name)
+            if dtype is not None:
+                self.sections[name] = np.frombuffer(self._map, dtype=dtype, count=size // dtype.itemsize,
+                                                    offset=offset)
+        self.intents = self.sections['intents']
+        self.responses = self.sections['responses']
+        self.patterns = self.sections['patterns']
+        self._meta = None
+        self._intent_ids = None
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            self._meta = json.loads(self.sections['meta'].tobytes().decode('utf-8'))
+        return self._meta
+
+    @property
+    def embeddings(self):
+        return self.sections['embeddings'].reshape(len(self.patterns), self.meta['embedding_dim'])
+
+    def string(self, sid):
+        offsets = self.sections['string_offsets']
+        return self.sections['string_data'][offsets[sid]:offsets[sid + 1]].tobytes().decode('utf-8')
+
+    def intent_name(self, intent_id):
+        return self.string(self.intents[intent_id]['name'])
+
+    def intent_id(self, name):
+        if self._intent_ids is None:
+            self._intent_ids = {self.intent_name(i): i for i in range(len(self.intents))}
+        return self._intent_ids.get(name)
+
+    def intent(self, name):
+        """
+        {"responses", "follow_ups", "context_required"} as in
+        rajesh_kumar_processed.json, or None for an unknown intent
+        """
+        intent_id = self.intent_id(name)
+        if intent_id is None:
+            return None
+        record = self.intents[intent_id]
+        links = self.sections['links']
+        start, count = int(record['response_start']), int(record['response_count'])
+        return {
+            "responses": [self._response(r) for r in self.responses[start:start + count]],
+            "follow_ups": [self.string(s) for s in links[record['follow_start']:
+                                                         record['follow_start'] + record['follow_count']]],
+            "context_required": [self.string(s) for s in links[record['context_start']:
+                                                               record['context_start'] + record['context_count']]],
+        }
+
+    def _response(self, record):
+        response = {"text": self.string(record['text']), "emotion": self.string(record['emotion']),
+                    "trust_impact": int(record['trust_impact'])}
+        if record['extra'] != NO_STRING:
+            response.update(json.loads(self.string(record['extra'])))
+        return response
+
+    def _lookup(self, prefix, key):
+        hashes = self.sections[f'{prefix}_hashes']
+        h = _hash(key)
+        i = int(np.searchsorted(hashes, h))
+        if i == len(hashes) or hashes[i] != h:
+            return self.sections[f'{prefix}_offsets'][:0]
+        offsets = self.sections[f'{prefix}_offsets']
+        postings = self.sections['keyword_intents' if prefix == 'keyword' else 'gram_patterns']
+        return postings[offsets[i]:offsets[i + 1]]
+
+    def keyword_intents(self, token):
+        """
+        Intent names whose patterns contain token (keyword map of the
+        JavaScript engine)
+        """
+        return [self.intent_name(i) for i in self._lookup('keyword', token)]
+
+    def candidate_patterns(self, text, limit=20):
+        """
+        Pattern ids sharing the most character trigrams with text, best
+        first; a cheap shortlist for exact fuzzy scoring
+        """
+        hits = [self._lookup('gram', gram) for gram in trigrams(text)]
+        hits = [h for h in hits if len(h)]
+        if not hits:
+            return []
+        counts = np.bincount(np.concatenate(hits), minlength=len(self.patterns))
+        order = np.argsort(-counts, kind='stable')[:limit]
+        return [int(i) for i in order if counts[i]]
+
+    def pattern(self, pattern_id):
+        record = self.patterns[pattern_id]
+        return {"original": self.string(record['original']), "normalized": self.string(record['text']),
+                "intent": self.intent_name(record['intent'])}
+
+    def to_processed(self):
+        """
+        The rajesh_kumar_processed.json structure, for engines that still
+        take the JSON form
+        """
+        keywords = {}
+        for record in self.patterns:
+            intent = self.intent_name(record['intent'])
+            for token in self.string(record['text']).split(' '):
+                if len(token) > 3:
+                    entry = keywords.setdefault(token, [])
+                    if intent not in entry:
+                        entry.append(intent)
+        inputs = []
+        for i in range(len(self.patterns)):
+            pattern = self.pattern(i)
+            inputs.append(dict(pattern, tokens=pattern['normalized'].split(' ')))
+        return {
+            "character": self.meta['character'],
+            "intents": {self.intent_name(i): self.intent(self.intent_name(i)) for i in range(len(self.intents))},
+            "keywords": keywords,
+            "inputs": inputs,
+            "emotions": self.meta['emotions'],
+            "trust": self.meta['trust'],
+        }
+
+    def close(self):
+        self.sections.clear()
+        self.intents = self.responses = self.patterns = None
+        self._map.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a character's training data into a binary model")
+    parser.add_argument('source', help="training data JSON (conversation_data format)")
+    parser.add_argument('-o', '--output', help=f"model path (default: source with {MODEL_SUFFIX})")
+    parser.add_argument('--embedding-dim', type=int, default=1024)
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.source)[0] + MODEL_SUFFIX
+    start = time.perf_counter()
+    meta = compile_file(args.source, output, args.embedding_dim)
+    compile_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    model = CharacterModel(output)
+    if len(model.intents):
+        model.intent(model.intent_name(0))
+    open_ms = (time.perf_counter() - start) * 1000
+    print(json.dumps({"success": True, "output": output, "bytes": os.path.getsize(output),
+                      "counts": meta['counts'], "compile_seconds": compile_seconds, "open_ms": open_ms}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
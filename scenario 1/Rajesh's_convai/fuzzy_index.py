@@ -0,0 +1,320 @@
+"""
+Fuzzy utterance index
+
+Finds training patterns within an edit distance of an utterance, or above
+a similarity, without computing the distance to all of them. A character
+count bound, evaluated for every pattern in one numpy expression, rules
+out most patterns; the rest get an exact distance from Myers'
+bit-parallel algorithm, which gives exactly the values of the engine's
+levenshteinDistance. first_match() returns what the engine's fuzzy loop
+in recognizeIntent returns.
+
+    python fuzzy_index.py --sizes 1000,10000,100000
+"""
+
+import argparse
+import heapq
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+# RajeshConversationEngine.recognizeIntent accepts a fuzzy match above this
+ENGINE_THRESHOLD = 0.6
+
+
+def levenshtein_distance(a, b):
+    """
+    Reference dynamic-programming distance, line for line the engine's
+    levenshteinDistance
+    """
+    previous = list(range(len(a) + 1))
+    for i in range(1, len(b) + 1):
+        current = [i] + [0] * len(a)
+        for j in range(1, len(a) + 1):
+            if b[i - 1] == a[j - 1]:
+                current[j] = previous[j - 1]
+            else:
+                current[j] = min(previous[j - 1] + 1, current[j - 1] + 1, previous[j] + 1)
+        previous = current
+    return previous[len(a)]
+
+
+def calculate_similarity(a, b):
+    """
+    The engine's calculateSimilarity: 1 - distance / length of the longer
+    """
+    longer = max(len(a), len(b))
+    if longer == 0:
+        return 1.0
+    return (longer - levenshtein_distance(a, b)) / longer
+
+
+class Query:
+    """
+    An utterance prepared for Myers' bit-parallel edit distance: one
+    bitmask per character, after which the distance to any string takes a
+    few integer operations per character of that string.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.length = len(text)
+        self.masks = {}
+        for i, char in enumerate(text):
+            self.masks[char] = self.masks.get(char, 0) | (1 << i)
+        self.evaluations = 0
+
+    def distance(self, other):
+        self.evaluations += 1
+        m = self.length
+        if m == 0:
+            return len(other)
+        full = (1 << m) - 1
+        high = 1 << (m - 1)
+        positive, negative, score = full, 0, m
+        masks = self.masks
+        for char in other:
+            eq = masks.get(char, 0)
+            xv = eq | negative
+            xh = (((eq & positive) + positive) ^ positive) | eq
+            hp = negative | (~(xh | positive) & full)
+            hn = positive & xh
+            if hp & high:
+                score += 1
+            elif hn & high:
+                score -= 1
+            # Row 0 of the global distance matrix grows by one per column
+            hp = ((hp << 1) | 1) & full
+            hn = (hn << 1) & full
+            positive = hn | (~(xv | hp) & full)
+            negative = hp & xv
+        return score
+
+    def similarity(self, other):
+        longer = max(self.length, len(other))
+        if longer == 0:
+            return 1.0
+        return (longer - self.distance(other)) / longer
+
+
+class FuzzyIndex:
+    """
+    Patterns with their character counts in one (patterns, alphabet)
+    matrix. Every edit changes one character, so
+        distance(a, b) >= max(len a, len b) - shared characters
+    (shared counted with multiplicity). That bound is computed for all
+    patterns at once with numpy and only patterns it cannot rule out get
+    an exact distance. Pattern ids are positions in the list given to the
+    constructor, so ties resolve as a scan in that order does.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.alphabet = {char: i for i, char in enumerate(sorted(set(''.join(self.patterns))))}
+        # Characters outside the alphabet share the last column; that can only
+        # overstate shared characters, which keeps the bound a lower bound
+        self.counts = np.zeros((len(self.patterns), len(self.alphabet) + 1), dtype=np.int16)
+        for row, text in enumerate(self.patterns):
+            for char, count in Counter(text).items():
+                self.counts[row, self.alphabet.get(char, len(self.alphabet))] += count
+        self.lengths = np.array([len(text) for text in self.patterns], dtype=np.int32)
+        self.last_evaluations = 0
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def _bounds(self, query):
+        """
+        (lower bound on the distance, length of the longer string) for
+        every pattern
+        """
+        counts = np.zeros(self.counts.shape[1], dtype=np.int16)
+        for char, count in Counter(query.text).items():
+            counts[self.alphabet.get(char, len(self.alphabet))] += count
+        shared = np.minimum(self.counts, counts).sum(axis=1)
+        longer = np.maximum(self.lengths, query.length)
+        return longer - shared, longer
+
+    @staticmethod
+    def _radius(longer, threshold):
+        # similarity >= threshold  <=>  distance <= (1 - threshold) * longer;
+        # the epsilon only widens the search, results are filtered exactly
+        return np.floor((1.0 - threshold) * longer + 1e-9)
+
+    def within(self, text, k):
+        """
+        [(pattern id, distance)] of every pattern within edit distance k,
+        closest first
+        """
+        query = Query(text)
+        bound, _ = self._bounds(query)
+        found = []
+        for pattern_id in np.flatnonzero(bound <= k).tolist():
+            d = query.distance(self.patterns[pattern_id])
+            if d <= k:
+                found.append((pattern_id, d))
+        self.last_evaluations = query.evaluations
+        return sorted(found, key=lambda item: (item[1], item[0]))
+
+    def _similar(self, text, threshold, stop_at_first=False):
+        query = Query(text)
+        bound, longer = self._bounds(query)
+        found = []
+        for pattern_id in np.flatnonzero(bound <= self._radius(longer, threshold)).tolist():
+            size = int(longer[pattern_id])
+            similarity = (size - query.distance(self.patterns[pattern_id])) / size if size else 1.0
+            if similarity > threshold:
+                found.append((pattern_id, similarity))
+                if stop_at_first:
+                    break
+        self.last_evaluations = query.evaluations
+        return found
+
+    def above(self, text, threshold=ENGINE_THRESHOLD):
+        """
+        [(pattern id, similarity)] with similarity above threshold, by
+        pattern id
+        """
+        return self._similar(text, threshold)
+
+    def first_match(self, text, threshold=ENGINE_THRESHOLD):
+        """
+        The pattern id the engine's fuzzy loop returns: the first pattern,
+        in order, with similarity above threshold; None if there is none
+        """
+        found = self._similar(text, threshold, stop_at_first=True)
+        return found[0][0] if found else None
+
+    def top(self, text, n=5):
+        """
+        [(pattern id, similarity)] of the n most similar patterns, best
+        first (ties by pattern id). Patterns are verified in order of their
+        best possible similarity, stopping once that cannot beat the n-th
+        result.
+        """
+        query = Query(text)
+        bound, longer = self._bounds(query)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            best_possible = np.where(longer > 0, (longer - bound) / longer, 1.0)
+        heap = []  # (similarity, -pattern id): the worst kept result on top
+        for pattern_id in np.lexsort((np.arange(len(self.patterns)), -best_possible)).tolist():
+            if len(heap) == n and best_possible[pattern_id] < heap[0][0]:
+                break
+            size = int(longer[pattern_id])
+            similarity = (size - query.distance(self.patterns[pattern_id])) / size if size else 1.0
+            item = (similarity, -pattern_id)
+            if len(heap) < n:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        self.last_evaluations = query.evaluations
+        return [(-negative_id, similarity) for similarity, negative_id in sorted(heap, reverse=True)]
+
+
+def _scan_first_match(patterns, text, threshold=ENGINE_THRESHOLD):
+    query = Query(text)
+    for pattern_id, pattern in enumerate(patterns):
+        if query.similarity(pattern) > threshold:
+            return pattern_id
+    return None
+
+
+def _synthetic_patterns(count, seed=7):
+    """
+    Short scripted utterances built from the training data's vocabulary
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(here, 'rajesh_kumar_training_data.json'), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    vocabulary = sorted({word.strip('?,.!').lower() for item in data['conversation_data']
+                         for text in item['user_inputs'] for word in text.split()} - {''})
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(vocabulary) for _ in range(rng.randint(2, 6))) for _ in range(count)]
+
+
+def _typo(text, rng, edits=2):
+    chars = list(text)
+    for _ in range(edits):
+        i = rng.randrange(len(chars) + 1)
+        kind = rng.random()
+        if kind < 0.4 and i < len(chars):
+            chars[i] = rng.choice('abcdefghijklmnopqrstuvwxyz')
+        elif kind < 0.7 and i < len(chars):
+            del chars[i]
+        else:
+            chars.insert(i, rng.choice('abcdefghijklmnopqrstuvwxyz'))
+    return ''.join(chars)
+
+
+def _timed(function, texts):
+    answers, seconds = [], 0.0
+    for text in texts:
+        start = time.perf_counter()
+        answers.append(function(text))
+        seconds += time.perf_counter() - start
+    return answers, seconds
+
+
+def benchmark(sizes=(1000, 10000, 100000), queries=50, k=2, seed=11):
+    """
+    Index against a full scan for the engine's fuzzy lookup (first pattern
+    above 0.6 similarity) and for all patterns within edit distance k.
+    Both sides use the same distance routine, so the speedup comes from
+    evaluating fewer patterns; every answer is checked against the scan.
+    """
+    rng = random.Random(seed)
+    report = []
+    for size in sizes:
+        patterns = _synthetic_patterns(size)
+        start = time.perf_counter()
+        index = FuzzyIndex(patterns)
+        build_seconds = time.perf_counter() - start
+        # Half the queries are typos of stored patterns, half unrelated text
+        texts = [_typo(rng.choice(patterns), rng) for _ in range(queries // 2)]
+        texts += [_typo(' '.join(rng.sample(patterns, 2)), rng, 4) for _ in range(queries - len(texts))]
+
+        def scan_within(text):
+            query = Query(text)
+            found = [(i, query.distance(p)) for i, p in enumerate(patterns)]
+            return sorted(((i, d) for i, d in found if d <= k), key=lambda item: (item[1], item[0]))
+
+        entry = {"patterns": size, "queries": len(texts), "build_seconds": round(build_seconds, 3)}
+        for name, indexed, scanned in (("first_match", index.first_match, lambda t: _scan_first_match(patterns, t)),
+                                       (f"within_{k}", lambda t: index.within(t, k), scan_within)):
+            evaluations = 0
+            answers, index_seconds = [], 0.0
+            for text in texts:
+                start = time.perf_counter()
+                answers.append(indexed(text))
+                index_seconds += time.perf_counter() - start
+                evaluations += index.last_evaluations
+            expected, scan_seconds = _timed(scanned, texts)
+            entry[name] = {
+                "scan_ms_per_query": round(scan_seconds * 1000 / len(texts), 3),
+                "index_ms_per_query": round(index_seconds * 1000 / len(texts), 3),
+                "speedup": round(scan_seconds / index_seconds, 1) if index_seconds else None,
+                "evaluated_fraction": round(evaluations / (len(texts) * size), 4),
+                "mismatches": sum(a != b for a, b in zip(answers, expected)),
+            }
+        report.append(entry)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fuzzy utterance index against a full scan")
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('-k', type=int, default=2, help="edit distance for the within-k benchmark")
+    args = parser.parse_args()
+    report = benchmark([int(size) for size in args.sizes.split(',')], args.queries, args.k)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Rajesh intent service
+
+Embeds every training pattern once into a row-normalized matrix, so an
+utterance is classified with one matrix-vector product instead of an edit
+distance against each pattern (RajeshConversationEngine.recognizeIntent).
+The training file (raw, processed or compiled with character_model.py) is
+watched and the index rebuilt when it changes.
+
+    python intent_service.py "what happened that night"
+    python intent_service.py --serve     # newline-delimited JSON on stdin/stdout
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from fuzzy_index import ENGINE_THRESHOLD, FuzzyIndex
+
+try:
+    from sentence_transformers import SentenceTransformer
+    HAS_SENTENCE_TRANSFORMERS = True
+except ImportError:
+    HAS_SENTENCE_TRANSFORMERS = False
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TRAINING_PATH = os.environ.get('RAJESH_TRAINING_DATA', os.path.join(HERE, 'rajesh_kumar_processed.json'))
+FALLBACK_INTENT = 'general_unclear'
+MIN_CONFIDENCE = float(os.environ.get('RAJESH_INTENT_MIN_CONFIDENCE', '0.35'))
+
+WORD = re.compile(r"[a-z0-9']+")
+
+
+def normalize(text):
+    # Same normalization as RajeshConversationEngine.processInput
+    return text.lower().strip()
+
+
+class CharNgramEncoder:
+    """
+    Signed feature hashing of character 2-4 grams (within words, padded
+    with spaces) and whole words into `dim` buckets, TF-IDF weighted with
+    document frequencies from the training patterns. Character n-grams make
+    the similarity tolerant of typos and inflections, much like the edit
+    distance it replaces.
+    """
+
+    def __init__(self, dim=1024, ngram_range=(2, 4)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.idf = np.ones(dim, dtype=np.float32)
+
+    def _features(self, text):
+        grams = []
+        low, high = self.ngram_range
+        for word in WORD.findall(normalize(text)):
+            grams.append(word)
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        hashes = np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint32, count=len(grams))
+        return (hashes % np.uint32(self.dim)).astype(np.int64), np.where(hashes & np.uint32(0x80000000), -1.0, 1.0)
+
+    def _counts(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            indices, signs = self._features(text)
+            np.add.at(matrix[row], indices, signs)
+        return matrix
+
+    def fit(self, texts):
+        counts = self._counts(texts)
+        df = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        return self
+
+    def encode(self, texts):
+        counts = self._counts(texts)
+        weighted = np.sign(counts) * np.log1p(np.abs(counts)) * self.idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        return weighted / np.where(norms == 0, 1, norms)
+
+
+class SentenceEncoder:
+    """
+    Semantic embeddings from a sentence-transformers model (set
+    RAJESH_INTENT_MODEL), for paraphrases that share few characters
+    """
+
+    def __init__(self, model_name):
+        if not HAS_SENTENCE_TRANSFORMERS:
+            raise RuntimeError("sentence-transformers library not available")
+        self.model = SentenceTransformer(model_name)
+
+    def fit(self, texts):
+        return self
+
+    def encode(self, texts):
+        return self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def default_encoder():
+    model_name = os.environ.get('RAJESH_INTENT_MODEL')
+    if model_name and HAS_SENTENCE_TRANSFORMERS:
+        return SentenceEncoder(model_name)
+    return CharNgramEncoder()
+
+
+def load_patterns(path):
+    """
+    [(normalized pattern, intent)] from rajesh_kumar_processed.json or the
+    raw rajesh_kumar_training_data.json
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if 'inputs' in data:
+        return [(entry['normalized'], entry['intent']) for entry in data['inputs']]
+    return [(normalize(text), item['intent']) for item in data['conversation_data'] for text in item['user_inputs']]
+
+
+class IntentIndex:
+    """
+    Training patterns embedded once into a (patterns, dim) matrix, grouped
+    by intent. classify() scores an utterance against every pattern with a
+    single product and takes each intent's best pattern.
+    """
+
+    def __init__(self, path=DEFAULT_TRAINING_PATH, make_encoder=default_encoder, min_confidence=MIN_CONFIDENCE,
+                 reload_interval=1.0):
+        self.path = path
+        self.make_encoder = make_encoder
+        self.min_confidence = min_confidence
+        self.reload_interval = reload_interval
+        self._state = None
+        self._stamp = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """
+        Rebuild from the training file. The new index replaces the old one
+        in a single assignment, so concurrent classify() calls see either.
+        A compiled model (character_model.py, .rcm) brings its patterns
+        already grouped by intent and its embeddings precomputed; they are
+        used from the memory map as they are.
+        """
+        stat = os.stat(self.path)
+        if self.path.endswith('.rcm'):
+            from character_model import CharacterModel
+            model = CharacterModel(self.path)
+            patterns = [(model.string(r['text']), model.intent_name(r['intent'])) for r in model.patterns]
+            encoder = CharNgramEncoder(model.meta['embedding_dim'], tuple(model.meta['ngram_range']))
+            encoder.idf = model.sections['idf']
+            matrix = model.embeddings
+            ordered = patterns  # compiled in training order, which is already grouped
+        else:
+            patterns = load_patterns(self.path)
+            ordered = list(patterns)
+            # Group rows by intent so per-intent maxima are one reduceat
+            patterns.sort(key=lambda item: item[1])
+            encoder = self.make_encoder().fit([text for text, _ in patterns])
+            matrix = np.ascontiguousarray(encoder.encode([text for text, _ in patterns]), dtype=np.float32)
+        intents = [intent for _, intent in patterns]
+        starts = [i for i in range(len(intents)) if i == 0 or intents[i] != intents[i - 1]]
+        self._state = {
+            "encoder": encoder,
+            "matrix": matrix,
+            "texts": [text for text, _ in patterns],
+            "labels": [intents[i] for i in starts],
+            "starts": np.array(starts, dtype=np.int64),
+            "exact": {text: intent for text, intent in patterns},
+            # Training order, for the engine's first-match fuzzy semantics
+            "fuzzy": FuzzyIndex([text for text, _ in ordered]),
+            "fuzzy_intents": [intent for _, intent in ordered],
+        }
+        self._stamp = (stat.st_mtime_ns, stat.st_size)
+
+    def maybe_reload(self):
+        """
+        Reload if the training file changed; checked at most once per
+        reload_interval seconds
+        """
+        now = time.monotonic()
+        if now - self._checked < self.reload_interval:
+            return False
+        self._checked = now
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        if (stat.st_mtime_ns, stat.st_size) == self._stamp:
+            return False
+        with self._lock:
+            if (stat.st_mtime_ns, stat.st_size) != self._stamp:
+                self.reload()
+        return True
+
+    @property
+    def size(self):
+        return len(self._state["texts"])
+
+    def classify(self, text, top_k=3):
+        """
+        {"intent", "confidence", "runner_up", "candidates", "matched_pattern"}.
+        Below min_confidence the intent is general_unclear, as in the
+        JavaScript engine; the candidates are still reported.
+        """
+        self.maybe_reload()
+        state = self._state
+        normalized = normalize(text)
+        exact = state["exact"].get(normalized)
+        if exact is not None:
+            return {"intent": exact, "confidence": 1.0, "runner_up": None,
+                    "candidates": [{"intent": exact, "confidence": 1.0}], "matched_pattern": normalized}
+
+        similarity = state["matrix"] @ state["encoder"].encode([normalized])[0]
+        best = np.maximum.reduceat(similarity, state["starts"])
+        order = np.argsort(-best)[:max(top_k, 2)]
+        candidates = [{"intent": state["labels"][i], "confidence": float(best[i])} for i in order]
+        winner = candidates[0]
+        return {
+            "intent": winner["intent"] if winner["confidence"] >= self.min_confidence else FALLBACK_INTENT,
+            "confidence": winner["confidence"],
+            "runner_up": candidates[1] if len(candidates) > 1 else None,
+            "candidates": candidates[:top_k],
+            "matched_pattern": state["texts"][int(np.argmax(similarity))],
+        }
+
+    def fuzzy_match(self, text, threshold=ENGINE_THRESHOLD):
+        """
+        The JavaScript engine's Levenshtein fallback: the intent of the
+        first training pattern more than threshold similar, or None
+        """
+        self.maybe_reload()
+        state = self._state
+        pattern_id = state["fuzzy"].first_match(normalize(text), threshold)
+        return None if pattern_id is None else state["fuzzy_intents"][pattern_id]
+
+
+def serve(index):
+    """
+    Worker mode: one JSON request per stdin line ({"id", "text", "top_k"},
+    {"id", "command": "fuzzy", "text"} or {"id", "command": "reload"}), one
+    JSON response line per request
+    """
+    def respond(result):
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+    respond({"id": None, "success": True, "ready": True, "patterns": index.size})
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            respond({"id": None, "success": False, "error": f"Invalid JSON input: {str(e)}"})
+            continue
+        if not isinstance(data, dict):
+            respond({"id": None, "success": False, "error": "Request must be a JSON object"})
+            continue
+        start = time.perf_counter()
+        try:
+            if data.get('command') == 'reload':
+                index.reload()
+                result = {"success": True, "patterns": index.size}
+            elif data.get('command') == 'fuzzy':
+                result = {"success": True, "intent": index.fuzzy_match(data['text'])}
+            else:
+                result = dict(index.classify(data['text'], int(data.get('top_k', 3))), success=True)
+        except Exception as e:
+            result = {"success": False, "error": f"Intent recognition failed: {str(e)}"}
+        result["id"] = data.get('id')
+        result["latency_ms"] = (time.perf_counter() - start) * 1000
+        respond(result)
+
+
+def main():
+    index = IntentIndex()
+    if '--serve' in sys.argv:
+        serve(index)
+        return
+    text = ' '.join(arg for arg in sys.argv[1:]) or sys.stdin.read()
+    start = time.perf_counter()
+    result = index.classify(text)
+    print(json.dumps(dict(result, latency_ms=(time.perf_counter() - start) * 1000), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import random
+
+from fuzzy_index import (ENGINE_THRESHOLD, FuzzyIndex, Query, _synthetic_patterns, _typo,
+                         calculate_similarity, levenshtein_distance)
+
+
+def make_queries(patterns, count=30, seed=3):
+    rng = random.Random(seed)
+    queries = ["", "a", "what happened at the shop", "régime ₹500"]
+    for _ in range(count):
+        queries.append(_typo(rng.choice(patterns), rng, edits=rng.randint(0, 3)))
+    return queries
+
+
+def test_bit_parallel_distance_matches_the_reference():
+    rng = random.Random(1)
+    words = ["", "a", "ab", "kitten", "sitting", "नमस्ते", "x" * 70]
+    for _ in range(100):
+        words.append(''.join(rng.choice("abcde ") for _ in range(rng.randint(0, 80))))
+    for a in words[:40]:
+        query = Query(a)
+        for b in rng.sample(words, 20):
+            assert query.distance(b) == levenshtein_distance(a, b), (a, b)
+
+
+def test_within_matches_a_scan():
+    patterns = _synthetic_patterns(300)
+    index = FuzzyIndex(patterns)
+    for text in make_queries(patterns):
+        distances = [levenshtein_distance(text, p) for p in patterns]
+        for k in (0, 2, 5):
+            expected = sorted(((i, d) for i, d in enumerate(distances) if d <= k),
+                              key=lambda item: (item[1], item[0]))
+            assert index.within(text, k) == expected
+
+
+def test_first_match_and_above_match_the_engine_loop():
+    patterns = _synthetic_patterns(300)
+    index = FuzzyIndex(patterns)
+    for text in make_queries(patterns):
+        similarities = [calculate_similarity(text, p) for p in patterns]
+        above = [i for i, s in enumerate(similarities) if s > ENGINE_THRESHOLD]
+        assert index.first_match(text) == (above[0] if above else None)
+        assert [i for i, _ in index.above(text)] == above
+
+
+def test_top_matches_a_sort():
+    patterns = _synthetic_patterns(300)
+    index = FuzzyIndex(patterns)
+    for text in make_queries(patterns, count=15):
+        ranked = sorted(((i, calculate_similarity(text, p)) for i, p in enumerate(patterns)),
+                        key=lambda item: (-item[1], item[0]))
+        assert index.top(text, n=5) == ranked[:5]
+
+
+if __name__ == "__main__":
+    test_bit_parallel_distance_matches_the_reference()
+    test_within_matches_a_scan()
+    test_first_match_and_above_match_the_engine_loop()
+    test_top_matches_a_sort()
+    print("fuzzy index tests passed")